@@ -0,0 +1,62 @@
+"""
+Compare solving the whole problem against solving its independent parts in parallel processes.
+
+For each dataset, reports the number of parts (faculty components with split room pools), the
+summed model size, the status, objective and wall time of solve() and solve_decomposed(), and
+the idle / single free periods of both timetables (validation.count_gaps).
+
+    python benchmarks/bench_decomposition.py --inputs data/large_3000 --room_model block --optimize_gaps
+"""
+import argparse
+import os
+import sys
+import time
+
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+from src.compiled_problem import compile_problem
+from src.decomposition import decompose, solve_decomposed
+from src.loader import load_problem_from_directory
+from src.timetable_solver import ROOM_MODELS, solve
+from src.validation import count_gaps, find_schedule_violations
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark independent-component decomposition")
+    parser.add_argument("--inputs", nargs="+", default=[os.path.join(project_dir, "data", "large_3000")])
+    parser.add_argument("--room_model", choices=ROOM_MODELS, default="block")
+    parser.add_argument("--optimize_gaps", action="store_true")
+    parser.add_argument("--max_processes", type=int, default=None)
+    parser.add_argument("--time_limit_sec", type=int, default=120)
+    args = parser.parse_args()
+
+    print(f"{'dataset':>14} {'mode':>10} {'parts':>5} {'vars':>8} {'status':>10} {'objective':>9} {'time (s)':>9} {'idle':>5} {'single':>6}")
+    for inputs_dir in args.inputs:
+        name = os.path.basename(os.path.normpath(inputs_dir))
+        problem = load_problem_from_directory(inputs_dir)
+        compiled = compile_problem(problem)
+        options = dict(time_limit_sec=args.time_limit_sec, optimize_gaps=args.optimize_gaps, room_model=args.room_model)
+        for mode in ("whole", "decomposed"):
+            start = time.perf_counter()
+            if mode == "whole":
+                result = solve(problem, compiled=compiled, **options)
+                parts = 1
+            else:
+                result = solve_decomposed(problem, compiled=compiled, split_rooms=True, max_processes=args.max_processes, **options)
+                parts = len(decompose(compiled, split_rooms=True))
+            elapsed = time.perf_counter() - start
+            idle, single = ("-", "-")
+            if result.status != "INFEASIBLE":
+                assert not find_schedule_violations(compiled, result)
+                idle, single = count_gaps(compiled, result)
+            objective = "-" if result.objective_value is None else f"{result.objective_value:g}"
+            print(
+                f"{name:>14} {mode:>10} {parts:>5} {result.metrics.num_variables:>8} {result.status:>10} {objective:>9} "
+                f"{elapsed:>9.1f} {idle:>5} {single:>6}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
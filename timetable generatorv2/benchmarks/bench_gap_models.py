@@ -0,0 +1,81 @@
+"""
+Compare the gap objective formulations of optimize_gaps ("triple" and "span").
+
+For each dataset and gap model, reports the model size and build time, the time to the first
+solution, and the final status and wall time. Both timetables are scored with the same
+metrics (validation.count_gaps): idle periods between classes and single free periods.
+
+    python benchmarks/bench_gap_models.py --inputs TT_Flexinput --students 1000 --room_model block
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+from src.compiled_problem import compile_problem
+from src.generate_synthetic import generate_dataset
+from src.loader import load_problem_from_directory
+from src.models import ProblemData
+from src.timetable_solver import GAP_MODELS, ROOM_MODELS, SolutionStream, build_model, solve
+from src.validation import count_gaps
+
+
+def _datasets(inputs: List[str], students: List[int]) -> List[Tuple[str, ProblemData]]:
+    datasets: List[Tuple[str, ProblemData]] = []
+    for inputs_dir in inputs:
+        datasets.append((os.path.basename(os.path.normpath(inputs_dir)), load_problem_from_directory(inputs_dir)))
+    for total_students in students:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            generate_dataset(out_dir=tmpdir, total_students=total_students, section_size=60, num_courses=10, num_lab_courses=3)
+            datasets.append((f"synthetic_{total_students}", load_problem_from_directory(tmpdir)))
+    return datasets
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark gap objective formulations")
+    parser.add_argument("--inputs", nargs="*", default=[os.path.join(project_dir, "TT_Flexinput")])
+    parser.add_argument("--students", type=int, nargs="*", default=[1000])
+    parser.add_argument("--room_model", choices=ROOM_MODELS, default="block")
+    parser.add_argument("--gap_model", choices=GAP_MODELS, nargs="+", default=list(GAP_MODELS))
+    parser.add_argument("--time_limit_sec", type=int, default=60)
+    args = parser.parse_args()
+
+    print(
+        f"{'dataset':>18} {'gap_model':>9} {'vars':>8} {'constraints':>11} {'build (s)':>9} {'first (s)':>9} "
+        f"{'status':>10} {'time (s)':>9} {'idle':>5} {'single':>6}"
+    )
+    for name, problem in _datasets(args.inputs, args.students):
+        compiled = compile_problem(problem)
+        for gap_model in args.gap_model:
+            start = time.perf_counter()
+            proto = build_model(compiled, optimize_gaps=True, room_model=args.room_model, gap_model=gap_model).model.Proto()
+            build_time = time.perf_counter() - start
+            first_solution: List[float] = []
+            stream = SolutionStream(lambda progress: first_solution.append(progress.wall_time) if not first_solution else None)
+            start = time.perf_counter()
+            result = solve(
+                problem,
+                time_limit_sec=args.time_limit_sec,
+                optimize_gaps=True,
+                compiled=compiled,
+                room_model=args.room_model,
+                gap_model=gap_model,
+                stream=stream,
+            )
+            elapsed = time.perf_counter() - start
+            first = f"{first_solution[0]:>9.1f}" if first_solution else f"{'-':>9}"
+            idle, single = count_gaps(compiled, result) if result.status != "INFEASIBLE" else ("-", "-")
+            print(
+                f"{name:>18} {gap_model:>9} {len(proto.variables):>8} {len(proto.constraints):>11} {build_time:>9.2f} {first} "
+                f"{result.status:>10} {elapsed:>9.1f} {idle:>5} {single:>6}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+Benchmark the greedy constructor (solve_greedy, --engine greedy).
+
+For each dataset, builds a timetable with every seed and reports how many attempts succeeded,
+the median and slowest build time and the idle / single free periods of the last timetable
+(validation.count_gaps); every timetable is checked with find_schedule_violations. With
+--cp_sat, also compares CP-SAT's time to a first timetable without and with the greedy
+timetable as hint.
+
+    python benchmarks/bench_greedy.py --inputs TT_Flexinput data/large_1000 --students 1000 20000 --cp_sat
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+from src.compiled_problem import compile_problem
+from src.generate_synthetic import generate_dataset
+from src.greedy import solve_greedy
+from src.loader import load_problem_from_directory
+from src.models import ProblemData
+from src.solver_params import SolverParams
+from src.timetable_solver import ROOM_MODELS, solve
+from src.validation import count_gaps, find_schedule_violations
+
+
+def _datasets(inputs: List[str], students: List[int], num_courses: int, num_lab_courses: int) -> List[Tuple[str, ProblemData]]:
+    datasets: List[Tuple[str, ProblemData]] = []
+    for inputs_dir in inputs:
+        datasets.append((os.path.basename(os.path.normpath(inputs_dir)), load_problem_from_directory(inputs_dir)))
+    for total_students in students:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            generate_dataset(out_dir=tmpdir, total_students=total_students, section_size=60, num_courses=num_courses, num_lab_courses=num_lab_courses)
+            datasets.append((f"synthetic_{total_students}", load_problem_from_directory(tmpdir)))
+    return datasets
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the greedy constructor")
+    parser.add_argument("--inputs", nargs="*", default=[os.path.join(project_dir, "TT_Flexinput")])
+    parser.add_argument("--students", type=int, nargs="*", default=[1000])
+    parser.add_argument("--num_courses", type=int, default=10)
+    parser.add_argument("--num_lab_courses", type=int, default=3)
+    parser.add_argument("--seeds", type=int, default=10)
+    parser.add_argument("--cp_sat", action="store_true", help="Also time CP-SAT's first timetable without / with the greedy hint")
+    parser.add_argument("--room_model", choices=ROOM_MODELS, default="block")
+    parser.add_argument("--time_limit_sec", type=int, default=120)
+    args = parser.parse_args()
+
+    header = f"{'dataset':>18} {'sections':>8} {'success':>8} {'median (s)':>10} {'max (s)':>8} {'idle':>5} {'single':>6}"
+    if args.cp_sat:
+        header += f" {'cold (s)':>9} {'status':>10} {'hinted (s)':>10} {'status':>10}"
+    print(header)
+    for name, problem in _datasets(args.inputs, args.students, args.num_courses, args.num_lab_courses):
+        compiled = compile_problem(problem)
+        times: List[float] = []
+        successes = 0
+        found = None
+        for seed in range(1, args.seeds + 1):
+            start = time.perf_counter()
+            result = solve_greedy(problem, time_limit_sec=args.time_limit_sec, compiled=compiled, params=SolverParams(random_seed=seed))
+            times.append(time.perf_counter() - start)
+            if result.status != "INFEASIBLE":
+                assert not find_schedule_violations(compiled, result)
+                successes += 1
+                found = result
+        idle, single = count_gaps(compiled, found) if found is not None else ("-", "-")
+        line = f"{name:>18} {len(compiled.section_ids):>8} "
+        line += f"{successes}/{args.seeds}".rjust(8)
+        line += f" {statistics.median(times):>10.3f} {max(times):>8.3f} {idle:>5} {single:>6}"
+        if args.cp_sat:
+            start = time.perf_counter()
+            cold = solve(problem, time_limit_sec=args.time_limit_sec, compiled=compiled, room_model=args.room_model)
+            cold_time = time.perf_counter() - start
+            line += f" {cold_time:>9.1f} {cold.status:>10}"
+            if found is not None:
+                start = time.perf_counter()
+                hinted = solve(problem, time_limit_sec=args.time_limit_sec, compiled=compiled, room_model=args.room_model, hint_from=found)
+                line += f" {time.perf_counter() - start:>10.1f} {hinted.status:>10}"
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+Benchmark individual model-building stages on synthetic datasets.
+
+Each stage is timed twice on the same variables: once with a verbatim port of
+the previous generation loop and once with the stage function used by
+build_model.
+
+- faculty: every faculty x every timeslot x every (section, course) assignment
+  vs. the faculty -> requirements index with per-timeslot coverage buckets
+- rooms:   every room x every timeslot x every lecture/lab variable
+  vs. (timeslot, room) buckets filled in one pass over the room variables
+
+    python benchmarks/bench_model_build.py --stage faculty rooms --students 1000 3000 5000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import List
+
+from ortools.sat.python import cp_model
+
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+from src.compiled_problem import compile_problem
+from src.generate_synthetic import generate_dataset
+from src.loader import load_problem_from_directory
+from src.timetable_solver import TimetableModel, _add_faculty_constraints, _add_room_occupancy_constraints, _create_variables
+
+
+def _legacy_faculty_constraints(tm: TimetableModel) -> None:
+    # Verbatim port of the pre-index faculty clash and P1 loops
+    compiled = tm.compiled
+    problem = compiled.problem
+    course_by_id = problem.course_by_id()
+    req_map = problem.section_course_requirements_map()
+    fac_map = problem.faculty_assignment_map()
+    cover_by_block_size = compiled.cover_by_block_size
+    X_lec, Y_lab_start, model = tm.X_lec, tm.Y_lab_start, tm.model
+
+    for f in compiled.faculty_ids:
+        for t in compiled.T_non_break:
+            terms: List[cp_model.IntVar] = []
+            for (s, c_key), fac in fac_map.items():
+                if fac != f:
+                    continue
+                if (s, c_key, t) in X_lec:
+                    terms.append(X_lec[(s, c_key, t)])
+                defaults = course_by_id[c_key]
+                r = req_map.get((s, c_key))
+                weekly_lab_sessions = (defaults.lab_sessions_per_week if defaults.is_lab else 0) if r is None else r.weekly_lab_sessions
+                lab_block_size = (defaults.lab_block_size if defaults.is_lab else 0) if r is None else (r.lab_block_size or (defaults.lab_block_size if defaults.is_lab else 0))
+                if weekly_lab_sessions > 0 and lab_block_size > 0 and t in cover_by_block_size.get(lab_block_size, {}):
+                    for start_t in cover_by_block_size[lab_block_size][t]:
+                        var = Y_lab_start.get((s, c_key, start_t))
+                        if var is not None:
+                            terms.append(var)
+            if terms:
+                model.Add(sum(terms) <= 1)
+
+    for f in compiled.faculty_ids:
+        p1_terms: List[cp_model.IntVar] = []
+        for (s, c_key), fac in fac_map.items():
+            if fac != f:
+                continue
+            for t in compiled.P1_timeslots:
+                if (s, c_key, t) in X_lec:
+                    p1_terms.append(X_lec[(s, c_key, t)])
+            defaults = course_by_id[c_key]
+            r = req_map.get((s, c_key))
+            weekly_lab_sessions = (defaults.lab_sessions_per_week if defaults.is_lab else 0) if r is None else r.weekly_lab_sessions
+            lab_block_size = (defaults.lab_block_size if defaults.is_lab else 0) if r is None else (r.lab_block_size or (defaults.lab_block_size if defaults.is_lab else 0))
+            if weekly_lab_sessions > 0 and lab_block_size > 0:
+                for start_t in compiled.P1_timeslots:
+                    if (s, c_key, start_t) in Y_lab_start:
+                        p1_terms.append(Y_lab_start[(s, c_key, start_t)])
+        if p1_terms:
+            model.Add(sum(p1_terms) <= 3)
+
+
+def _legacy_room_occupancy_constraints(tm: TimetableModel) -> None:
+    # Verbatim port of the pre-bucket room occupancy loop
+    compiled = tm.compiled
+    problem = compiled.problem
+    course_by_id = problem.course_by_id()
+    req_map = problem.section_course_requirements_map()
+    cover_by_block_size = compiled.cover_by_block_size
+    X_lec, Y_lab_start, R_lec, R_lab_start, model = tm.X_lec, tm.Y_lab_start, tm.R_lec, tm.R_lab_start, tm.model
+
+    for r in compiled.rooms:
+        r_id = r.room_id
+        for t in compiled.T_non_break:
+            occ_terms: List[cp_model.IntVar] = []
+            for (s, c, tt), _ in list(X_lec.items()):
+                if tt != t:
+                    continue
+                if (s, c, t, r_id) in R_lec:
+                    occ_terms.append(R_lec[(s, c, t, r_id)])
+            for (s, c, start_t), y in Y_lab_start.items():
+                defaults = course_by_id[c]
+                r_req = req_map.get((s, c))
+                lab_block_size = (defaults.lab_block_size if defaults.is_lab else 0) if r_req is None else (r_req.lab_block_size or (defaults.lab_block_size if defaults.is_lab else 0))
+                if lab_block_size and t in cover_by_block_size.get(lab_block_size, {}):
+                    if start_t in cover_by_block_size[lab_block_size][t]:
+                        if (s, c, start_t, r_id) in R_lab_start:
+                            occ_terms.append(R_lab_start[(s, c, start_t, r_id)])
+            if occ_terms:
+                model.Add(sum(occ_terms) <= 1)
+
+
+STAGES = {
+    "faculty": (_legacy_faculty_constraints, _add_faculty_constraints),
+    "rooms": (_legacy_room_occupancy_constraints, _add_room_occupancy_constraints),
+}
+
+
+def _time_stage(compiled, stage) -> float:
+    tm = TimetableModel(model=cp_model.CpModel(), compiled=compiled)
+    _create_variables(tm)
+    start = time.perf_counter()
+    stage(tm)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark model-building stages")
+    parser.add_argument("--stage", nargs="+", choices=sorted(STAGES), default=sorted(STAGES))
+    parser.add_argument("--students", type=int, nargs="+", default=[1000, 3000, 5000])
+    parser.add_argument("--section_size", type=int, default=60)
+    args = parser.parse_args()
+
+    print(f"{'stage':>8} {'students':>9} {'sections':>9} {'faculty':>8} {'rooms':>6} {'legacy (s)':>11} {'indexed (s)':>12} {'speed-up':>9}")
+    for total_students in args.students:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            generate_dataset(
+                out_dir=tmpdir,
+                total_students=total_students,
+                section_size=args.section_size,
+                num_courses=10,
+                num_lab_courses=3,
+            )
+            problem = load_problem_from_directory(tmpdir)
+        for stage_name in args.stage:
+            legacy_stage, indexed_stage = STAGES[stage_name]
+            stage_problem = problem
+            if stage_name != "rooms":
+                # Rooms do not affect the other stages; leave them out to keep variable creation cheap
+                stage_problem = problem.copy(update={"rooms": None})
+            compiled = compile_problem(stage_problem)
+            legacy = _time_stage(compiled, legacy_stage)
+            indexed = _time_stage(compiled, indexed_stage)
+            print(
+                f"{stage_name:>8} {total_students:>9} {len(compiled.section_ids):>9} {len(compiled.faculty_ids):>8} "
+                f"{len(compiled.rooms):>6} {legacy:>11.3f} {indexed:>12.3f} {legacy / max(indexed, 1e-9):>8.1f}x"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
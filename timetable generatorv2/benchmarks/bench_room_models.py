@@ -0,0 +1,81 @@
+"""
+Compare the room formulations (per_slot, block, two_phase) and clash engines
+(boolean, interval) end to end.
+
+For each dataset, engine and room model, reports the size and build time of the model and
+the wall time, status and objective of a full solve. Synthetic datasets are generated on the fly with
+generate_synthetic; existing input directories can be passed with --inputs.
+
+    python benchmarks/bench_room_models.py --inputs TT_Flexinput --students 1000 3000
+    python benchmarks/bench_room_models.py --students 5000 --room_model block two_phase
+    python benchmarks/bench_room_models.py --engine boolean interval --room_model per_slot block
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+from src.compiled_problem import compile_problem
+from src.generate_synthetic import generate_dataset
+from src.loader import load_problem_from_directory
+from src.models import ProblemData
+from src.timetable_solver import ENGINES, ROOM_MODELS, build_model, solve
+
+
+def _datasets(inputs: List[str], students: List[int]) -> List[Tuple[str, ProblemData]]:
+    datasets: List[Tuple[str, ProblemData]] = []
+    for inputs_dir in inputs:
+        datasets.append((os.path.basename(os.path.normpath(inputs_dir)), load_problem_from_directory(inputs_dir)))
+    for total_students in students:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            generate_dataset(out_dir=tmpdir, total_students=total_students, section_size=60, num_courses=10, num_lab_courses=3)
+            datasets.append((f"synthetic_{total_students}", load_problem_from_directory(tmpdir)))
+    return datasets
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark room formulations")
+    parser.add_argument("--inputs", nargs="*", default=[os.path.join(project_dir, "TT_Flexinput")])
+    parser.add_argument("--students", type=int, nargs="*", default=[1000])
+    parser.add_argument("--room_model", choices=ROOM_MODELS, nargs="+", default=list(ROOM_MODELS))
+    parser.add_argument("--engine", choices=ENGINES, nargs="+", default=["boolean"])
+    parser.add_argument("--time_limit_sec", type=int, default=60)
+    parser.add_argument("--optimize_gaps", action="store_true")
+    args = parser.parse_args()
+
+    print(
+        f"{'dataset':>18} {'engine':>8} {'room_model':>10} {'vars':>8} {'constraints':>11} {'build (s)':>9} "
+        f"{'status':>10} {'objective':>10} {'time (s)':>9}"
+    )
+    for name, problem in _datasets(args.inputs, args.students):
+        compiled = compile_problem(problem)
+        for engine in args.engine:
+            for room_model in args.room_model:
+                start = time.perf_counter()
+                proto = build_model(compiled, optimize_gaps=args.optimize_gaps, room_model=room_model, engine=engine).model.Proto()
+                build_time = time.perf_counter() - start
+                start = time.perf_counter()
+                result = solve(
+                    problem,
+                    time_limit_sec=args.time_limit_sec,
+                    optimize_gaps=args.optimize_gaps,
+                    compiled=compiled,
+                    room_model=room_model,
+                    engine=engine,
+                )
+                elapsed = time.perf_counter() - start
+                objective = "-" if result.objective_value is None else str(result.objective_value)
+                print(
+                    f"{name:>18} {engine:>8} {room_model:>10} {len(proto.variables):>8} {len(proto.constraints):>11} "
+                    f"{build_time:>9.2f} {result.status:>10} {objective:>10} {elapsed:>9.1f}"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Benchmark room symmetry breaking (room_symmetry=True) against the plain model.
+
+Solves each dataset with and without the room equivalence-class constraints and
+reports wall time, status and objective. Synthetic datasets are generated on the
+fly with generate_synthetic; existing input directories can be passed with --inputs.
+--keep_rooms N truncates rooms.csv to its first N rooms to build room-tight instances,
+where the symmetry between equal rooms matters most (proving infeasibility / optimality).
+
+    python benchmarks/bench_room_symmetry.py --inputs TT_Flexinput --students 1000 3000
+    python benchmarks/bench_room_symmetry.py --inputs TT_Flexinput --students --keep_rooms 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+from src.compiled_problem import compile_problem
+from src.generate_synthetic import generate_dataset
+from src.loader import load_problem_from_directory
+from src.models import ProblemData
+from src.timetable_solver import ROOM_MODELS, solve
+
+
+def _datasets(inputs: List[str], students: List[int]) -> List[Tuple[str, ProblemData]]:
+    datasets: List[Tuple[str, ProblemData]] = []
+    for inputs_dir in inputs:
+        datasets.append((os.path.basename(os.path.normpath(inputs_dir)), load_problem_from_directory(inputs_dir)))
+    for total_students in students:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            generate_dataset(out_dir=tmpdir, total_students=total_students, section_size=60, num_courses=10, num_lab_courses=3)
+            datasets.append((f"synthetic_{total_students}", load_problem_from_directory(tmpdir)))
+    return datasets
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark room symmetry breaking")
+    parser.add_argument("--inputs", nargs="*", default=[os.path.join(project_dir, "TT_Flexinput")])
+    parser.add_argument("--students", type=int, nargs="*", default=[1000])
+    parser.add_argument("--time_limit_sec", type=int, default=60)
+    parser.add_argument("--optimize_gaps", action="store_true")
+    parser.add_argument("--room_model", choices=ROOM_MODELS, default="per_slot")
+    parser.add_argument("--keep_rooms", type=int, default=None, help="Only keep the first N rooms of each dataset")
+    args = parser.parse_args()
+
+    print(f"{'dataset':>18} {'classes':>8} {'symmetry':>9} {'status':>10} {'objective':>10} {'time (s)':>9}")
+    for name, problem in _datasets(args.inputs, args.students):
+        if args.keep_rooms is not None and problem.rooms:
+            problem = problem.copy(update={"rooms": problem.rooms[: args.keep_rooms]})
+            name = f"{name}[{len(problem.rooms)}r]"
+        compiled = compile_problem(problem)
+        class_sizes = "/".join(str(len(c)) for c in compiled.room_equivalence_classes())
+        for room_symmetry in (False, True):
+            start = time.perf_counter()
+            result = solve(
+                problem,
+                time_limit_sec=args.time_limit_sec,
+                optimize_gaps=args.optimize_gaps,
+                compiled=compiled,
+                room_model=args.room_model,
+                room_symmetry=room_symmetry,
+            )
+            elapsed = time.perf_counter() - start
+            objective = "-" if result.objective_value is None else str(result.objective_value)
+            print(f"{name:>18} {class_sizes:>8} {str(room_symmetry):>9} {result.status:>10} {objective:>10} {elapsed:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Benchmark warm-started re-solves (solve(..., hint_from=<output dir>)).
+
+Solves each dataset once and exports it, applies a small weekly change (one room closed
+and one section-course handed to another faculty member), then re-solves the changed
+problem from scratch and from the exported timetable.
+
+    python benchmarks/bench_warm_start.py --inputs TT_Flexinput --students 1000 --room_model per_slot block
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+from src.compiled_problem import compile_problem
+from src.exporter import export_all
+from src.generate_synthetic import generate_dataset
+from src.loader import load_problem_from_directory
+from src.models import ProblemData
+from src.timetable_solver import ROOM_MODELS, solve
+from src.warm_start import hint_from_output_dir
+
+
+def _datasets(inputs: List[str], students: List[int]) -> List[Tuple[str, ProblemData]]:
+    datasets: List[Tuple[str, ProblemData]] = []
+    for inputs_dir in inputs:
+        datasets.append((os.path.basename(os.path.normpath(inputs_dir)), load_problem_from_directory(inputs_dir)))
+    for total_students in students:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            generate_dataset(out_dir=tmpdir, total_students=total_students, section_size=60, num_courses=10, num_lab_courses=3)
+            datasets.append((f"synthetic_{total_students}", load_problem_from_directory(tmpdir)))
+    return datasets
+
+
+def _weekly_change(problem: ProblemData) -> ProblemData:
+    # Close the last room and move the first assignment to the faculty member of the second one
+    rooms = problem.rooms[:-1] if problem.rooms else problem.rooms
+    faculty_courses = list(problem.faculty_courses)
+    if len(faculty_courses) > 1:
+        faculty_courses[0] = faculty_courses[0].copy(update={"faculty_id": faculty_courses[1].faculty_id})
+    return problem.copy(update={"rooms": rooms, "faculty_courses": faculty_courses})
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark warm-started re-solves")
+    parser.add_argument("--inputs", nargs="*", default=[os.path.join(project_dir, "TT_Flexinput")])
+    parser.add_argument("--students", type=int, nargs="*", default=[1000])
+    parser.add_argument("--room_model", choices=ROOM_MODELS, nargs="+", default=["per_slot"])
+    parser.add_argument("--time_limit_sec", type=int, default=90)
+    args = parser.parse_args()
+
+    print(f"{'dataset':>18} {'room_model':>10} {'hinted':>7} {'dropped':>7} {'cold (s)':>9} {'status':>10} {'warm (s)':>9} {'status':>10}")
+    for name, problem in _datasets(args.inputs, args.students):
+        changed = _weekly_change(problem)
+        compiled = compile_problem(changed)
+        for room_model in args.room_model:
+            previous = solve(problem, time_limit_sec=args.time_limit_sec, room_model=room_model)
+            if previous.status == "INFEASIBLE":
+                print(f"{name:>18} {room_model:>10} (no initial timetable)")
+                continue
+            with tempfile.TemporaryDirectory() as out_dir:
+                export_all(previous, out_dir)
+                hint = hint_from_output_dir(compiled, out_dir)
+
+            start = time.perf_counter()
+            cold = solve(changed, time_limit_sec=args.time_limit_sec, compiled=compiled, room_model=room_model)
+            cold_time = time.perf_counter() - start
+            start = time.perf_counter()
+            warm = solve(changed, time_limit_sec=args.time_limit_sec, compiled=compiled, room_model=room_model, hint_from=hint)
+            warm_time = time.perf_counter() - start
+            print(
+                f"{name:>18} {room_model:>10} {hint.num_classes:>7} {len(hint.dropped):>7} "
+                f"{cold_time:>9.1f} {cold.status:>10} {warm_time:>9.1f} {warm.status:>10}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,23 +1,58 @@
 from __future__ import annotations
 
 import base64
+import json
 import os
+import queue
 import tempfile
-from typing import Dict, List
+import threading
+import uuid
+from typing import Dict, List, Optional, Tuple
 
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 try:
+    from .compact_result import AnyResult, compact_result
+    from .compiled_problem import ROOM_DOMAINS, compile_problem
+    from .decomposition import solve_decomposed
+    from .disk_cache import CacheStats
+    from .explain import InfeasibilityExplanation, explain_infeasibility
     from .exporter import build_grids_by_faculty, build_grids_by_section
     from .feasibility import pre_solve_feasibility_check
+    from .greedy import GREEDY_ENGINE, solve_greedy
+    from .lns import solve_lns
     from .loader import load_problem_from_directory
-    from .timetable_solver import solve
+    from .model_cache import default_model_cache
+    from .portfolio import solve_portfolio
+    from .models import FacultyCourseAssignment, ProblemData, SectionCourseRequirement, Timeslot
+    from .repair import ScheduleDelta, resolve_with_delta
+    from .result_cache import default_result_cache
+    from .solve_metrics import SolveMetrics
+    from .solver_params import SolverParams, StopRules
+    from .timetable_solver import ENGINES, GAP_MODELS, ROOM_MODELS, SolutionProgress, SolutionStream, SolveResult, solve
+    from .warm_start import hint_from_entries, load_warm_start_hint
 except ImportError:  # pragma: no cover - running as script
+    from compact_result import AnyResult, compact_result
+    from compiled_problem import ROOM_DOMAINS, compile_problem
+    from decomposition import solve_decomposed
+    from disk_cache import CacheStats
+    from explain import InfeasibilityExplanation, explain_infeasibility
     from exporter import build_grids_by_faculty, build_grids_by_section
     from feasibility import pre_solve_feasibility_check
+    from greedy import GREEDY_ENGINE, solve_greedy
+    from lns import solve_lns
     from loader import load_problem_from_directory
-    from timetable_solver import solve
+    from model_cache import default_model_cache
+    from portfolio import solve_portfolio
+    from models import FacultyCourseAssignment, ProblemData, SectionCourseRequirement, Timeslot
+    from repair import ScheduleDelta, resolve_with_delta
+    from result_cache import default_result_cache
+    from solve_metrics import SolveMetrics
+    from solver_params import SolverParams, StopRules
+    from timetable_solver import ENGINES, GAP_MODELS, ROOM_MODELS, SolutionProgress, SolutionStream, SolveResult, solve
+    from warm_start import hint_from_entries, load_warm_start_hint
 
 
 class FilePayload(BaseModel):
@@ -25,145 +60,510 @@ class FilePayload(BaseModel):
     content: str  # base64 encoded csv bytes
 
 
+class SolverSettings(BaseModel):
+    numWorkers: Optional[int] = None  # default: one per CPU of the pod, shared by concurrent requests
+    seed: int = 1
+    relativeGap: Optional[float] = None
+    solverLog: bool = False  # return the CP-SAT search log as "solverLog"
+    noImprovementSec: Optional[float] = None  # optimizeGaps: stop after this long without a better timetable
+    noImprovementFraction: Optional[float] = None  # ... or after this share of timeLimit
+    targetObjective: Optional[int] = None  # optimizeGaps: stop at the first timetable this good
+
+    def to_params(self) -> SolverParams:
+        if self.numWorkers is not None and self.numWorkers < 1:
+            raise HTTPException(status_code=400, detail="numWorkers must be at least 1")
+        return SolverParams(
+            num_workers=self.numWorkers,
+            random_seed=self.seed,
+            relative_gap_limit=self.relativeGap,
+            log_lines=[] if self.solverLog else None,
+            stop_rules=StopRules(
+                no_improvement_sec=self.noImprovementSec,
+                no_improvement_fraction=self.noImprovementFraction,
+                target_objective=self.targetObjective,
+            ),
+        )
+
+
 class SolveRequest(BaseModel):
     files: List[FilePayload]
     timeLimit: int = 90
     optimizeGaps: bool = False
+    gapModel: str = "triple"  # "triple" or "span"
+    roomModel: str = "per_slot"  # "per_slot", "block" or "two_phase"
+    roomSymmetry: bool = False
+    roomDomains: str = "capacity"  # "capacity", "typed" or "typed_fallback" (see CompiledProblem.with_room_domains)
+    roomSlack: Optional[float] = None  # leave out rooms with more than (1 + roomSlack) x the section's students
+    engine: str = "boolean"  # "boolean", "interval" or "greedy" (no CP-SAT, no gap optimization)
+    hintFrom: Optional[Dict[str, List[Dict]]] = None  # "sections" of a previous /api/solve response
+    greedyHint: bool = False  # warm-start from a greedy timetable instead
+    solver: SolverSettings = SolverSettings()
+    useCache: bool = False  # opt in: answer identical requests from the on-disk result cache, reuse built models
+    decompose: bool = False  # solve independent parts (no shared faculty or rooms) in parallel processes
+    splitRooms: bool = False  # with decompose: split the rooms between faculty-independent parts
+    portfolio: int = 0  # race this many CP-SAT configurations in parallel processes (0 / 1: off)
+    lns: bool = False  # minimize gaps by Large Neighbourhood Search (short sub-solves around the fixed rest)
+    lnsSubTimeSec: float = 5.0  # with lns: time limit of each sub-solve
+    explain: bool = False  # when no timetable is found, search for a small conflicting set of input rows
+    explainTimeLimit: float = 120  # with explain: time limit of the conflict search
+
+
+class ResolveRequest(BaseModel):
+    files: List[FilePayload]  # inputs of the previous solve
+    previous: Dict[str, List[Dict]]  # "sections" of the previous /api/solve response
+    blockedFaculty: Dict[str, List[int]] = {}  # faculty_id -> timeslotIds
+    removedRooms: List[str] = []
+    changedRequirements: List[SectionCourseRequirement] = []
+    facultyReassignments: List[FacultyCourseAssignment] = []
+    timeLimit: int = 10
+    solver: SolverSettings = SolverSettings()
 
 
 app = FastAPI(title="ATGS v2 Scheduler API", version="2.0.0")
 
 
+def _load_problem(files: List[FilePayload], tmpdir: str) -> ProblemData:
+    # write provided csvs
+    for f in files:
+        raw = base64.b64decode(f.content.encode("utf-8"))
+        out_path = os.path.join(tmpdir, f.name)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        with open(out_path, "wb") as out:
+            out.write(raw)
+
+    try:
+        return load_problem_from_directory(tmpdir)
+    except Exception as e:  # pragma: no cover
+        raise HTTPException(status_code=400, detail=f"INPUT_ERROR: {e}")
+
+
+def _section_rows(slots: Dict[int, Tuple[str, str, str, str]], timeslot_by_id: Dict[int, Timeslot]) -> List[Dict]:
+    rows: List[Dict] = []
+    for tid, (course_id, faculty_id, room_id, kind) in slots.items():
+        ts = timeslot_by_id.get(tid)
+        if not ts:
+            continue
+        rows.append({
+            "timeslotId": tid,
+            "dayIndex": ts.day_index,
+            "dayName": ts.day_name,
+            "periodIndex": ts.period_index,
+            "courseId": course_id,
+            "facultyId": faculty_id,
+            "roomId": room_id,
+            "kind": kind,
+        })
+    return rows
+
+
+def _metrics_response(metrics: Optional[SolveMetrics]) -> Optional[Dict]:
+    if metrics is None:
+        return None
+    search = metrics.search
+    return {
+        "stageSec": metrics.stage_sec,
+        "parts": metrics.parts,
+        "lnsSteps": metrics.lns_steps,
+        "lnsImproved": metrics.lns_improved,
+        "numVariables": metrics.num_variables,
+        "numConstraints": metrics.num_constraints,
+        "families": {
+            name: {"variables": size.variables, "constraints": size.constraints, "buildSec": size.build_sec}
+            for name, size in metrics.families.items()
+        },
+        "search": {
+            "passes": search.passes,
+            "wallSec": search.wall_sec,
+            "presolveSec": search.presolve_sec,
+            "deterministicTime": search.deterministic_time,
+            "branches": search.branches,
+            "conflicts": search.conflicts,
+            "bestBound": search.best_bound,
+        },
+        "portfolio": [
+            {
+                "name": member.name,
+                "seed": member.random_seed,
+                "cpSat": member.cp_sat,
+                "status": member.status,
+                "stopReason": member.stop_reason,
+                "objectiveValue": member.objective_value,
+                "wallSec": member.wall_sec,
+                "winner": member.winner,
+            }
+            for member in metrics.portfolio
+        ],
+        "roomDomains": None if metrics.room_domains is None else {
+            "policy": metrics.room_domains.policy,
+            "roomVariables": metrics.room_domains.room_variables,
+            "capacityRoomVariables": metrics.room_domains.capacity_room_variables,
+        },
+    }
+
+
+def _result_response(problem: ProblemData, result: AnyResult, warnings: List[str]) -> Dict:
+    # build per-section / per-faculty grids
+    section_grids = build_grids_by_section(result)
+    faculty_grids = build_grids_by_faculty(result)
+
+    # collect structures for backend
+    timeslot_by_id = {t.timeslot_id: t for t in result.timeslots}
+    # Read once: a CompactSolveResult derives the dict view on each access
+    schedule_by_section = result.schedule_by_section
+
+    sections: Dict[str, List[Dict]] = {}
+    for section_id, slots in schedule_by_section.items():
+        sections[section_id] = _section_rows(slots, timeslot_by_id)
+
+    faculty: Dict[str, List[Dict]] = {}
+    for fac_id, slots in result.schedule_by_faculty.items():
+        rows: List[Dict] = []
+        for tid, (course_id, section_id, room_id, kind) in slots.items():
+            ts = timeslot_by_id.get(tid)
+            if not ts:
+                continue
+            rows.append({
+                "timeslotId": tid,
+                "dayIndex": ts.day_index,
+                "dayName": ts.day_name,
+                "periodIndex": ts.period_index,
+                "courseId": course_id,
+                "sectionId": section_id,
+                "roomId": room_id,
+                "kind": kind,
+            })
+        faculty[fac_id] = rows
+
+    # available rooms per time slot
+    all_rooms = [r.room_id for r in (problem.rooms or [])]
+    available_rooms: List[Dict] = []
+    if all_rooms:
+        # compute occupied by scanning section schedules per timeslot
+        occupied_by_tid: Dict[int, List[str]] = {}
+        for sec_map in schedule_by_section.values():
+            for tid, (_c, _f, room_id, _k) in sec_map.items():
+                if room_id:
+                    occupied_by_tid.setdefault(tid, []).append(room_id)
+
+        for ts in result.timeslots:
+            if ts.is_break:
+                continue
+            occ = set(occupied_by_tid.get(ts.timeslot_id, []))
+            free = [r for r in all_rooms if r not in occ]
+            available_rooms.append({
+                "timeslotId": ts.timeslot_id,
+                "dayIndex": ts.day_index,
+                "dayName": ts.day_name,
+                "periodIndex": ts.period_index,
+                "rooms": free,
+            })
+
+    # available faculty per time slot (list of faculty ids free at the timeslot)
+    available_faculty: List[Dict] = []
+    avail_map = getattr(result, "available_faculty", None) or {}
+    for ts in result.timeslots:
+        if ts.is_break:
+            continue
+        facs = avail_map.get(ts.timeslot_id, [])
+        available_faculty.append({
+            "timeslotId": ts.timeslot_id,
+            "dayIndex": ts.day_index,
+            "dayName": ts.day_name,
+            "periodIndex": ts.period_index,
+            "faculty": facs,
+        })
+
+    return {
+        "status": result.status,
+        "stopReason": result.stop_reason,
+        "cacheHit": result.cache_hit,
+        "warnings": warnings,
+        "sections": sections,
+        "faculty": faculty,
+        "sectionGrids": {k: df.reset_index().to_dict(orient="records") for k, df in section_grids.items()},
+        "facultyGrids": {k: df.reset_index().to_dict(orient="records") for k, df in faculty_grids.items()},
+        "availableRooms": available_rooms,
+        "availableFaculty": available_faculty,
+        "metrics": _metrics_response(result.metrics),
+    }
+
+
 @app.get("/health")
 def health() -> Dict[str, str]:
     return {"status": "ok"}
 
 
-@app.post("/api/solve")
-def solve_api(payload: SolveRequest):
+def _check_solve_request(payload: SolveRequest) -> None:
     if not payload.files:
         raise HTTPException(status_code=400, detail="No files provided")
+    if payload.roomModel not in ROOM_MODELS:
+        raise HTTPException(status_code=400, detail=f"roomModel must be one of {list(ROOM_MODELS)}")
+    if payload.engine not in ENGINES + (GREEDY_ENGINE,):
+        raise HTTPException(status_code=400, detail=f"engine must be one of {list(ENGINES + (GREEDY_ENGINE,))}")
+    if payload.gapModel not in GAP_MODELS:
+        raise HTTPException(status_code=400, detail=f"gapModel must be one of {list(GAP_MODELS)}")
+    if payload.roomDomains not in ROOM_DOMAINS:
+        raise HTTPException(status_code=400, detail=f"roomDomains must be one of {list(ROOM_DOMAINS)}")
+    if payload.roomSlack is not None and payload.roomSlack < 0:
+        raise HTTPException(status_code=400, detail="roomSlack must be >= 0")
 
-    with tempfile.TemporaryDirectory() as tmpdir:
-        # write provided csvs
-        for f in payload.files:
-            raw = base64.b64decode(f.content.encode("utf-8"))
-            out_path = os.path.join(tmpdir, f.name)
-            os.makedirs(os.path.dirname(out_path), exist_ok=True)
-            with open(out_path, "wb") as out:
-                out.write(raw)
 
-        try:
-            problem = load_problem_from_directory(tmpdir)
-        except Exception as e:  # pragma: no cover
-            raise HTTPException(status_code=400, detail=f"INPUT_ERROR: {e}")
+def _run_solve(payload: SolveRequest, stream: Optional[SolutionStream] = None) -> Dict:
+    _check_solve_request(payload)
+    if payload.decompose and payload.portfolio > 1:
+        raise HTTPException(status_code=400, detail="decompose and portfolio cannot be combined")
+    if (payload.decompose or payload.portfolio > 1) and stream is not None:
+        raise HTTPException(status_code=400, detail="decompose and portfolio are not supported when streaming solutions")
+    if payload.lns and (payload.decompose or payload.portfolio > 1 or stream is not None):
+        raise HTTPException(status_code=400, detail="lns cannot be combined with decompose, portfolio or streaming")
+    if payload.engine == GREEDY_ENGINE and (payload.lns or payload.decompose or payload.portfolio > 1 or payload.greedyHint or stream is not None):
+        raise HTTPException(status_code=400, detail="the greedy engine cannot be combined with lns, decompose, portfolio, greedyHint or streaming")
+    if payload.greedyHint and payload.hintFrom:
+        raise HTTPException(status_code=400, detail="greedyHint and hintFrom cannot be combined")
+    if (payload.roomDomains != "capacity" or payload.roomSlack is not None) and (payload.engine == GREEDY_ENGINE or payload.lns):
+        raise HTTPException(status_code=400, detail="roomDomains and roomSlack cannot be combined with the greedy engine or lns")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        problem = _load_problem(payload.files, tmpdir)
 
         try:
-            report = pre_solve_feasibility_check(problem)
+            compiled = compile_problem(problem)
+            report = pre_solve_feasibility_check(problem, compiled=compiled)
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"FEASIBILITY_PRECHECK_ERROR: {e}")
 
         if not report.ok():
             return {"status": "FEASIBILITY_ERROR", "errors": report.errors, "warnings": report.warnings}
 
+        params = payload.solver.to_params()
+        hint = None
+        if payload.hintFrom:
+            try:
+                entries = [
+                    (section_id, row["dayName"], int(row["periodIndex"]), row["courseId"], row["kind"], row.get("roomId") or "")
+                    for section_id, rows in payload.hintFrom.items()
+                    for row in rows
+                ]
+            except (KeyError, TypeError, ValueError) as e:
+                raise HTTPException(status_code=400, detail=f"HINT_ERROR: {e}")
+            hint = hint_from_entries(compiled, entries)
+        elif payload.greedyHint:
+            greedy = solve_greedy(problem, time_limit_sec=payload.timeLimit, compiled=compiled, params=params)
+            if greedy.status != "INFEASIBLE":
+                hint = load_warm_start_hint(compiled, greedy)
+
+        options = dict(
+            time_limit_sec=payload.timeLimit,
+            optimize_gaps=payload.optimizeGaps,
+            gap_model=payload.gapModel,
+            compiled=compiled,
+            room_model=payload.roomModel,
+            room_symmetry=payload.roomSymmetry,
+            room_domains=payload.roomDomains,
+            room_slack=payload.roomSlack,
+            engine=payload.engine,
+            hint_from=hint,
+            params=params,
+            cache=default_result_cache() if payload.useCache else None,
+            model_cache=default_model_cache() if payload.useCache else None,
+        )
         try:
-            result = solve(problem, time_limit_sec=payload.timeLimit, optimize_gaps=payload.optimizeGaps)
+            if payload.engine == GREEDY_ENGINE:
+                result = solve_greedy(problem, time_limit_sec=payload.timeLimit, compiled=compiled, params=params)
+            elif payload.lns:
+                result = solve_lns(
+                    problem,
+                    time_limit_sec=payload.timeLimit,
+                    compiled=compiled,
+                    engine=payload.engine,
+                    gap_model=payload.gapModel,
+                    params=params,
+                    sub_time_sec=payload.lnsSubTimeSec,
+                )
+            elif payload.decompose:
+                result = solve_decomposed(problem, split_rooms=payload.splitRooms, **options)
+            elif payload.portfolio > 1:
+                result = solve_portfolio(problem, size=payload.portfolio, **options)
+            else:
+                result = solve(problem, stream=stream, **options)
         except Exception as e:  # pragma: no cover
             raise HTTPException(status_code=500, detail=f"SOLVER_ERROR: {e}")
 
-        # build per-section / per-faculty grids
-        section_grids = build_grids_by_section(result)
-        faculty_grids = build_grids_by_faculty(result)
-
-        # collect structures for backend
-        timeslot_by_id = {t.timeslot_id: t for t in result.timeslots}
-
-        sections: Dict[str, List[Dict]] = {}
-        for section_id, slots in result.schedule_by_section.items():
-            rows: List[Dict] = []
-            for tid, (course_id, faculty_id, room_id, kind) in slots.items():
-                ts = timeslot_by_id.get(tid)
-                if not ts:
-                    continue
-                rows.append({
-                    "timeslotId": tid,
-                    "dayIndex": ts.day_index,
-                    "dayName": ts.day_name,
-                    "periodIndex": ts.period_index,
-                    "courseId": course_id,
-                    "facultyId": faculty_id,
-                    "roomId": room_id,
-                    "kind": kind,
-                })
-            sections[section_id] = rows
-
-        faculty: Dict[str, List[Dict]] = {}
-        for fac_id, slots in result.schedule_by_faculty.items():
-            rows: List[Dict] = []
-            for tid, (course_id, section_id, room_id, kind) in slots.items():
-                ts = timeslot_by_id.get(tid)
-                if not ts:
-                    continue
-                rows.append({
-                    "timeslotId": tid,
-                    "dayIndex": ts.day_index,
-                    "dayName": ts.day_name,
-                    "periodIndex": ts.period_index,
-                    "courseId": course_id,
-                    "sectionId": section_id,
-                    "roomId": room_id,
-                    "kind": kind,
-                })
-            faculty[fac_id] = rows
-
-        # available rooms per time slot
-        all_rooms = [r.room_id for r in (problem.rooms or [])]
-        available_rooms: List[Dict] = []
-        if all_rooms:
-            # compute occupied by scanning section schedules per timeslot
-            occupied_by_tid: Dict[int, List[str]] = {}
-            for sec_map in result.schedule_by_section.values():
-                for tid, (_c, _f, room_id, _k) in sec_map.items():
-                    if room_id:
-                        occupied_by_tid.setdefault(tid, []).append(room_id)
-
-            for ts in result.timeslots:
-                if ts.is_break:
-                    continue
-                occ = set(occupied_by_tid.get(ts.timeslot_id, []))
-                free = [r for r in all_rooms if r not in occ]
-                available_rooms.append({
-                    "timeslotId": ts.timeslot_id,
-                    "dayIndex": ts.day_index,
-                    "dayName": ts.day_name,
-                    "periodIndex": ts.period_index,
-                    "rooms": free,
-                })
-
-        # available faculty per time slot (list of faculty ids free at the timeslot)
-        available_faculty: List[Dict] = []
-        avail_map = getattr(result, "available_faculty", None) or {}
-        for ts in result.timeslots:
-            if ts.is_break:
-                continue
-            facs = avail_map.get(ts.timeslot_id, [])
-            available_faculty.append({
-                "timeslotId": ts.timeslot_id,
-                "dayIndex": ts.day_index,
-                "dayName": ts.day_name,
-                "periodIndex": ts.period_index,
-                "faculty": facs,
-            })
+        # Keep only the packed timetable while the response is built
+        result = compact_result(result, compiled)
+        response = _result_response(problem, result, report.warnings)
+        if payload.explain and result.status == "INFEASIBLE":
+            explanation = explain_infeasibility(
+                problem,
+                time_limit_sec=payload.explainTimeLimit,
+                compiled=compiled,
+                params=params,
+                room_domains=payload.roomDomains,
+                room_slack=payload.roomSlack,
+            )
+            response["explanation"] = _explanation_response(explanation)
+        if hint is not None:
+            response["warmStart"] = {"hintedClasses": hint.num_classes, "dropped": hint.dropped}
+        if params.log_lines is not None:
+            response["solverLog"] = params.log_lines
+        return response
 
-        return {
-            "status": result.status,
-            "warnings": report.warnings,
-            "sections": sections,
-            "faculty": faculty,
-            "sectionGrids": {k: df.reset_index().to_dict(orient="records") for k, df in section_grids.items()},
-            "facultyGrids": {k: df.reset_index().to_dict(orient="records") for k, df in faculty_grids.items()},
-            "availableRooms": available_rooms,
-            "availableFaculty": available_faculty,
-        }
+
+def _explanation_response(explanation: InfeasibilityExplanation) -> Dict:
+    return {
+        "status": explanation.status,
+        "minimal": explanation.minimal,
+        "conflict": [
+            {"family": part.family, "id": part.key, "description": part.description, "csvRows": part.csv_rows}
+            for part in explanation.conflict
+        ],
+        "solves": explanation.solves,
+    }
+
+
+def _cache_stats_response(stats: CacheStats) -> Dict:
+    return {
+        "hits": stats.hits,
+        "misses": stats.misses,
+        "stores": stats.stores,
+        "evictions": stats.evictions,
+        "entries": stats.entries,
+        "sizeBytes": stats.size_bytes,
+    }
+
+
+@app.post("/api/solve")
+def solve_api(payload: SolveRequest):
+    return _run_solve(payload)
 
 
+@app.get("/api/cache")
+def cache_stats() -> Dict:
+    # Result cache counters at the top level, built-model cache counters under "models"
+    response = _cache_stats_response(default_result_cache().stats())
+    response["models"] = _cache_stats_response(default_model_cache().stats())
+    return response
+
+
+# Streamed solves that can still be accepted early, by streamId
+_streams: Dict[str, SolutionStream] = {}
+
+
+def _sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/api/solve/stream")
+def solve_stream_api(payload: SolveRequest):
+    """Server-Sent Events: "started" (streamId), one "solution" per improving solution, then
+    "result" (the /api/solve response) or "error". POST /api/solve/stream/{streamId}/accept
+    keeps the best timetable so far; closing the connection stops the solve.
+    """
+    _check_solve_request(payload)
+    payload.solver.to_params()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        timeslot_by_id = {t.timeslot_id: t for t in _load_problem(payload.files, tmpdir).build_timeslots()}
+    stream_id = uuid.uuid4().hex
+    events: "queue.Queue[Tuple[str, Dict]]" = queue.Queue()
+
+    def on_solution(progress: SolutionProgress) -> None:
+        events.put(("solution", {
+            "solutionIndex": progress.solution_index,
+            "wallTime": round(progress.wall_time, 3),
+            "objectiveValue": progress.objective_value,
+            "bestBound": progress.best_bound,
+            "added": {s: _section_rows(slots, timeslot_by_id) for s, slots in progress.added.items()},
+            "removed": progress.removed,
+        }))
+
+    def run() -> None:
+        try:
+            events.put(("result", _run_solve(payload, stream)))
+        except HTTPException as e:
+            events.put(("error", {"detail": e.detail}))
+        except Exception as e:  # pragma: no cover
+            events.put(("error", {"detail": f"SOLVER_ERROR: {e}"}))
+        finally:
+            _streams.pop(stream_id, None)
+
+    stream = SolutionStream(on_solution)
+    _streams[stream_id] = stream
+    threading.Thread(target=run, daemon=True).start()
+
+    def event_source():
+        yield _sse("started", {"streamId": stream_id})
+        try:
+            while True:
+                event, data = events.get()
+                yield _sse(event, data)
+                if event in ("result", "error"):
+                    return
+        finally:
+            # Client went away (or the solve ended): make sure the search stops
+            stream.accept()
+
+    return StreamingResponse(event_source(), media_type="text/event-stream")
+
+
+@app.post("/api/solve/stream/{stream_id}/accept")
+def accept_stream_api(stream_id: str):
+    stream = _streams.get(stream_id)
+    if stream is None:
+        raise HTTPException(status_code=404, detail="Unknown or finished stream")
+    stream.accept()
+    return {"status": "accepted"}
+
+
+
+
+@app.post("/api/resolve")
+def resolve_api(payload: ResolveRequest):
+    if not payload.files:
+        raise HTTPException(status_code=400, detail="No files provided")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        problem = _load_problem(payload.files, tmpdir)
+
+        # Rebuild the previous timetable from its section rows
+        timeslots = problem.build_timeslots()
+        schedule_by_section: Dict[str, Dict[int, Tuple[str, str, str, str]]] = {}
+        schedule_by_faculty: Dict[str, Dict[int, Tuple[str, str, str, str]]] = {}
+        try:
+            for section_id, rows in payload.previous.items():
+                for row in rows:
+                    tid = int(row["timeslotId"])
+                    faculty_id = row.get("facultyId") or ""
+                    room_id = row.get("roomId") or ""
+                    schedule_by_section.setdefault(section_id, {})[tid] = (row["courseId"], faculty_id, room_id, row["kind"])
+                    if faculty_id:
+                        schedule_by_faculty.setdefault(faculty_id, {})[tid] = (row["courseId"], section_id, room_id, row["kind"])
+        except (KeyError, TypeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"PREVIOUS_ERROR: {e}")
+        previous = SolveResult(
+            status="FEASIBLE",
+            schedule_by_section=schedule_by_section,
+            schedule_by_faculty=schedule_by_faculty,
+            timeslots=timeslots,
+        )
+
+        delta = ScheduleDelta(
+            blocked_faculty_timeslots=payload.blockedFaculty,
+            removed_rooms=payload.removedRooms,
+            changed_requirements=payload.changedRequirements,
+            faculty_reassignments=payload.facultyReassignments,
+        )
+        params = payload.solver.to_params()
+        try:
+            repair = resolve_with_delta(problem, previous, delta, time_limit_sec=payload.timeLimit, params=params)
+        except Exception as e:  # pragma: no cover
+            raise HTTPException(status_code=500, detail=f"SOLVER_ERROR: {e}")
+
+        response = _result_response(repair.problem, repair.result, [])
+        response["repair"] = {
+            "resolvedSections": repair.resolved_sections,
+            "movedClasses": repair.moved_classes,
+            "changedRooms": repair.changed_rooms,
+        }
+        if params.log_lines is not None:
+            response["solverLog"] = params.log_lines
+        return response
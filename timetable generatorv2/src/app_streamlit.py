@@ -1,24 +1,41 @@
 from __future__ import annotations
 import io
 import os
+import queue
 import shutil
 import tempfile
-from typing import Dict
+import threading
+import time
+from typing import Dict, List, Optional
 
 import pandas as pd
 import streamlit as st
 
 try:
+    from .compiled_problem import compile_problem
+    from .decomposition import solve_decomposed
     from .exporter import build_availability_grid, build_grids_by_faculty, build_grids_by_section, export_all
     from .feasibility import pre_solve_feasibility_check
+    from .greedy import solve_greedy
+    from .lns import solve_lns
     from .loader import load_problem_from_directory
-    from .timetable_solver import solve
+    from .model_cache import ModelCache, default_model_cache
+    from .result_cache import ResultCache, default_result_cache
+    from .solver_params import SolverParams, StopRules
+    from .timetable_solver import GAP_MODELS, SolutionProgress, SolutionStream, SolveResult, solve
 except ImportError:
     # Allow running via `streamlit run src/app_streamlit.py` (script mode)
+    from compiled_problem import compile_problem
+    from decomposition import solve_decomposed
     from exporter import build_availability_grid, build_grids_by_faculty, build_grids_by_section, export_all
     from feasibility import pre_solve_feasibility_check
+    from greedy import solve_greedy
+    from lns import solve_lns
     from loader import load_problem_from_directory
-    from timetable_solver import solve
+    from model_cache import ModelCache, default_model_cache
+    from result_cache import ResultCache, default_result_cache
+    from solver_params import SolverParams, StopRules
+    from timetable_solver import GAP_MODELS, SolutionProgress, SolutionStream, SolveResult, solve
 
 
 st.set_page_config(page_title="Automatic Timetable Generator", layout="wide")
@@ -27,10 +44,81 @@ st.title("Automatic Timetable Generator")
 st.caption("Load CSV inputs, validate constraints, solve, and preview/export timetables.")
 
 
-def run_solver_ui(inputs_dir: str, time_limit: int, optimize_gaps: bool) -> None:
+def solve_with_live_view(
+    problem,
+    compiled,
+    time_limit: int,
+    optimize_gaps: bool,
+    gap_model: str,
+    params: SolverParams,
+    cache: Optional[ResultCache] = None,
+    model_cache: Optional[ModelCache] = None,
+) -> SolveResult:
+    """Run solve() in a background thread and show each improving solution as it arrives."""
+    updates: "queue.Queue[SolutionProgress]" = queue.Queue()
+    stream = SolutionStream(updates.put)
+    outcome: Dict[str, object] = {}
+
+    def run() -> None:
+        try:
+            outcome["result"] = solve(
+                problem,
+                time_limit_sec=time_limit,
+                optimize_gaps=optimize_gaps,
+                gap_model=gap_model,
+                compiled=compiled,
+                params=params,
+                stream=stream,
+                cache=cache,
+                model_cache=model_cache,
+            )
+        except Exception as e:  # surfaced in the script thread below
+            outcome["error"] = e
+
+    progress_box = st.empty()
+    history: List[Dict] = []
+    started = time.monotonic()
+    worker = threading.Thread(target=run, daemon=True)
+    worker.start()
+    try:
+        while worker.is_alive() or not updates.empty():
+            try:
+                progress = updates.get(timeout=0.5)
+            except queue.Empty:
+                if not history:
+                    progress_box.info(f"Solving... {time.monotonic() - started:.0f}s elapsed, no timetable yet")
+                continue
+            changed = sum(len(v) for v in progress.added.values()) + sum(len(v) for v in progress.removed.values())
+            history.append({"seconds": round(progress.wall_time, 1), "objective": progress.objective_value, "bound": progress.best_bound})
+            with progress_box.container():
+                objective = f", objective {progress.objective_value} (bound {progress.best_bound:.0f})" if progress.objective_value is not None else ""
+                st.info(f"Solution {progress.solution_index} after {progress.wall_time:.1f}s{objective}; {changed} periods changed")
+                if len(history) > 1 and progress.objective_value is not None:
+                    st.line_chart(pd.DataFrame(history).set_index("seconds"))
+    finally:
+        # Any widget change reruns the script and interrupts this loop; stop the search with it
+        stream.accept()
+        worker.join()
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
+def run_solver_ui(
+    inputs_dir: str,
+    time_limit: int,
+    optimize_gaps: bool,
+    gap_model: str,
+    params: SolverParams,
+    use_cache: bool = True,
+    decompose: bool = False,
+    lns: bool = False,
+    greedy: bool = False,
+) -> None:
     with st.spinner("Loading inputs and checking feasibility..."):
         problem = load_problem_from_directory(inputs_dir)
-        report = pre_solve_feasibility_check(problem)
+        compiled = compile_problem(problem)
+        report = pre_solve_feasibility_check(problem, compiled=compiled)
     if not report.ok():
         st.error("Feasibility errors detected. Please fix the issues below:")
         for e in report.errors:
@@ -47,14 +135,45 @@ def run_solver_ui(inputs_dir: str, time_limit: int, optimize_gaps: bool) -> None
                 for w in report.warnings:
                     st.write(f"- {w}")
 
-    with st.spinner("Solving..."):
-        result = solve(problem, time_limit_sec=time_limit, optimize_gaps=optimize_gaps)
+    cache = default_result_cache() if use_cache else None
+    model_cache = default_model_cache() if use_cache else None
+    if greedy:
+        result = solve_greedy(problem, time_limit_sec=time_limit, compiled=compiled, params=params)
+        if result.status != "INFEASIBLE":
+            st.info(f"Greedy preview built in {result.metrics.stage_sec['construct']:.2f}s (gaps not optimized)")
+    elif lns:
+        with st.spinner("Minimizing gaps by neighbourhood search..."):
+            result = solve_lns(problem, time_limit_sec=time_limit, compiled=compiled, gap_model=gap_model, params=params)
+        if result.metrics is not None:
+            st.info(f"{result.metrics.lns_steps} neighbourhood steps, {result.metrics.lns_improved} improving")
+    elif decompose:
+        # Parts are solved in other processes, so there is no live view of improving solutions
+        with st.spinner("Solving independent parts in parallel..."):
+            result = solve_decomposed(
+                problem,
+                time_limit_sec=time_limit,
+                optimize_gaps=optimize_gaps,
+                compiled=compiled,
+                params=params,
+                gap_model=gap_model,
+                cache=cache,
+                model_cache=model_cache,
+                split_rooms=True,
+            )
+        if result.metrics is not None and result.metrics.parts:
+            st.info(f"Solved as {result.metrics.parts} independent parts")
+    else:
+        result = solve_with_live_view(problem, compiled, time_limit, optimize_gaps, gap_model, params, cache, model_cache)
+    if params.log_lines:
+        with st.expander("Solver log"):
+            st.code("\n".join(params.log_lines))
 
     if result.status == "INFEASIBLE":
         st.error("Solver could not find a feasible timetable within the time limit.")
         return
 
-    st.success(f"Solver status: {result.status}")
+    cached = " - reused from the result cache" if result.cache_hit else ""
+    st.success(f"Solver status: {result.status} (stopped: {result.stop_reason}){cached}")
     if result.objective_value is not None:
         st.info(f"Optimization objective value: {result.objective_value}")
 
@@ -114,6 +233,17 @@ with st.sidebar:
     inputs_dir = st.text_input("Inputs directory", value="data/templates")
     time_limit = st.number_input("Solver time limit (sec)", min_value=1, max_value=600, value=90, step=5)
     optimize_gaps = st.checkbox("Optimize gaps (slower)", value=False)
+    gap_model = st.selectbox("Gap formulation", GAP_MODELS, index=0, disabled=not optimize_gaps)
+    with st.expander("Solver settings", expanded=False):
+        num_workers = st.number_input("Search workers", min_value=1, max_value=64, value=SolverParams().requested_workers(), step=1)
+        seed = st.number_input("Random seed", min_value=0, value=1, step=1)
+        relative_gap = st.number_input("Relative gap limit (0 = prove optimal)", min_value=0.0, max_value=1.0, value=0.0, step=0.01)
+        plateau_sec = st.number_input("With gap optimization: stop after N s without improvement (0 = off)", min_value=0, max_value=600, value=0, step=5)
+        show_log = st.checkbox("Show solver log", value=False)
+        use_cache = st.checkbox("Reuse cached results and models for identical inputs", value=True)
+        decompose = st.checkbox("Solve faculty-independent groups in parallel (each gets its own rooms)", value=False)
+        greedy = st.checkbox("Instant greedy preview (no solver, gaps not optimized)", value=False)
+        lns = st.checkbox("Minimize gaps by neighbourhood search (large inputs)", value=False, disabled=decompose)
     run_btn = st.button("Run Solver", type="primary")
 
     with st.expander("Upload CSVs", expanded=False):
@@ -181,6 +311,13 @@ if gen_btn:
     st.success(f"Synthetic dataset written to {out_dir}")
 
 if run_btn:
-    run_solver_ui(inputs_dir=inputs_dir, time_limit=int(time_limit), optimize_gaps=optimize_gaps)
+    params = SolverParams(
+        num_workers=int(num_workers),
+        random_seed=int(seed),
+        relative_gap_limit=float(relative_gap) or None,
+        log_lines=[] if show_log else None,
+        stop_rules=StopRules(no_improvement_sec=float(plateau_sec) or None),
+    )
+    run_solver_ui(inputs_dir=inputs_dir, time_limit=int(time_limit), optimize_gaps=optimize_gaps, gap_model=gap_model, params=params, use_cache=use_cache, decompose=decompose, lns=lns and not decompose, greedy=greedy)
 
 
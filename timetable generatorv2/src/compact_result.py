@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    from .compiled_problem import CompiledProblem
+    from .models import Timeslot
+    from .solve_metrics import SolveMetrics
+    from .timetable_solver import SolveResult
+except ImportError:
+    from compiled_problem import CompiledProblem
+    from models import Timeslot
+    from solve_metrics import SolveMetrics
+    from timetable_solver import SolveResult
+
+# Class kinds, by kind code
+KINDS = ("lecture", "lab")
+
+# Grid code of a free cell (and of a class without faculty / room)
+FREE = -1
+
+
+def _code_dtype(size: int) -> type:
+    # Smallest signed type holding every index of a dictionary plus FREE
+    return np.int16 if size < np.iinfo(np.int16).max else np.int32
+
+
+@dataclass
+class CompactSolveResult:
+    """A SolveResult as integer-coded section x timeslot grids plus the string dictionaries.
+
+    Cell (i, j) holds the class of section_ids[i] in timeslot timeslot_ids[j]: indices into
+    course_ids, faculty_ids and room_ids, and the kind code (see KINDS), FREE where there is none.
+    The dict views of SolveResult (schedule_by_section, schedule_by_faculty, available_rooms,
+    available_faculty) are derived on each access and not kept, so exporter and the API take
+    either type. A timetable takes 7 bytes per section and timeslot instead of two dicts of
+    string tuples and a list of free ids per timeslot.
+    """
+
+    status: str
+    timeslots: List[Timeslot]
+    timeslot_ids: List[int]  # grid column -> timeslot_id (non-break timeslots)
+    section_ids: List[str]  # grid row -> section_id, in the order of the source result
+    course_ids: List[str]
+    faculty_ids: List[str]  # every faculty member of the problem (available_faculty lists them)
+    room_ids: List[str]  # every room of the problem
+    course: np.ndarray
+    faculty: np.ndarray
+    room: np.ndarray
+    kind: np.ndarray
+    has_availability: bool = False  # the source result had available_rooms / available_faculty
+    objective_value: Optional[int] = None
+    stop_reason: Optional[str] = None
+    metrics: Optional[SolveMetrics] = None
+    cache_hit: bool = False
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes taken by the grids."""
+        return self.course.nbytes + self.faculty.nbytes + self.room.nbytes + self.kind.nbytes
+
+    def _cells(self, by_timeslot: bool = False) -> Iterator[Tuple[int, int, str, str, str, str]]:
+        # (row, column, course_id, faculty_id, room_id, kind) of every class, section by section
+        # or timeslot by timeslot
+        if by_timeslot:
+            cols, rows = np.nonzero(self.course.T != FREE)
+        else:
+            rows, cols = np.nonzero(self.course != FREE)
+        courses = self.course[rows, cols].tolist()
+        faculty = self.faculty[rows, cols].tolist()
+        rooms = self.room[rows, cols].tolist()
+        kinds = self.kind[rows, cols].tolist()
+        for i, j, c, f, r, k in zip(rows.tolist(), cols.tolist(), courses, faculty, rooms, kinds):
+            yield (
+                i,
+                j,
+                self.course_ids[c],
+                self.faculty_ids[f] if f != FREE else "",
+                self.room_ids[r] if r != FREE else "",
+                KINDS[k],
+            )
+
+    @property
+    def schedule_by_section(self) -> Dict[str, Dict[int, Tuple[str, str, str, str]]]:
+        by_section: Dict[str, Dict[int, Tuple[str, str, str, str]]] = {s: {} for s in self.section_ids}
+        for i, j, c, f, r, k in self._cells():
+            by_section[self.section_ids[i]][self.timeslot_ids[j]] = (c, f, r, k)
+        return by_section
+
+    @property
+    def schedule_by_faculty(self) -> Dict[str, Dict[int, Tuple[str, str, str, str]]]:
+        by_faculty: Dict[str, Dict[int, Tuple[str, str, str, str]]] = {}
+        for i, j, c, f, r, k in self._cells(by_timeslot=True):
+            if f:
+                by_faculty.setdefault(f, {})[self.timeslot_ids[j]] = (c, self.section_ids[i], r, k)
+        return by_faculty
+
+    def _free(self, grid: np.ndarray, ids: List[str]) -> Dict[int, List[str]]:
+        # Occupancy bitmap (timeslot x id) from one grid, then the free ids of each timeslot
+        busy = np.zeros((len(self.timeslot_ids), len(ids)), dtype=bool)
+        rows, cols = np.nonzero(grid != FREE)
+        busy[cols, grid[rows, cols]] = True
+        id_array = np.array(ids, dtype=object)
+        return {t: id_array[~busy[j]].tolist() for j, t in enumerate(self.timeslot_ids)}
+
+    @property
+    def available_rooms(self) -> Optional[Dict[int, List[str]]]:
+        if not self.has_availability:
+            return None
+        return self._free(self.room, self.room_ids) if self.room_ids else {}
+
+    @property
+    def available_faculty(self) -> Optional[Dict[int, List[str]]]:
+        if not self.has_availability:
+            return None
+        return self._free(self.faculty, self.faculty_ids)
+
+    def to_result(self) -> SolveResult:
+        """The dict-based SolveResult with the same timetable."""
+        return SolveResult(
+            status=self.status,
+            schedule_by_section=self.schedule_by_section,
+            schedule_by_faculty=self.schedule_by_faculty,
+            timeslots=self.timeslots,
+            objective_value=self.objective_value,
+            available_rooms=self.available_rooms,
+            available_faculty=self.available_faculty,
+            stop_reason=self.stop_reason,
+            metrics=self.metrics,
+            cache_hit=self.cache_hit,
+        )
+
+
+# Either form of a solve result; exporter and the API read both through the same attributes
+AnyResult = Union[SolveResult, CompactSolveResult]
+
+
+def compact_result(result: SolveResult, compiled: CompiledProblem) -> CompactSolveResult:
+    """Pack `result` (a timetable of `compiled`) into a CompactSolveResult.
+
+    Raises ValueError for a class outside the non-break timeslots or with a faculty member or
+    room the problem does not have.
+    """
+    timeslot_ids = list(compiled.T_non_break)
+    column = {t: j for j, t in enumerate(timeslot_ids)}
+    section_ids = list(result.schedule_by_section)
+    course_ids = list(compiled.course_ids)
+    course_index = {c: i for i, c in enumerate(course_ids)}
+    faculty_ids = list(compiled.faculty_ids)
+    room_ids = list(compiled.room_ids)
+    kind_index = {k: i for i, k in enumerate(KINDS)}
+
+    shape = (len(section_ids), len(timeslot_ids))
+    course = np.full(shape, FREE, dtype=_code_dtype(len(course_ids)))
+    faculty = np.full(shape, FREE, dtype=_code_dtype(len(faculty_ids)))
+    room = np.full(shape, FREE, dtype=_code_dtype(len(room_ids)))
+    kind = np.full(shape, FREE, dtype=np.int8)
+    for i, s in enumerate(section_ids):
+        for t, (c, f, r, k) in result.schedule_by_section[s].items():
+            try:
+                j = column[t]
+                course[i, j] = course_index[c]
+                faculty[i, j] = compiled.faculty_index[f] if f else FREE
+                room[i, j] = compiled.room_index[r] if r else FREE
+                kind[i, j] = kind_index[k]
+            except KeyError as e:
+                raise ValueError(f"Cannot pack the class of section {s} in timeslot {t}: unknown {e}") from None
+
+    return CompactSolveResult(
+        status=result.status,
+        timeslots=result.timeslots,
+        timeslot_ids=timeslot_ids,
+        section_ids=section_ids,
+        course_ids=course_ids,
+        faculty_ids=faculty_ids,
+        room_ids=room_ids,
+        course=course,
+        faculty=faculty,
+        room=room,
+        kind=kind,
+        has_availability=result.available_rooms is not None or result.available_faculty is not None,
+        objective_value=result.objective_value,
+        stop_reason=result.stop_reason,
+        metrics=result.metrics,
+        cache_hit=result.cache_hit,
+    )
@@ -0,0 +1,360 @@
+from __future__ import annotations
+
+import dataclasses
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    from .models import ProblemData, Room, Section, Timeslot
+except ImportError:
+    from models import ProblemData, Room, Section, Timeslot
+
+# Room domain policies: which of the rooms that fit a section its classes may use
+# - capacity: every room that fits, for lectures and labs alike
+# - typed: lectures only in non-lab rooms, labs only in lab rooms
+# - typed_fallback: as typed, but a kind of class with no fitting room of its type may use any room that fits
+ROOM_DOMAINS = ("capacity", "typed", "typed_fallback")
+
+
+def compute_valid_lab_starts(timeslots: List[Timeslot], block_size: int) -> Dict[int, List[int]]:
+    # Returns: day_index -> list of starting timeslot_ids that can fit block_size within day and non-break periods
+    starts_by_day: Dict[int, List[int]] = defaultdict(list)
+    # Group timeslots by day
+    by_day: Dict[int, List[Timeslot]] = defaultdict(list)
+    for t in timeslots:
+        by_day[t.day_index].append(t)
+
+    for day_idx, day_slots in by_day.items():
+        # ensure sorted by period within day
+        day_slots = sorted(day_slots, key=lambda x: x.period_index)
+        n = len(day_slots)
+        for i in range(0, n - block_size + 1):
+            window = day_slots[i : i + block_size]
+            if any(s.is_break for s in window):
+                continue
+            # consecutive within the same day by construction
+            starts_by_day[day_idx].append(window[0].timeslot_id)
+    return starts_by_day
+
+
+def _candidate_rooms(
+    sections: List[Section],
+    rooms: List[Room],
+    requirements_by_section: Dict[str, List["EffectiveRequirement"]],
+    room_domains: str,
+    room_slack: Optional[float],
+) -> Tuple[Dict[str, List[str]], Dict[str, List[str]], Dict[str, List[str]]]:
+    """Rooms each section's lectures and labs may use, and their union over the kinds of class
+    the section has, all in room order.
+
+    With `room_slack`, rooms with more than (1 + room_slack) x the section's students are left
+    out, unless none of the fitting rooms of that kind is that small: then the smallest stay.
+    """
+    lecture_rooms: Dict[str, List[str]] = {}
+    lab_rooms: Dict[str, List[str]] = {}
+    candidates: Dict[str, List[str]] = {}
+    if not rooms:
+        return lecture_rooms, lab_rooms, candidates
+    for section in sections:
+        s = section.section_id
+        fitting = [r for r in rooms if r.capacity >= section.num_students]
+        by_kind: Dict[str, List[Room]] = {}
+        for kind, is_lab in (("lecture", False), ("lab", True)):
+            pool = fitting
+            if room_domains != "capacity":
+                typed = [r for r in fitting if r.is_lab == is_lab]
+                pool = typed if typed or room_domains == "typed" else fitting
+            if room_slack is not None and pool:
+                limit = max(section.num_students * (1 + room_slack), min(r.capacity for r in pool))
+                pool = [r for r in pool if r.capacity <= limit]
+            by_kind[kind] = pool
+        reqs = requirements_by_section.get(s, [])
+        kinds = [kind for kind, needed in (("lecture", any(r.has_lectures for r in reqs)), ("lab", any(r.has_labs for r in reqs))) if needed]
+        allowed = {r.room_id for kind in kinds or list(by_kind) for r in by_kind[kind]}
+        lecture_rooms[s] = [r.room_id for r in by_kind["lecture"]]
+        lab_rooms[s] = [r.room_id for r in by_kind["lab"]]
+        candidates[s] = [r.room_id for r in rooms if r.room_id in allowed]
+    return lecture_rooms, lab_rooms, candidates
+
+
+def _identify_continuous_blocks(timeslots: List[Timeslot]) -> Dict[int, List[Tuple[int, List[int]]]]:
+    """Identify continuous blocks of non-break periods separated by breaks, per day.
+    Returns: day_index -> [(block_id, [timeslot_ids])]"""
+    blocks_by_day: Dict[int, List[Tuple[int, List[int]]]] = defaultdict(list)
+    by_day: Dict[int, List[Timeslot]] = defaultdict(list)
+    for t in timeslots:
+        by_day[t.day_index].append(t)
+
+    block_counter = 0
+    for day_idx, day_slots in by_day.items():
+        day_slots = sorted(day_slots, key=lambda x: x.period_index)
+        current_block = []
+        for t in day_slots:
+            if t.is_break:
+                if current_block:
+                    blocks_by_day[day_idx].append((block_counter, current_block))
+                    block_counter += 1
+                    current_block = []
+            else:
+                current_block.append(t.timeslot_id)
+        if current_block:
+            blocks_by_day[day_idx].append((block_counter, current_block))
+            block_counter += 1
+    return blocks_by_day
+
+
+@dataclass(frozen=True)
+class EffectiveRequirement:
+    """Weekly demand of one (section, course) pair after applying course defaults and overrides."""
+
+    section_id: str
+    course_id: str
+    faculty_id: Optional[str]
+    is_lab_course: bool
+    weekly_lectures: int
+    weekly_lab_sessions: int
+    lab_block_size: int
+    section_idx: int
+    course_idx: int
+    faculty_idx: Optional[int]
+
+    @property
+    def has_lectures(self) -> bool:
+        return self.weekly_lectures > 0
+
+    @property
+    def has_labs(self) -> bool:
+        return self.weekly_lab_sessions > 0 and self.lab_block_size > 0
+
+    @property
+    def total_periods(self) -> int:
+        return self.weekly_lectures + (self.weekly_lab_sessions * self.lab_block_size if self.has_labs else 0)
+
+
+@dataclass
+class CompiledProblem:
+    """Indexed view of a ProblemData, built once and shared by model building and checks.
+
+    Every lookup the solver needs inside its constraint loops (effective requirements,
+    faculty -> assignments, timeslot -> covering lab starts, room candidates) is
+    precomputed here so the loops only walk the entries that actually matter.
+    """
+
+    problem: ProblemData
+    timeslots: List[Timeslot]
+    T: List[int]
+    T_non_break: List[int]
+    timeslot_by_id: Dict[int, Timeslot]
+    day_period_to_tid: Dict[Tuple[int, int], int]
+    P1_timeslots: List[int]
+
+    section_ids: List[str]
+    faculty_ids: List[str]
+    course_ids: List[str]
+    room_ids: List[str]
+    section_index: Dict[str, int]
+    faculty_index: Dict[str, int]
+    course_index: Dict[str, int]
+    room_index: Dict[str, int]
+    section_size: Dict[str, int]
+
+    # (section_id, course_id) pairs with a non-zero weekly demand, in section/course order
+    requirements: List[EffectiveRequirement]
+    requirement_by_pair: Dict[Tuple[str, str], EffectiveRequirement]
+    requirements_by_section: Dict[str, List[EffectiveRequirement]]
+    requirements_by_faculty: Dict[str, List[EffectiveRequirement]]
+
+    # block_size -> valid lab start timeslots, and block_size -> timeslot -> starts covering it
+    valid_starts_by_block_size: Dict[int, List[int]]
+    cover_by_block_size: Dict[int, Dict[int, List[int]]]
+    covered_by_start: Dict[Tuple[int, int], List[int]]  # (block_size, start) -> covered timeslots
+
+    blocks_by_day: Dict[int, List[Tuple[int, List[int]]]]
+    timeslot_to_block: Dict[int, int]
+
+    rooms: List[Room] = field(default_factory=list)
+    candidate_rooms_by_section: Dict[str, List[str]] = field(default_factory=dict)
+    # Rooms the lectures / labs of each section may use under `room_domains` (one of ROOM_DOMAINS);
+    # candidate_rooms_by_section is their union over the kinds of class the section has
+    lecture_rooms_by_section: Dict[str, List[str]] = field(default_factory=dict)
+    lab_rooms_by_section: Dict[str, List[str]] = field(default_factory=dict)
+    room_domains: str = "capacity"
+    room_slack: Optional[float] = None
+
+    @property
+    def have_rooms(self) -> bool:
+        return len(self.rooms) > 0
+
+    def with_room_domains(self, room_domains: str = "capacity", room_slack: Optional[float] = None) -> CompiledProblem:
+        """This problem with the room candidates of another room domain policy (see ROOM_DOMAINS)."""
+        if room_domains not in ROOM_DOMAINS:
+            raise ValueError(f"Unknown room_domains {room_domains!r}; expected one of {ROOM_DOMAINS}")
+        if room_slack is not None and room_slack < 0:
+            raise ValueError(f"room_slack must be >= 0, got {room_slack}")
+        if (room_domains, room_slack) == (self.room_domains, self.room_slack):
+            return self
+        lecture_rooms, lab_rooms, candidates = _candidate_rooms(self.problem.sections, self.rooms, self.requirements_by_section, room_domains, room_slack)
+        return dataclasses.replace(
+            self,
+            candidate_rooms_by_section=candidates,
+            lecture_rooms_by_section=lecture_rooms,
+            lab_rooms_by_section=lab_rooms,
+            room_domains=room_domains,
+            room_slack=room_slack,
+        )
+
+    def rooms_for_kind(self, section_id: str, kind: str) -> List[str]:
+        """Rooms a class of `kind` ("lecture" or "lab") of the section may use."""
+        by_section = self.lab_rooms_by_section if kind == "lab" else self.lecture_rooms_by_section
+        return by_section.get(section_id, [])
+
+    def block_room_candidates(self, section_id: str, kinds: Iterable[str]) -> List[str]:
+        """Rooms the section may hold for a block with classes of the given kinds, in room order."""
+        allowed = [set(self.rooms_for_kind(section_id, kind)) for kind in set(kinds)]
+        return [r_id for r_id in self.candidate_rooms_by_section.get(section_id, []) if all(r_id in a for a in allowed)]
+
+    def room_equivalence_classes(self) -> List[List[str]]:
+        """Groups of interchangeable rooms, in room order.
+
+        Rooms are keyed by their lab flag and, over the sections they are a candidate room for,
+        the tuple of (section_id, allowed for its lectures, allowed for its labs). Two rooms with
+        the same key can swap places in any timetable.
+        """
+        is_lab = {r.room_id: r.is_lab for r in self.rooms}
+        sections_by_room: Dict[str, List[Tuple[str, ...]]] = {r_id: [] for r_id in self.room_ids}
+        for s in self.section_ids:
+            for r_id in self.candidate_rooms_by_section.get(s, []):
+                sections_by_room[r_id].append((s, r_id in self.lecture_rooms_by_section.get(s, []), r_id in self.lab_rooms_by_section.get(s, [])))
+        classes: Dict[Tuple[bool, Tuple[Tuple[str, ...], ...]], List[str]] = {}
+        for r_id in self.room_ids:
+            key = (is_lab[r_id], tuple(sections_by_room[r_id]))
+            classes.setdefault(key, []).append(r_id)
+        return list(classes.values())
+
+    def lab_covering_starts(self, req: EffectiveRequirement, t: int) -> List[int]:
+        """Lab start timeslots of `req` whose block covers timeslot `t`."""
+        if not req.has_labs:
+            return []
+        return self.cover_by_block_size.get(req.lab_block_size, {}).get(t, [])
+
+    def lab_covered_timeslots(self, req: EffectiveRequirement, start_t: int) -> List[int]:
+        return self.covered_by_start[(req.lab_block_size, start_t)]
+
+
+def compile_problem(problem: ProblemData) -> CompiledProblem:
+    timeslots = problem.build_timeslots()
+    T = [t.timeslot_id for t in timeslots]
+    T_non_break = [t.timeslot_id for t in timeslots if not t.is_break]
+    timeslot_by_id = {t.timeslot_id: t for t in timeslots}
+    day_period_to_tid = {(t.day_index, t.period_index): t.timeslot_id for t in timeslots}
+    P1_timeslots = [t.timeslot_id for t in timeslots if t.period_index == 1 and not t.is_break]
+
+    section_ids = problem.section_ids()
+    faculty_ids = problem.faculty_ids()
+    course_ids = problem.course_ids()
+    rooms = list(problem.rooms or [])
+    room_ids = [r.room_id for r in rooms]
+    section_index = {s: i for i, s in enumerate(section_ids)}
+    faculty_index = {f: i for i, f in enumerate(faculty_ids)}
+    course_index = {c: i for i, c in enumerate(course_ids)}
+    room_index = {r: i for i, r in enumerate(room_ids)}
+    section_size = {s.section_id: s.num_students for s in problem.sections}
+
+    course_by_id = problem.course_by_id()
+    req_map = problem.section_course_requirements_map()
+    fac_map = problem.faculty_assignment_map()
+
+    requirements: List[EffectiveRequirement] = []
+    for s in section_ids:
+        for c in course_ids:
+            defaults = course_by_id[c]
+            r = req_map.get((s, c))
+            weekly_lectures = defaults.lecture_periods_per_week if r is None else r.weekly_lectures
+            weekly_lab_sessions = (defaults.lab_sessions_per_week if defaults.is_lab else 0) if r is None else r.weekly_lab_sessions
+            lab_block_size = (defaults.lab_block_size if defaults.is_lab else 0) if r is None else (r.lab_block_size or (defaults.lab_block_size if defaults.is_lab else 0))
+            if not weekly_lectures and not weekly_lab_sessions:
+                continue
+            f = fac_map.get((s, c))
+            requirements.append(
+                EffectiveRequirement(
+                    section_id=s,
+                    course_id=c,
+                    faculty_id=f,
+                    is_lab_course=defaults.is_lab,
+                    weekly_lectures=weekly_lectures,
+                    weekly_lab_sessions=weekly_lab_sessions,
+                    lab_block_size=lab_block_size,
+                    section_idx=section_index[s],
+                    course_idx=course_index[c],
+                    faculty_idx=faculty_index.get(f) if f is not None else None,
+                )
+            )
+
+    requirement_by_pair = {(req.section_id, req.course_id): req for req in requirements}
+    requirements_by_section: Dict[str, List[EffectiveRequirement]] = {s: [] for s in section_ids}
+    requirements_by_faculty: Dict[str, List[EffectiveRequirement]] = defaultdict(list)
+    for req in requirements:
+        requirements_by_section[req.section_id].append(req)
+        if req.faculty_id:
+            requirements_by_faculty[req.faculty_id].append(req)
+
+    valid_starts_by_block_size: Dict[int, List[int]] = {}
+    cover_by_block_size: Dict[int, Dict[int, List[int]]] = {}
+    covered_by_start: Dict[Tuple[int, int], List[int]] = {}
+    for bsize in sorted({req.lab_block_size for req in requirements if req.has_labs}):
+        starts_by_day = compute_valid_lab_starts(timeslots, bsize)
+        start_list = [ts for v in starts_by_day.values() for ts in v]
+        valid_starts_by_block_size[bsize] = start_list
+        cover_map: Dict[int, List[int]] = defaultdict(list)
+        for start_t in start_list:
+            start_ts = timeslot_by_id[start_t]
+            covered = [day_period_to_tid[(start_ts.day_index, start_ts.period_index + k)] for k in range(bsize)]
+            covered_by_start[(bsize, start_t)] = covered
+            for tid in covered:
+                cover_map[tid].append(start_t)
+        cover_by_block_size[bsize] = dict(cover_map)
+
+    blocks_by_day = _identify_continuous_blocks(timeslots)
+    timeslot_to_block: Dict[int, int] = {}
+    for _day_idx, blocks in blocks_by_day.items():
+        for block_id, block_tids in blocks:
+            for tid in block_tids:
+                timeslot_to_block[tid] = block_id
+
+    # All rooms with sufficient capacity (both lecture and lab rooms); see CompiledProblem.with_room_domains
+    lecture_rooms_by_section, lab_rooms_by_section, candidate_rooms_by_section = _candidate_rooms(
+        problem.sections, rooms, requirements_by_section, "capacity", None
+    )
+
+    return CompiledProblem(
+        problem=problem,
+        timeslots=timeslots,
+        T=T,
+        T_non_break=T_non_break,
+        timeslot_by_id=timeslot_by_id,
+        day_period_to_tid=day_period_to_tid,
+        P1_timeslots=P1_timeslots,
+        section_ids=section_ids,
+        faculty_ids=faculty_ids,
+        course_ids=course_ids,
+        room_ids=room_ids,
+        section_index=section_index,
+        faculty_index=faculty_index,
+        course_index=course_index,
+        room_index=room_index,
+        section_size=section_size,
+        requirements=requirements,
+        requirement_by_pair=requirement_by_pair,
+        requirements_by_section=requirements_by_section,
+        requirements_by_faculty=dict(requirements_by_faculty),
+        valid_starts_by_block_size=valid_starts_by_block_size,
+        cover_by_block_size=cover_by_block_size,
+        covered_by_start=covered_by_start,
+        blocks_by_day=blocks_by_day,
+        timeslot_to_block=timeslot_to_block,
+        rooms=rooms,
+        candidate_rooms_by_section=candidate_rooms_by_section,
+        lecture_rooms_by_section=lecture_rooms_by_section,
+        lab_rooms_by_section=lab_rooms_by_section,
+    )
@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import dataclasses
+import multiprocessing
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+try:
+    from .compiled_problem import CompiledProblem, compile_problem
+    from .model_cache import ModelCache
+    from .models import ProblemData
+    from .result_cache import ResultCache
+    from .solve_metrics import SolveMetrics
+    from .solver_params import SolverParams, available_cpus, default_workers, reserve_workers
+    from .timetable_solver import STOP_OPTIMAL, SolveResult, _availability_maps, solve
+    from .warm_start import WarmStartHint
+except ImportError:
+    from compiled_problem import CompiledProblem, compile_problem
+    from model_cache import ModelCache
+    from models import ProblemData
+    from result_cache import ResultCache
+    from solve_metrics import SolveMetrics
+    from solver_params import SolverParams, available_cpus, default_workers, reserve_workers
+    from timetable_solver import STOP_OPTIMAL, SolveResult, _availability_maps, solve
+    from warm_start import WarmStartHint
+
+
+@dataclasses.dataclass
+class Part:
+    """Sections solved together, and the rooms they may use (None: every room of the problem)."""
+
+    sections: List[str]
+    rooms: Optional[List[str]] = None
+
+
+def sub_problem(problem: ProblemData, sections: Iterable[str], rooms: Optional[Iterable[str]] = None) -> ProblemData:
+    """`problem` restricted to `sections` (their requirements, assignments and faculty) and, if given, `rooms`."""
+    keep = set(sections)
+    faculty_courses = [a for a in problem.faculty_courses if a.section_id in keep]
+    faculty = {a.faculty_id for a in faculty_courses}
+    update = {
+        "sections": [s for s in problem.sections if s.section_id in keep],
+        "section_requirements": [r for r in problem.section_requirements if r.section_id in keep],
+        "faculty_courses": faculty_courses,
+        "faculty": [f for f in problem.faculty if f.faculty_id in faculty],
+    }
+    if rooms is not None and problem.rooms:
+        room_ids = set(rooms)
+        update["rooms"] = [r for r in problem.rooms if r.room_id in room_ids]
+    return problem.copy(update=update)
+
+
+class _UnionFind:
+    def __init__(self, items: Iterable[str]) -> None:
+        self.parent = {x: x for x in items}
+
+    def find(self, x: str) -> str:
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union_all(self, items: List[str]) -> None:
+        for x in items[1:]:
+            self.parent[self.find(x)] = self.find(items[0])
+
+    def groups(self, order: List[str]) -> List[List[str]]:
+        by_root: Dict[str, List[str]] = defaultdict(list)
+        for x in order:
+            by_root[self.find(x)].append(x)
+        return list(by_root.values())
+
+
+def faculty_components(compiled: CompiledProblem) -> List[List[str]]:
+    """Sections linked by a shared faculty member (directly or through other sections)."""
+    uf = _UnionFind(compiled.section_ids)
+    for reqs in compiled.requirements_by_faculty.values():
+        uf.union_all([req.section_id for req in reqs])
+    return uf.groups(compiled.section_ids)
+
+
+def independent_parts(compiled: CompiledProblem) -> List[Part]:
+    """Connected components of the section - faculty - room graph: no constraint links two parts."""
+    uf = _UnionFind(compiled.section_ids)
+    for reqs in compiled.requirements_by_faculty.values():
+        uf.union_all([req.section_id for req in reqs])
+    sections_by_room: Dict[str, List[str]] = defaultdict(list)
+    for s, room_ids in compiled.candidate_rooms_by_section.items():
+        for r_id in room_ids:
+            sections_by_room[r_id].append(s)
+    for sections in sections_by_room.values():
+        uf.union_all(sections)
+    return [Part(sections=group) for group in uf.groups(compiled.section_ids)]
+
+
+def split_room_pool(compiled: CompiledProblem, groups: List[List[str]]) -> Optional[List[Part]]:
+    """Give each faculty component its own rooms, so the components no longer interact.
+
+    A section never uses two rooms at once, so every section first gets a home room (largest
+    sections first, smallest room that fits); the rooms left over go to the component with the
+    most class periods per room among those with a section that fits. Returns None when some
+    section finds no home room: then the room capacity is too tight to split without losing
+    timetables, and the components must share their rooms.
+    """
+    rooms = sorted(compiled.rooms, key=lambda r: (r.capacity, r.room_id))
+    group_of = {s: g for g, sections in enumerate(groups) for s in sections}
+    pools: List[List[str]] = [[] for _ in groups]
+    taken: Set[str] = set()
+    for s in sorted(compiled.section_ids, key=lambda s: -compiled.section_size[s]):
+        home = next((r for r in rooms if r.room_id not in taken and r.capacity >= compiled.section_size[s]), None)
+        if home is None:
+            return None
+        taken.add(home.room_id)
+        pools[group_of[s]].append(home.room_id)
+
+    periods = [sum(req.total_periods for s in sections for req in compiled.requirements_by_section[s]) for sections in groups]
+    smallest = [min(compiled.section_size[s] for s in sections) for sections in groups]
+    for r in reversed(rooms):
+        if r.room_id in taken:
+            continue
+        fits = [g for g in range(len(groups)) if smallest[g] <= r.capacity]
+        if fits:
+            g = max(fits, key=lambda g: periods[g] / len(pools[g]))
+            pools[g].append(r.room_id)
+    return [Part(sections=sections, rooms=pool) for sections, pool in zip(groups, pools)]
+
+
+def decompose(compiled: CompiledProblem, split_rooms: bool = False) -> List[Part]:
+    """Independent parts of the problem; with `split_rooms`, faculty components get disjoint room pools."""
+    parts = independent_parts(compiled)
+    if split_rooms and compiled.have_rooms and len(parts) == 1:
+        groups = faculty_components(compiled)
+        if len(groups) > 1:
+            return split_room_pool(compiled, groups) or parts
+    return parts
+
+
+def _solve_part(problem: ProblemData, deadline: float, share_sec: float, kwargs: Dict) -> SolveResult:
+    # Runs in a pool process; time.time() is shared across processes, time.monotonic() is not
+    return solve(problem, time_limit_sec=max(min(deadline - time.time(), share_sec), 1.0), **kwargs)
+
+
+def _merge(compiled: CompiledProblem, results: List[SolveResult], metrics: SolveMetrics) -> SolveResult:
+    schedule_by_section: Dict[str, Dict[int, Tuple[str, str, str, str]]] = {}
+    schedule_by_faculty: Dict[str, Dict[int, Tuple[str, str, str, str]]] = {}
+    for result in results:
+        schedule_by_section.update(result.schedule_by_section)
+        schedule_by_faculty.update(result.schedule_by_faculty)
+        if result.metrics is not None:
+            metrics.absorb(result.metrics)
+    available_rooms, available_faculty = _availability_maps(compiled, schedule_by_section, schedule_by_faculty)
+    objectives = [r.objective_value for r in results]
+    not_optimal = [r for r in results if r.status != "OPTIMAL"]
+    return SolveResult(
+        status="FEASIBLE" if not_optimal else "OPTIMAL",
+        schedule_by_section=schedule_by_section,
+        schedule_by_faculty=schedule_by_faculty,
+        timeslots=compiled.timeslots,
+        objective_value=sum(objectives) if all(v is not None for v in objectives) else None,
+        available_rooms=available_rooms,
+        available_faculty=available_faculty,
+        stop_reason=not_optimal[0].stop_reason if not_optimal else STOP_OPTIMAL,
+        metrics=metrics,
+        cache_hit=all(r.cache_hit for r in results),
+    )
+
+
+def solve_decomposed(
+    problem: ProblemData,
+    time_limit_sec: int = 60,
+    optimize_gaps: bool = False,
+    compiled: Optional[CompiledProblem] = None,
+    room_model: str = "per_slot",
+    room_symmetry: bool = False,
+    engine: str = "boolean",
+    hint_from: Union[SolveResult, str, WarmStartHint, None] = None,
+    params: Optional[SolverParams] = None,
+    gap_model: str = "triple",
+    cache: Optional[ResultCache] = None,
+    model_cache: Optional[ModelCache] = None,
+    room_domains: str = "capacity",
+    room_slack: Optional[float] = None,
+    split_rooms: bool = False,
+    max_processes: Optional[int] = None,
+) -> SolveResult:
+    """solve() each independent part of the problem in its own process and merge the timetables.
+
+    Parts share no faculty and no room (see decompose), so the merged timetable is exactly as
+    valid as the parts. Each part runs a full solve() with `params`; by default one process per
+    CPU runs at once (up to one per part). The default workers (or `params.num_workers` per
+    process) are reserved from the process-wide budget while the parts run and split evenly
+    between the processes. When parts have to queue, each wave of them gets an equal share of
+    `time_limit_sec`. With `split_rooms`, parts that failed on their room pool are re-solved
+    together, on the rooms of every failed part, within the remaining time. A single part is
+    solved in-process.
+    """
+    if compiled is None:
+        compiled = compile_problem(problem)
+    if params is None:
+        params = SolverParams()
+    metrics = SolveMetrics()
+    deadline = time.time() + time_limit_sec
+    with metrics.stage("decompose"):
+        # Parts only need to be independent under the room domains they are solved with
+        parts = decompose(compiled.with_room_domains(room_domains, room_slack), split_rooms=split_rooms)
+    kwargs = dict(
+        optimize_gaps=optimize_gaps,
+        room_model=room_model,
+        room_symmetry=room_symmetry,
+        engine=engine,
+        hint_from=hint_from,
+        params=params,
+        gap_model=gap_model,
+        cache=cache,
+        model_cache=model_cache,
+        room_domains=room_domains,
+        room_slack=room_slack,
+    )
+    if len(parts) == 1:
+        return solve(problem, time_limit_sec=time_limit_sec, compiled=compiled, **kwargs)
+
+    metrics.parts = len(parts)
+    if max_processes is None:
+        max_processes = available_cpus()
+    processes = min(max_processes, len(parts))
+    requested = default_workers() if params.num_workers is None else params.num_workers * processes
+    # Parts queue up when there are more than processes: each wave gets an equal share of the time
+    share_sec = time_limit_sec / -(-len(parts) // processes)
+    problems = [sub_problem(problem, part.sections, part.rooms) for part in parts]
+    # The part processes' workers come from this process's budget while they run
+    with metrics.stage("solve_parts"), reserve_workers(requested) as granted:
+        part_kwargs = dict(kwargs, params=dataclasses.replace(params, num_workers=max(1, granted // processes)))
+        # Spawned, not forked: callers (uvicorn, Streamlit) run threads a fork would copy mid-flight
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+            futures = [pool.submit(_solve_part, p, deadline, share_sec, part_kwargs) for p in problems]
+            results = [f.result() for f in futures]
+
+    failed = [i for i, r in enumerate(results) if r.status == "INFEASIBLE"]
+    if failed and parts[failed[0]].rooms is not None and time.time() < deadline:
+        with metrics.stage("solve_parts"):
+            sections = [s for i in failed for s in parts[i].sections]
+            rooms = [r_id for i in failed for r_id in parts[i].rooms]
+            retry = _solve_part(sub_problem(problem, sections, rooms), deadline, time_limit_sec, kwargs)
+        results = [r for i, r in enumerate(results) if i not in failed] + [retry]
+        failed = [] if retry.status != "INFEASIBLE" else [len(results) - 1]
+    if failed:
+        result = results[failed[0]]
+        return SolveResult(
+            status="INFEASIBLE",
+            schedule_by_section={},
+            schedule_by_faculty={},
+            timeslots=compiled.timeslots,
+            stop_reason=result.stop_reason,
+            metrics=metrics,
+        )
+    with metrics.stage("merge"):
+        return _merge(compiled, results, metrics)
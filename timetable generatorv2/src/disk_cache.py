@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+try:
+    from .models import ProblemData
+except ImportError:
+    from models import ProblemData
+
+_ENTRY_SUFFIX = ".pkl"
+
+
+def _canonical(value: Any) -> Any:
+    # Input rows are unordered: sort every list of records by its JSON form
+    if isinstance(value, dict):
+        return {k: _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        items = [_canonical(v) for v in value]
+        if items and all(isinstance(v, dict) for v in items):
+            items.sort(key=lambda v: json.dumps(v, sort_keys=True))
+        return items
+    return value
+
+
+def normalized_problem(problem: ProblemData) -> Dict[str, Any]:
+    """The problem as plain data with every list of rows sorted, so row order does not change a key."""
+    return _canonical(problem.dict())
+
+
+def digest(payload: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    entries: int = 0
+    size_bytes: int = 0
+
+
+class DiskCache:
+    """Picklable values on local disk, one file per key, evicted least recently used first.
+
+    A hit refreshes the entry's modification time, which is the LRU order; once the entries
+    exceed `max_bytes` the oldest are removed. Entries are only ever written by this process
+    family, so they are trusted like any other local state (do not point it at shared storage).
+    """
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._stats = CacheStats()
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Pool processes get their own lock and counters; the entries on disk are shared
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_stats"] = CacheStats()
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + _ENTRY_SUFFIX)
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                result = pickle.load(f)
+            os.utime(path)
+        except FileNotFoundError:
+            result = None
+        except Exception:
+            # Unreadable / truncated entry (or an older layout of the cached type): drop it
+            result = None
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self._lock:
+            if result is None:
+                self._stats.misses += 1
+            else:
+                self._stats.hits += 1
+        return result
+
+    def put(self, key: str, value: Any) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        with self._lock:
+            self._stats.stores += 1
+        self._evict()
+
+    def _entries(self) -> List[os.DirEntry]:
+        try:
+            return [e for e in os.scandir(self.directory) if e.name.endswith(_ENTRY_SUFFIX)]
+        except FileNotFoundError:
+            return []
+
+    def _evict(self) -> None:
+        entries = []
+        for e in self._entries():
+            try:
+                st = e.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, e.path))
+        total = sum(size for _mtime, size, _path in entries)
+        for _mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            with self._lock:
+                self._stats.evictions += 1
+
+    def clear(self) -> None:
+        for e in self._entries():
+            try:
+                os.remove(e.path)
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> CacheStats:
+        sizes = []
+        for e in self._entries():
+            try:
+                sizes.append(e.stat().st_size)
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            return CacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                stores=self._stats.stores,
+                evictions=self._stats.evictions,
+                entries=len(sizes),
+                size_bytes=sum(sizes),
+            )
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import time
+from collections import deque
+from dataclasses import dataclass, field, replace
+from typing import Callable, Deque, List, Optional, Set, Tuple
+
+from ortools.sat.python import cp_model
+
+try:
+    from .compiled_problem import CompiledProblem, compile_problem
+    from .models import ProblemData
+    from .solve_metrics import SolveMetrics
+    from .solver_params import SolverParams, reserve_workers
+    from .timetable_solver import MAX_P1_PER_FACULTY, build_model
+except ImportError:
+    from compiled_problem import CompiledProblem, compile_problem
+    from models import ProblemData
+    from solve_metrics import SolveMetrics
+    from solver_params import SolverParams, reserve_workers
+    from timetable_solver import MAX_P1_PER_FACULTY, build_model
+
+# How an explanation ended (InfeasibilityExplanation.status)
+EXPLAIN_CONFLICT = "conflict"  # the groups in `conflict` cannot all hold
+EXPLAIN_FEASIBLE = "feasible"  # the inputs have a timetable after all (the solve ran out of time)
+EXPLAIN_UNKNOWN = "unknown"  # the time budget ran out before CP-SAT proved either
+
+# Guarded constraint families, in the order they are tried for removal: room-side groups are
+# the most often irrelevant, requirements the least
+FAMILIES = ("rooms", "stickiness", "faculty_clash", "faculty_p1", "section_overlap", "requirement")
+
+# Share of the budget for the assumption solve that gives the first conflict
+CORE_SHARE = 0.25
+
+
+@dataclass
+class ConflictPart:
+    """One guarded constraint group of a conflict and the input rows it comes from."""
+
+    family: str  # one of FAMILIES
+    key: str  # section_id (requirement, section_overlap, stickiness), faculty_id or room_id
+    description: str
+    csv_rows: List[str] = field(default_factory=list)  # e.g. "faculty_courses.csv lines 2-13"
+
+
+@dataclass
+class InfeasibilityExplanation:
+    status: str  # one of the EXPLAIN_* values above
+    conflict: List[ConflictPart] = field(default_factory=list)
+    minimal: bool = False  # removing any one part makes the rest feasible (proved within the budget)
+    solves: int = 0
+    metrics: SolveMetrics = field(default_factory=SolveMetrics)
+
+    def summary_lines(self) -> List[str]:
+        if self.status == EXPLAIN_FEASIBLE:
+            return ["The inputs have a timetable: the solve ran out of time rather than proving them infeasible."]
+        if self.status == EXPLAIN_UNKNOWN:
+            return ["No explanation within the time budget."]
+        kind = "Minimal conflict" if self.minimal else "Conflict (may not be minimal)"
+        lines = [f"{kind}: these {len(self.conflict)} constraint groups cannot all hold"]
+        for part in self.conflict:
+            lines.append(f"  - {part.description}")
+            lines.extend(f"      {row}" for row in part.csv_rows)
+        return lines
+
+
+def _csv_lines(file_name: str, items: List, match: Callable) -> List[str]:
+    # Loaders keep one list item per CSV row, in file order, after the header line
+    numbers = [i + 2 for i, item in enumerate(items or []) if match(item)]
+    spans: List[List[int]] = []
+    for n in numbers:
+        if spans and spans[-1][1] == n - 1:
+            spans[-1][1] = n
+        else:
+            spans.append([n, n])
+    if not spans:
+        return []
+    text = ", ".join(str(a) if a == b else f"{a}-{b}" for a, b in spans)
+    return [f"{file_name} line{'s' if len(numbers) > 1 else ''} {text}"]
+
+
+def _describe(compiled: CompiledProblem, family: str, key: str) -> ConflictPart:
+    problem = compiled.problem
+    if family == "requirement":
+        reqs = compiled.requirements_by_section[key]
+        rows = _csv_lines("section_course_requirements.csv", problem.section_requirements, lambda r: r.section_id == key)
+        overridden = {r.course_id for r in problem.section_requirements or [] if r.section_id == key}
+        defaults = {r.course_id for r in reqs} - overridden
+        rows += _csv_lines("courses.csv", problem.courses, lambda c: c.course_id in defaults)
+        rows += _csv_lines("faculty_courses.csv", problem.faculty_courses, lambda a: a.section_id == key)
+        periods = sum(r.total_periods for r in reqs)
+        return ConflictPart(family, key, f"Section {key} takes {periods} periods a week of {len(reqs)} courses", rows)
+    if family in ("section_overlap", "stickiness"):
+        rows = _csv_lines("sections.csv", problem.sections, lambda r: r.section_id == key)
+        if family == "section_overlap":
+            return ConflictPart(family, key, f"Section {key} attends one class at a time", rows)
+        rooms = f"capacity >= {compiled.section_size[key]}"
+        if (compiled.room_domains, compiled.room_slack) != ("capacity", None):
+            rooms += f" that suits every class of the block ({compiled.room_domains} room domains"
+            rooms += f", slack {compiled.room_slack:g})" if compiled.room_slack is not None else ")"
+        return ConflictPart(family, key, f"Section {key} holds one room of {rooms} for each teaching block it has classes in", rows)
+    if family in ("faculty_clash", "faculty_p1"):
+        rows = _csv_lines("faculty.csv", problem.faculty, lambda r: r.faculty_id == key)
+        if family == "faculty_clash":
+            return ConflictPart(family, key, f"Faculty {key} teaches one class at a time", rows)
+        return ConflictPart(family, key, f"Faculty {key} teaches at most {MAX_P1_PER_FACULTY} first-period classes a week", rows)
+    return ConflictPart(family, key, f"Room {key} hosts one section at a time", _csv_lines("rooms.csv", problem.rooms, lambda r: r.room_id == key))
+
+
+def explain_infeasibility(
+    problem: ProblemData,
+    time_limit_sec: float = 60,
+    compiled: Optional[CompiledProblem] = None,
+    params: Optional[SolverParams] = None,
+    room_domains: str = "capacity",
+    room_slack: Optional[float] = None,
+) -> InfeasibilityExplanation:
+    """Find a small set of constraint groups of `problem` that cannot hold together.
+
+    Each section's requirements, no-overlap and room-per-block constraints, each faculty
+    member's clash and P1 limits and each room's clash constraints go behind one literal of the
+    block room model (boolean engine; every room model has the same timetables). An assumption
+    solve on all literals gives CP-SAT's sufficient assumptions for infeasibility as the first
+    conflict (or, past its share of the budget, a plain solve proves all groups infeasible).
+    Groups are then removed family by family, halving the chunks that cannot go, as long as the
+    rest stays infeasible; these solves fix the literals instead of assuming them, so presolve
+    keeps its full strength. The conflict is minimal unless `time_limit_sec` runs out first.
+    Every solve reserves its workers from the process-wide budget (see solver_params.py).
+    Pass the `room_domains` and `room_slack` of the solve being explained: the model has the
+    same room candidates (see CompiledProblem.with_room_domains).
+    """
+    # The probes' search logs are not kept: there are dozens of them and none is the solve's
+    params = replace(params or SolverParams(), log_lines=None, log_search_progress=False)
+    metrics = SolveMetrics()
+    deadline = time.monotonic() + time_limit_sec
+    if compiled is None:
+        with metrics.stage("compile"):
+            compiled = compile_problem(problem)
+
+    with metrics.stage("build"):
+        tm = build_model(compiled, room_model="block", guard_groups=True, room_domains=room_domains, room_slack=room_slack)
+        model = tm.model
+        proto = model.Proto()
+        groups: List[Tuple[str, str]] = []
+        literals: List[cp_model.IntVar] = []
+        for (family, (key,)), constraint_indices in tm.guards.items():
+            literal = model.NewBoolVar(f"guard_{family}_{key}")
+            for i in constraint_indices:
+                proto.constraints[i].enforcement_literal.append(literal.Index())
+            groups.append((family, key))
+            literals.append(literal)
+    metrics.families = tm.families
+    explanation = InfeasibilityExplanation(status=EXPLAIN_UNKNOWN, metrics=metrics)
+    group_of_literal = {v.Index(): i for i, v in enumerate(literals)}
+
+    def check(enforced: Set[int], budget: float, assume: bool = False) -> Tuple[int, List[int]]:
+        # Solve with only the `enforced` groups: (status, groups of the core when assumed and infeasible)
+        model.ClearAssumptions()
+        for i, literal in enumerate(literals):
+            domain = proto.variables[literal.Index()].domain
+            del domain[:]
+            domain.extend([0, 1] if assume else [int(i in enforced)] * 2)
+        if assume:
+            model.AddAssumptions([literals[i] for i in sorted(enforced)])
+        with reserve_workers(params.requested_workers()) as num_workers:
+            solver = params.new_solver(max(0.0, budget), num_workers)
+            status = solver.Solve(model)
+        metrics.add_search(solver, has_objective=False)
+        explanation.solves += 1
+        if status != cp_model.INFEASIBLE or not assume:
+            return status, []
+        return status, [group_of_literal[i] for i in solver.SufficientAssumptionsForInfeasibility()]
+
+    everything = set(range(len(groups)))
+    conflict = everything
+    with metrics.stage("core"):
+        status, core = check(everything, time_limit_sec * CORE_SHARE, assume=True)
+        if core:
+            conflict = set(core)
+        elif status == cp_model.UNKNOWN:
+            status, _ = check(everything, deadline - time.monotonic())
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        explanation.status = EXPLAIN_FEASIBLE
+        return explanation
+    if status != cp_model.INFEASIBLE:
+        return explanation
+
+    minimal = True
+    with metrics.stage("minimize"):
+        chunks: Deque[List[int]] = deque([i for i in sorted(conflict) if groups[i][0] == family] for family in FAMILIES)
+        while chunks:
+            chunk = [i for i in chunks.popleft() if i in conflict]
+            if not chunk:
+                continue
+            left = deadline - time.monotonic()
+            if left <= 0:
+                minimal = False
+                break
+            # One check may take half of what is left, so a hard one cannot use up the rest
+            status, _ = check(conflict - set(chunk), left / 2)
+            if status == cp_model.INFEASIBLE:
+                conflict = conflict - set(chunk)
+            elif len(chunk) > 1:
+                half = len(chunk) // 2
+                chunks.appendleft(chunk[half:])
+                chunks.appendleft(chunk[:half])
+            elif status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+                minimal = False
+
+    explanation.status = EXPLAIN_CONFLICT
+    explanation.minimal = minimal
+    order = sorted(conflict, key=lambda i: (FAMILIES.index(groups[i][0]), i))
+    explanation.conflict = [_describe(tm.compiled, *groups[i]) for i in order]
+    return explanation
@@ -8,17 +8,17 @@ import pandas as pd
 
 try:
     from .models import ProblemData, Timeslot
-    from .timetable_solver import SolveResult
+    from .compact_result import AnyResult
 except ImportError:
     from models import ProblemData, Timeslot
-    from timetable_solver import SolveResult
+    from compact_result import AnyResult
 
 
 def _ensure_dir(path: str) -> None:
     os.makedirs(path, exist_ok=True)
 
 
-def build_grids_by_section(result: SolveResult) -> Dict[str, pd.DataFrame]:
+def build_grids_by_section(result: AnyResult) -> Dict[str, pd.DataFrame]:
     # Build a grid day x period_index per section
     timeslots = result.timeslots
     days = sorted({(t.day_index, t.day_name) for t in timeslots}, key=lambda x: x[0])
@@ -67,7 +67,7 @@ def build_grids_by_section(result: SolveResult) -> Dict[str, pd.DataFrame]:
     return grids
 
 
-def build_grids_by_faculty(result: SolveResult) -> Dict[str, pd.DataFrame]:
+def build_grids_by_faculty(result: AnyResult) -> Dict[str, pd.DataFrame]:
     # Similar to section grids
     timeslots = result.timeslots
     days = sorted({(t.day_index, t.day_name) for t in timeslots}, key=lambda x: x[0])
@@ -108,11 +108,11 @@ def build_grids_by_faculty(result: SolveResult) -> Dict[str, pd.DataFrame]:
     return grids
 
 
-def build_availability_grid(result: SolveResult, resource_type: str = "rooms") -> pd.DataFrame:
+def build_availability_grid(result: AnyResult, resource_type: str = "rooms") -> pd.DataFrame:
     """Build a grid showing available rooms or faculty per timeslot.
     
     Args:
-        result: SolveResult with availability data
+        result: SolveResult (or CompactSolveResult) with availability data
         resource_type: 'rooms' or 'faculty'
     
     Returns:
@@ -150,7 +150,7 @@ def build_availability_grid(result: SolveResult, resource_type: str = "rooms") -
     return df
 
 
-def export_all(result: SolveResult, output_dir: str) -> None:
+def export_all(result: AnyResult, output_dir: str) -> None:
     _ensure_dir(output_dir)
     sections_dir = os.path.join(output_dir, "sections")
     faculty_dir = os.path.join(output_dir, "faculty")
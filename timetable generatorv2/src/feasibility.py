@@ -1,12 +1,18 @@
 from __future__ import annotations
 
-from collections import defaultdict
-from typing import Dict, List, Tuple
+from collections import defaultdict, deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
 
 try:
-    from .models import ProblemData, Timeslot
+    from .compiled_problem import CompiledProblem, compile_problem, compute_valid_lab_starts
+    from .models import ProblemData
+    from .timetable_solver import MAX_P1_PER_FACULTY
 except ImportError:
-    from models import ProblemData, Timeslot
+    from compiled_problem import CompiledProblem, compile_problem, compute_valid_lab_starts
+    from models import ProblemData
+    from timetable_solver import MAX_P1_PER_FACULTY
 
 
 class FeasibilityReport:
@@ -24,62 +30,19 @@ class FeasibilityReport:
         self.warnings.append(msg)
 
 
-def compute_valid_lab_starts(timeslots: List[Timeslot], block_size: int) -> Dict[int, List[int]]:
-    # Returns: day_index -> list of starting timeslot_ids that can fit block_size within day and non-break periods
-    starts_by_day: Dict[int, List[int]] = defaultdict(list)
-    # Group timeslots by day
-    by_day: Dict[int, List[Timeslot]] = defaultdict(list)
-    for t in timeslots:
-        by_day[t.day_index].append(t)
-
-    for day_idx, day_slots in by_day.items():
-        # ensure sorted by period within day
-        day_slots = sorted(day_slots, key=lambda x: x.period_index)
-        n = len(day_slots)
-        for i in range(0, n - block_size + 1):
-            window = day_slots[i : i + block_size]
-            if any(s.is_break for s in window):
-                continue
-            # consecutive within the same day by construction
-            starts_by_day[day_idx].append(window[0].timeslot_id)
-    return starts_by_day
-
-
-def pre_solve_feasibility_check(problem: ProblemData) -> FeasibilityReport:
+def pre_solve_feasibility_check(problem: ProblemData, compiled: Optional[CompiledProblem] = None) -> FeasibilityReport:
     report = FeasibilityReport()
-    timeslots = problem.build_timeslots()
-    non_break_slots_by_day: Dict[int, int] = defaultdict(int)
-    non_break_slots_total = 0
-    for t in timeslots:
-        if not t.is_break:
-            non_break_slots_by_day[t.day_index] += 1
-            non_break_slots_total += 1
+    if compiled is None:
+        compiled = compile_problem(problem)
+    non_break_slots_total = len(compiled.T_non_break)
 
     # Aggregate required periods per section
-    req_map = problem.section_course_requirements_map()
-    course_defaults = problem.course_by_id()
     per_section_required_periods: Dict[str, int] = defaultdict(int)
     per_section_lab_blocks: Dict[Tuple[str, int], int] = defaultdict(int)  # (section_id, block_size) -> count
-
-    for section in problem.sections:
-        for course in problem.courses:
-            r = req_map.get((section.section_id, course.course_id))
-            if r is None:
-                # If not specified, use course defaults (could be zeros)
-                weekly_lectures = course.lecture_periods_per_week
-                weekly_lab_sessions = course.lab_sessions_per_week if course.is_lab else 0
-                block_size = course.lab_block_size if course.is_lab else 0
-            else:
-                weekly_lectures = r.weekly_lectures
-                weekly_lab_sessions = r.weekly_lab_sessions
-                block_size = r.lab_block_size if r.lab_block_size is not None else (
-                    course.lab_block_size if course.is_lab else 0
-                )
-
-            per_section_required_periods[section.section_id] += weekly_lectures
-            if weekly_lab_sessions and block_size:
-                per_section_required_periods[section.section_id] += weekly_lab_sessions * block_size
-                per_section_lab_blocks[(section.section_id, block_size)] += weekly_lab_sessions
+    for req in compiled.requirements:
+        per_section_required_periods[req.section_id] += req.total_periods
+        if req.has_labs:
+            per_section_lab_blocks[(req.section_id, req.lab_block_size)] += req.weekly_lab_sessions
 
     # Check availability vs demand per section
     for section in problem.sections:
@@ -92,48 +55,26 @@ def pre_solve_feasibility_check(problem: ProblemData) -> FeasibilityReport:
     # Check lab start feasibility per day by block size
     # Coarse check: ensure total possible starts across week >= required sessions
     # This is conservative but catches obvious infeasibility
-    max_block_size = 0
-    for (_, block_size), sessions in per_section_lab_blocks.items():
-        if block_size > max_block_size:
-            max_block_size = block_size
-    if max_block_size:
-        starts_cache: Dict[int, List[int]] = {}
-        for bsize in sorted({bs for (_, bs) in per_section_lab_blocks.keys()}):
-            # count valid starts across all days
-            by_day_starts = compute_valid_lab_starts(timeslots, bsize)
-            starts_cache[bsize] = [t for day in by_day_starts.values() for t in day]
-
-        for (section_id, block_size), sessions in per_section_lab_blocks.items():
-            possible_starts = len(starts_cache.get(block_size, []))
-            if possible_starts < sessions:
-                report.add_error(
-                    f"Section {section_id} needs {sessions} lab blocks of size {block_size}, "
-                    f"but only {possible_starts} valid starting positions exist in the week."
-                )
+    for (section_id, block_size), sessions in per_section_lab_blocks.items():
+        possible_starts = len(compiled.valid_starts_by_block_size.get(block_size, []))
+        if possible_starts < sessions:
+            report.add_error(
+                f"Section {section_id} needs {sessions} lab blocks of size {block_size}, "
+                f"but only {possible_starts} valid starting positions exist in the week."
+            )
 
     # Assignment coverage check: each (section,course) with nonzero requirement must have a faculty assignment
-    fac_map = problem.faculty_assignment_map()
-    for section in problem.sections:
-        for course in problem.courses:
-            r = req_map.get((section.section_id, course.course_id))
-            if r is None:
-                weekly_lectures = course.lecture_periods_per_week
-                weekly_lab_sessions = course.lab_sessions_per_week if course.is_lab else 0
-                block_size_eff = course.lab_block_size if course.is_lab else 0
-            else:
-                weekly_lectures = r.weekly_lectures
-                weekly_lab_sessions = r.weekly_lab_sessions
-                block_size_eff = r.lab_block_size if r.lab_block_size is not None else (course.lab_block_size if course.is_lab else 0)
-            if (weekly_lectures or weekly_lab_sessions) and (section.section_id, course.course_id) not in fac_map:
+    for req in compiled.requirements:
+        if req.faculty_id is None:
+            report.add_error(
+                f"Missing faculty assignment for Section {req.section_id}, Course {req.course_id}."
+            )
+        # Enforce: labs must be exactly two consecutive periods
+        if req.weekly_lab_sessions and req.is_lab_course:
+            if req.lab_block_size != 2:
                 report.add_error(
-                    f"Missing faculty assignment for Section {section.section_id}, Course {course.course_id}."
+                    f"Lab block size must be 2 periods for Section {req.section_id}, Course {req.course_id} (found {req.lab_block_size})."
                 )
-            # Enforce: labs must be exactly two consecutive periods
-            if weekly_lab_sessions and course.is_lab:
-                if block_size_eff != 2:
-                    report.add_error(
-                        f"Lab block size must be 2 periods for Section {section.section_id}, Course {course.course_id} (found {block_size_eff})."
-                    )
 
     # Room feasibility checks (if rooms provided): ensure at least one suitable room exists per section needs
     if problem.rooms:
@@ -142,18 +83,9 @@ def pre_solve_feasibility_check(problem: ProblemData) -> FeasibilityReport:
         # Quick lookup per section for capacity-feasible rooms
         for section in problem.sections:
             # If any lectures required for this section across courses, ensure some non-lab room can host
-            needs_lecture = False
-            needs_lab = False
-            for course in problem.courses:
-                r = req_map.get((section.section_id, course.course_id))
-                if r is None:
-                    weekly_lectures = course.lecture_periods_per_week
-                    weekly_lab_sessions = course.lab_sessions_per_week if course.is_lab else 0
-                else:
-                    weekly_lectures = r.weekly_lectures
-                    weekly_lab_sessions = r.weekly_lab_sessions
-                needs_lecture = needs_lecture or (weekly_lectures > 0)
-                needs_lab = needs_lab or (weekly_lab_sessions > 0)
+            section_reqs = compiled.requirements_by_section.get(section.section_id, [])
+            needs_lecture = any(req.weekly_lectures > 0 for req in section_reqs)
+            needs_lab = any(req.weekly_lab_sessions > 0 for req in section_reqs)
             if needs_lecture:
                 possible = any(rm.capacity >= section.num_students for rm in nonlab_rooms)
                 if not possible:
@@ -167,6 +99,140 @@ def pre_solve_feasibility_check(problem: ProblemData) -> FeasibilityReport:
                         f"Section {section.section_id} requires lab sessions but no lab room has capacity >= {section.num_students}."
                     )
 
+    # Necessary conditions of the model's clash, P1 and room constraints (see the helpers below)
+    load = _RequirementLoad(compiled)
+    _check_faculty_load(compiled, load, report)
+    _check_faculty_p1(compiled, load, report)
+    _check_room_pigeonhole(compiled, load, report)
     return report
 
 
+class _RequirementLoad:
+    """Weekly periods per requirement, section and faculty member as NumPy arrays (compiled order)."""
+
+    def __init__(self, compiled: CompiledProblem) -> None:
+        reqs = compiled.requirements
+        self.section_idx = np.array([r.section_idx for r in reqs], dtype=np.int64)
+        self.faculty_idx = np.array([-1 if r.faculty_idx is None else r.faculty_idx for r in reqs], dtype=np.int64)
+        self.periods = np.array([r.total_periods for r in reqs], dtype=np.int64)
+        # Classes that can sit in a first period: every lecture and every lab session (a lab in P1 starts there)
+        self.classes = np.array([r.weekly_lectures + (r.weekly_lab_sessions if r.has_labs else 0) for r in reqs], dtype=np.int64)
+        staffed = self.faculty_idx >= 0
+        self.by_section = np.bincount(self.section_idx, weights=self.periods, minlength=len(compiled.section_ids)).astype(np.int64)
+        self.by_faculty = np.bincount(self.faculty_idx[staffed], weights=self.periods[staffed], minlength=len(compiled.faculty_ids)).astype(np.int64)
+
+
+def _check_faculty_load(compiled: CompiledProblem, load: _RequirementLoad, report: FeasibilityReport) -> None:
+    # A faculty member teaches at most one class per timeslot
+    slots = len(compiled.T_non_break)
+    for fi in np.flatnonzero(load.by_faculty > slots):
+        periods = int(load.by_faculty[fi])
+        report.add_error(
+            f"Faculty {compiled.faculty_ids[fi]} is assigned {periods} periods a week but only {slots} non-break timeslots exist; "
+            f"move at least {periods - slots} periods to other faculty."
+        )
+
+
+def _max_flow(capacity: Dict[int, Dict[int, int]], source: int, sink: int) -> int:
+    """Edmonds-Karp on `capacity` (node -> {node: capacity}), which is left as the residual graph."""
+    flow = 0
+    while True:
+        parent = {source: source}
+        queue = deque([source])
+        while queue and sink not in parent:
+            u = queue.popleft()
+            for v, cap in capacity[u].items():
+                if cap > 0 and v not in parent:
+                    parent[v] = u
+                    queue.append(v)
+        if sink not in parent:
+            return flow
+        path = []
+        v = sink
+        while v != source:
+            path.append((parent[v], v))
+            v = parent[v]
+        pushed = min(capacity[u][v] for u, v in path)
+        for u, v in path:
+            capacity[u][v] -= pushed
+            capacity[v][u] = capacity[v].get(u, 0) + pushed
+        flow += pushed
+
+
+def _check_faculty_p1(compiled: CompiledProblem, load: _RequirementLoad, report: FeasibilityReport) -> None:
+    # A section free in fewer timeslots than it has first periods must teach in some of them, and
+    # each such class counts against its faculty member's MAX_P1_PER_FACULTY: a transportation
+    # problem from sections (forced P1 classes) to faculty, solved as a max flow.
+    p1 = len(compiled.P1_timeslots)
+    slots = len(compiled.T_non_break)
+    if p1 == 0 or (load.faculty_idx < 0).any():
+        return  # unstaffed classes are reported above and could take any first period
+    forced = np.maximum(0, p1 - (slots - load.by_section))
+    total = int(forced.sum())
+    if total == 0:
+        return
+    num_sections = len(compiled.section_ids)
+    source, sink = -1, -2
+    capacity: Dict[int, Dict[int, int]] = defaultdict(dict)
+    for si in np.flatnonzero(forced):
+        capacity[source][int(si)] = int(forced[si])
+    edges = np.flatnonzero(forced[load.section_idx] > 0)
+    for k in edges:
+        s_node, f_node = int(load.section_idx[k]), num_sections + int(load.faculty_idx[k])
+        capacity[s_node][f_node] = min(p1, capacity[s_node].get(f_node, 0) + int(load.classes[k]))
+        capacity[f_node][sink] = MAX_P1_PER_FACULTY
+    staffed = _max_flow(capacity, source, sink)
+    if staffed < total:
+        short = [compiled.section_ids[si] for si in np.flatnonzero(forced) if capacity[source][int(si)] > 0]
+        report.add_error(
+            f"First periods: sections {', '.join(short)} are busy in almost every timeslot and must hold classes in "
+            f"{int(forced[[compiled.section_index[s] for s in short]].sum())} of their first periods, but their faculty may teach "
+            f"at most {MAX_P1_PER_FACULTY} first-period classes a week each: {total - staffed} cannot be staffed. "
+            f"Free some periods in these sections or spread their courses over more faculty."
+        )
+
+
+def _check_room_pigeonhole(compiled: CompiledProblem, load: _RequirementLoad, report: FeasibilityReport) -> None:
+    # Within any window of L timeslots a section busy p of the week's T timeslots has at least
+    # p - (T - L) periods of class, each needing its own room at its timeslot among the rooms it fits.
+    # Rooms a section fits are all rooms above a capacity, so these candidate sets are nested
+    # and Hall's condition for matching those periods to room-timeslots only has to hold for
+    # the sections above each size: their forced periods <= L x the rooms that hold them. With
+    # L = 1 this is the bipartite matching of always-busy sections to rooms at one timeslot.
+    if not compiled.have_rooms:
+        return
+    slots = len(compiled.T_non_break)
+    sizes = np.array([compiled.section_size[s] for s in compiled.section_ids], dtype=np.int64)
+    capacities = np.sort(np.array([r.capacity for r in compiled.rooms], dtype=np.int64))
+    fitting = len(capacities) - np.searchsorted(capacities, sizes, side="left")
+    # Sections no room holds get no room variables in the model
+    roomed = np.flatnonzero(fitting > 0)
+    order = roomed[np.argsort(-sizes[roomed], kind="stable")]
+    if len(order) == 0:
+        return
+    # Keep only the last section of each size: the condition is for all sections of at least that size
+    last_of_size = np.append(sizes[order][1:] != sizes[order][:-1], True)
+
+    windows: Dict[int, str] = {slots: "in the week"}
+    for day_idx, blocks in sorted(compiled.blocks_by_day.items()):
+        day_name = next(t.day_name for t in compiled.timeslots if t.day_index == day_idx)
+        windows.setdefault(sum(len(b) for _, b in blocks), f"on {day_name}")
+        for _, block in blocks:
+            windows.setdefault(len(block), f"in the {len(block)}-period teaching block of {day_name} starting at timeslot {block[0]}")
+    windows.setdefault(1, "in a single timeslot")
+
+    for length, where in sorted(windows.items(), reverse=True):
+        forced = np.maximum(0, load.by_section[order] - (slots - length))
+        demand = np.cumsum(forced)
+        supply = length * fitting[order]
+        bad = np.flatnonzero((demand > supply) & last_of_size)
+        if len(bad) == 0:
+            continue
+        k = bad[np.argmax(demand[bad] - supply[bad])]
+        size, rooms = int(sizes[order[k]]), int(fitting[order[k]])
+        report.add_error(
+            f"Rooms: {k + 1} sections of {size} or more students must be in class for at least {int(demand[k])} periods {where}, "
+            f"but the {rooms} rooms with capacity >= {size} offer only {int(supply[k])} room-periods there; "
+            f"add or enlarge rooms, or lighten these sections."
+        )
+        return  # one room shortage is enough to act on
@@ -0,0 +1,369 @@
+from __future__ import annotations
+
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .compiled_problem import CompiledProblem, EffectiveRequirement, compile_problem
+    from .models import ProblemData
+    from .solve_metrics import SolveMetrics
+    from .solver_params import SolverParams
+    from .timetable_solver import MAX_P1_PER_FACULTY, STOP_COMPLETE, STOP_UNPLACED, SolveResult, _availability_maps
+except ImportError:
+    from compiled_problem import CompiledProblem, EffectiveRequirement, compile_problem
+    from models import ProblemData
+    from solve_metrics import SolveMetrics
+    from solver_params import SolverParams
+    from timetable_solver import MAX_P1_PER_FACULTY, STOP_COMPLETE, STOP_UNPLACED, SolveResult, _availability_maps
+
+# Passed as `engine` by the CLI, API and Streamlit to build the timetable with solve_greedy instead of CP-SAT
+GREEDY_ENGINE = "greedy"
+
+# Slot scores (lower is better). Spreading a course over the week dominates, then compact days:
+# classes next to the section's others, no single free period left between two classes.
+SAME_COURSE_DAY_COST = 100.0  # per class of the same course already on that day
+SINGLE_GAP_COST = 10.0  # per single free period the class would leave next to it
+ADJACENT_BONUS = 3.0  # per class of the section right before / after it
+DAY_LOAD_COST = 1.0  # per class of the section already on that day
+P1_COST = 2.0  # first periods must be taken while the faculty member has some left: a bonus for the first, a cost from the third
+JITTER = 0.01  # tie-breaking noise, so retries explore other timetables
+
+# A class with no free slot may move up to this many classes out of its way (_Grid.eject);
+# failing that, the timetable is built again with its section and faculty earlier in the order
+MAX_EJECTED = 2
+MAX_ATTEMPTS = 20
+
+
+class _Grid:
+    """Occupancy of every section, faculty member and room per timeslot, as boolean arrays."""
+
+    def __init__(self, compiled: CompiledProblem, seed: int = 0) -> None:
+        self.compiled = compiled
+        timeslots = compiled.timeslots
+        self.tindex = {t.timeslot_id: i for i, t in enumerate(timeslots)}
+        n = len(timeslots)
+        days = sorted({t.day_index for t in timeslots})
+        day_pos = {d: i for i, d in enumerate(days)}
+        self.day = np.array([day_pos[t.day_index] for t in timeslots])
+        self.period = np.array([t.period_index for t in timeslots], dtype=float)
+        self.teach = np.array([not t.is_break for t in timeslots])
+        self.p1 = np.zeros(n, dtype=bool)
+        self.p1[[self.tindex[t] for t in compiled.P1_timeslots]] = True
+        block_ids = sorted(set(compiled.timeslot_to_block.values()))
+        block_pos = {b: i for i, b in enumerate(block_ids)}
+        self.block_ids = block_ids
+        # Breaks get a block of their own that never holds a room
+        self.block = np.array([block_pos.get(compiled.timeslot_to_block.get(t.timeslot_id), len(block_ids)) for t in timeslots])
+        self.block_slots = [np.flatnonzero(self.block == b) for b in range(len(block_ids))]
+        # Same-day neighbours one and two periods away: index (0 where there is none) and whether it
+        # exists / is a teaching period
+        by_day_period = {(t.day_index, t.period_index): i for i, t in enumerate(timeslots)}
+        self.neighbour: Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        for k in (-2, -1, 1, 2):
+            idx = np.array([by_day_period.get((t.day_index, t.period_index + k), -1) for t in timeslots])
+            exists = idx >= 0
+            self.neighbour[k] = (idx.clip(0), exists, exists & self.teach[idx.clip(0)])
+
+        self.sections = {s: i for i, s in enumerate(compiled.section_ids)}
+        self.faculty = {f: i for i, f in enumerate(compiled.faculty_ids)}
+        rooms = compiled.rooms
+        self.capacity = np.array([r.capacity for r in rooms], dtype=float)
+        self.candidates = {s: np.array([compiled.room_index[r] for r in compiled.candidate_rooms_by_section.get(s, [])], dtype=int) for s in compiled.section_ids}
+
+        self.section_busy = np.zeros((len(self.sections), n), dtype=bool)
+        self.faculty_busy = np.zeros((len(self.faculty), n), dtype=bool)
+        self.room_busy = np.zeros((len(rooms), n), dtype=bool)
+        self.room_busy[:, ~self.teach] = True
+        self.faculty_p1 = np.zeros(len(self.faculty), dtype=int)
+        self.course_day: Dict[Tuple[str, str], np.ndarray] = defaultdict(lambda: np.zeros(len(days)))
+        self.section_day = np.zeros((len(self.sections), len(days)))
+        self.block_room = np.full((len(self.sections), len(block_ids) + 1), -1, dtype=int)  # section x block -> room
+        # Home rooms: the largest sections pick first, each the smallest free room that fits it.
+        # While there are rooms enough, every section then has one room to itself all week.
+        self.home_room = np.full(len(self.sections), -1, dtype=int)
+        self.room_owner = np.full(len(rooms), -1, dtype=int)
+        for s in sorted(compiled.section_ids, key=lambda s: -compiled.section_size[s]):
+            free = [r for r in self.candidates[s] if self.room_owner[r] < 0]
+            if free:
+                room = min(free, key=lambda r: self.capacity[r])
+                self.home_room[self.sections[s]] = room
+                self.room_owner[room] = self.sections[s]
+        # Placed classes by id: (req, timeslot indices, room or -1, kind), and the class at every
+        # section / faculty timeslot (-1: free), so classes can be taken out again
+        self.classes: Dict[int, Tuple[EffectiveRequirement, np.ndarray, int, str]] = {}
+        self.section_class = np.full((len(self.sections), n), -1, dtype=int)
+        self.faculty_class = np.full((len(self.faculty), n), -1, dtype=int)
+        self.block_classes = np.zeros((len(self.sections), len(block_ids) + 1), dtype=int)  # classes holding each block room
+        self._next_id = 0
+        self._covers: Dict[int, np.ndarray] = {}
+        self.noise = np.random.default_rng(seed)
+
+    def _neighbour_busy(self, busy: np.ndarray, at: np.ndarray, k: int) -> np.ndarray:
+        idx, exists, _teach = self.neighbour[k]
+        return busy[idx[at]] & exists[at]
+
+    def _neighbour_free(self, busy: np.ndarray, at: np.ndarray, k: int) -> np.ndarray:
+        idx, _exists, teach = self.neighbour[k]
+        return ~busy[idx[at]] & teach[at]
+
+    def _cover(self, req: EffectiveRequirement, kind: str) -> np.ndarray:
+        # One row of timeslot indices per way to hold the class: every teaching period for a
+        # lecture, every valid lab start (and the periods its block covers) for a lab
+        size = req.lab_block_size if kind == "lab" else 0
+        cover = self._covers.get(size)
+        if cover is None:
+            if size:
+                compiled = self.compiled
+                starts = compiled.valid_starts_by_block_size[size]
+                cover = np.array([[self.tindex[t] for t in compiled.covered_by_start[(size, start)]] for start in starts], dtype=int).reshape(len(starts), size)
+            else:
+                cover = np.flatnonzero(self.teach)[:, None]
+            self._covers[size] = cover
+        return cover
+
+    def _feasible(self, req: EffectiveRequirement, cover: np.ndarray) -> np.ndarray:
+        # Rows whose every timeslot is free for the section, its faculty member and a room
+        si = self.sections[req.section_id]
+        ok = ~self.section_busy[si][cover].any(axis=1)
+        fi = self.faculty.get(req.faculty_id) if req.faculty_id else None
+        if fi is not None:
+            ok &= ~self.faculty_busy[fi][cover].any(axis=1)
+            ok &= self.faculty_p1[fi] + self.p1[cover].sum(axis=1) <= MAX_P1_PER_FACULTY
+        candidates = self.candidates[req.section_id]
+        if self.compiled.have_rooms and len(candidates) > 0:
+            # The room the section holds in the block, else its home room, else any candidate room
+            held = self.block_room[si, self.block[cover[:, 0]]]
+            room = np.where(held >= 0, held, self.home_room[si])
+            room_free = (room >= 0) & ~self.room_busy[room.clip(0)[:, None], cover].any(axis=1)
+            others = np.flatnonzero(ok & ~room_free & (held < 0))
+            if len(others):
+                room_free[others] = (~self.room_busy[candidates][:, cover[others]].any(axis=2)).any(axis=0)
+            ok &= room_free
+        return ok
+
+    def place(self, req: EffectiveRequirement, kind: str, rng: random.Random) -> bool:
+        """Put one lecture or lab session of `req` on its best free slot; False if there is none."""
+        cover = self._cover(req, kind)
+        options = np.flatnonzero(self._feasible(req, cover))
+        if len(options) == 0:
+            return False
+
+        # Score the options: spread the course over the week, keep the section's days compact
+        si = self.sections[req.section_id]
+        first, last = cover[options, 0], cover[options, -1]
+        busy = self.section_busy[si]
+        score = SAME_COURSE_DAY_COST * self.course_day[(req.section_id, req.course_id)][self.day[first]]
+        score += DAY_LOAD_COST * self.section_day[si][self.day[first]]
+        score -= ADJACENT_BONUS * (self._neighbour_busy(busy, first, -1).astype(float) + self._neighbour_busy(busy, last, 1))
+        single_before = self._neighbour_free(busy, first, -1) & self._neighbour_busy(busy, first, -2)
+        single_after = self._neighbour_free(busy, last, 1) & self._neighbour_busy(busy, last, 2)
+        score += SINGLE_GAP_COST * (single_before.astype(float) + single_after)
+        fi = self.faculty.get(req.faculty_id) if req.faculty_id else None
+        p1_used = self.faculty_p1[fi] if fi is not None else 0
+        score += P1_COST * (p1_used - 1) * self.p1[cover[options]].sum(axis=1)
+        score += 0.001 * self.period[first]
+        score += JITTER * self.noise.random(len(options))
+        self._add(req, kind, cover[options[int(np.argmin(score))]])
+        return True
+
+    def _add(self, req: EffectiveRequirement, kind: str, slots: np.ndarray, room: Optional[int] = None) -> int:
+        si = self.sections[req.section_id]
+        fi = self.faculty.get(req.faculty_id) if req.faculty_id else None
+        candidates = self.candidates[req.section_id]
+        block = self.block[slots[0]]
+        if room is None:
+            room = -1
+            if self.compiled.have_rooms and len(candidates) > 0:
+                room = self.block_room[si, block]
+                if room < 0:
+                    # A new block room: the section's home room if it is free, else preferably nobody's
+                    # home room, then the one with the most free periods in the block, smallest first
+                    free_here = candidates[~self.room_busy[candidates][:, slots].any(axis=1)]
+                    free_in_block = (~self.room_busy[free_here][:, self.block_slots[block]]).sum(axis=1)
+                    not_home = (free_here != self.home_room[si]).astype(int)
+                    owned = (self.room_owner[free_here] >= 0).astype(int)
+                    room = int(free_here[np.lexsort((self.capacity[free_here], -free_in_block, owned, not_home))[0]])
+        if room >= 0:
+            self.block_room[si, block] = room
+            self.block_classes[si, block] += 1
+            self.room_busy[room, slots] = True
+
+        cid = self._next_id
+        self._next_id += 1
+        self.classes[cid] = (req, slots, room, kind)
+        self.section_busy[si, slots] = True
+        self.section_class[si, slots] = cid
+        if fi is not None:
+            self.faculty_busy[fi, slots] = True
+            self.faculty_class[fi, slots] = cid
+            self.faculty_p1[fi] += int(self.p1[slots].sum())
+        day = self.day[slots[0]]
+        self.course_day[(req.section_id, req.course_id)][day] += 1
+        self.section_day[si, day] += len(slots)
+        return cid
+
+    def _remove(self, cid: int) -> Tuple[EffectiveRequirement, np.ndarray, int, str]:
+        req, slots, room, kind = self.classes.pop(cid)
+        si = self.sections[req.section_id]
+        fi = self.faculty.get(req.faculty_id) if req.faculty_id else None
+        if room >= 0:
+            block = self.block[slots[0]]
+            self.room_busy[room, slots] = False
+            self.block_classes[si, block] -= 1
+            if self.block_classes[si, block] == 0:
+                self.block_room[si, block] = -1
+        self.section_busy[si, slots] = False
+        self.section_class[si, slots] = -1
+        if fi is not None:
+            self.faculty_busy[fi, slots] = False
+            self.faculty_class[fi, slots] = -1
+            self.faculty_p1[fi] -= int(self.p1[slots].sum())
+        day = self.day[slots[0]]
+        self.course_day[(req.section_id, req.course_id)][day] -= 1
+        self.section_day[si, day] -= len(slots)
+        return req, slots, room, kind
+
+    def eject(self, req: EffectiveRequirement, kind: str, rng: random.Random) -> bool:
+        """Place a class that found no free slot by moving the classes in its way.
+
+        For each slot, the classes of the section and of its faculty member there are taken
+        out (at most MAX_EJECTED), the class goes in, and the others are placed again on their
+        best free slots; the first slot where they all fit is kept, otherwise nothing changes.
+        """
+        cover = self._cover(req, kind)
+        si = self.sections[req.section_id]
+        fi = self.faculty.get(req.faculty_id) if req.faculty_id else None
+        rows = list(range(len(cover)))
+        rng.shuffle(rows)
+        for row in rows:
+            slots = cover[row]
+            blockers = set(self.section_class[si, slots].tolist())
+            if fi is not None:
+                blockers.update(self.faculty_class[fi, slots].tolist())
+            blockers.discard(-1)
+            if not blockers or len(blockers) > MAX_EJECTED:
+                continue
+            ejected = [(cid, self._remove(cid)) for cid in sorted(blockers)]
+            added: List[int] = []
+            if self._feasible(req, slots[None, :])[0]:
+                added.append(self._add(req, kind, slots))
+                for _cid, (other, _slots, _room, other_kind) in ejected:
+                    if not self.place(other, other_kind, rng):
+                        break
+                    added.append(self._next_id - 1)
+                else:
+                    return True
+            for cid in reversed(added):
+                self._remove(cid)
+            for _cid, (other, other_slots, other_room, other_kind) in reversed(ejected):
+                self._add(other, other_kind, other_slots, other_room)
+        return False
+
+
+def _order(compiled: CompiledProblem, boost: Dict[str, float], rng: random.Random) -> List[Tuple[EffectiveRequirement, str]]:
+    # Labs first (longest blocks first), then lectures; within each, the most constrained
+    # requirements first: those whose section or faculty member has the fewest free periods
+    # left over, plus the boost of earlier failed attempts
+    teaching = max(len(compiled.T_non_break), 1)
+    section_load: Dict[str, int] = defaultdict(int)
+    faculty_load: Dict[str, int] = defaultdict(int)
+    for req in compiled.requirements:
+        section_load[req.section_id] += req.total_periods
+        if req.faculty_id:
+            faculty_load[req.faculty_id] += req.total_periods
+    rooms = max(len(compiled.rooms), 1)
+
+    def tightness(req: EffectiveRequirement) -> float:
+        load = max(section_load[req.section_id], faculty_load.get(req.faculty_id, 0)) / teaching
+        scarce_rooms = 1.0 - len(compiled.candidate_rooms_by_section.get(req.section_id, [])) / rooms if compiled.have_rooms else 0.0
+        return load + scarce_rooms + boost.get(req.section_id, 0.0) + boost.get(req.faculty_id or "", 0.0) + JITTER * rng.random()
+
+    labs = sorted((req for req in compiled.requirements if req.has_labs), key=lambda req: (-req.lab_block_size, -tightness(req)))
+    lectures = sorted((req for req in compiled.requirements if req.has_lectures), key=lambda req: -tightness(req))
+    tasks = [(req, "lab") for req in labs for _ in range(req.weekly_lab_sessions)]
+    tasks.extend((req, "lecture") for req in lectures for _ in range(req.weekly_lectures))
+    return tasks
+
+
+def solve_greedy(
+    problem: ProblemData,
+    time_limit_sec: float = 60,
+    compiled: Optional[CompiledProblem] = None,
+    params: Optional[SolverParams] = None,
+    max_attempts: int = MAX_ATTEMPTS,
+) -> SolveResult:
+    """Build a timetable without CP-SAT: place every class on its best free slot, one at a time.
+
+    Lab sessions go first, then lectures, most constrained section / faculty first. Each class
+    takes the free slot (section, faculty member, first-period limit and a room all free) that
+    best spreads its course over the week and keeps the section's days compact. A section keeps
+    one room per teaching block, preferably its first room. When a class finds no slot, its
+    section and faculty move up the order and the timetable is built again, up to
+    `max_attempts` times or `time_limit_sec`. The timetable is valid but not optimized; use it
+    as is, as `hint_from` of solve() or as the `start` of solve_lns(). Without a timetable the
+    status is INFEASIBLE with stop_reason "unplaced" (nothing is proven).
+    """
+    metrics = SolveMetrics()
+    if compiled is None:
+        with metrics.stage("compile"):
+            compiled = compile_problem(problem)
+    if params is None:
+        params = SolverParams()
+    rng = random.Random(params.random_seed)
+    deadline = time.monotonic() + time_limit_sec
+    boost: Dict[str, float] = defaultdict(float)
+    grid: Optional[_Grid] = None
+    with metrics.stage("construct"):
+        for _attempt in range(max(max_attempts, 1)):
+            grid = _Grid(compiled, rng.getrandbits(32))
+            failed: Optional[EffectiveRequirement] = None
+            for req, kind in _order(compiled, boost, rng):
+                if not grid.place(req, kind, rng) and not grid.eject(req, kind, rng):
+                    failed = req
+                    break
+            if failed is None:
+                break
+            boost[failed.section_id] += 1.0
+            if failed.faculty_id:
+                boost[failed.faculty_id] += 1.0
+            grid = None
+            if time.monotonic() >= deadline:
+                break
+    if grid is None:
+        return SolveResult(
+            status="INFEASIBLE",
+            schedule_by_section={},
+            schedule_by_faculty={},
+            timeslots=compiled.timeslots,
+            stop_reason=STOP_UNPLACED,
+            metrics=metrics,
+        )
+
+    with metrics.stage("extract"):
+        timeslots = compiled.timeslots
+        room_ids = compiled.room_ids
+        schedule_by_section: Dict[str, Dict[int, Tuple[str, str, str, str]]] = defaultdict(dict)
+        schedule_by_faculty: Dict[str, Dict[int, Tuple[str, str, str, str]]] = defaultdict(dict)
+        for req, slots, room, kind in grid.classes.values():
+            f = req.faculty_id or ""
+            room_id = room_ids[room] if room >= 0 else ""
+            for i in slots:
+                t = timeslots[i].timeslot_id
+                schedule_by_section[req.section_id][t] = (req.course_id, f, room_id, kind)
+                if f:
+                    schedule_by_faculty[f][t] = (req.course_id, req.section_id, room_id, kind)
+        available_rooms, available_faculty = _availability_maps(compiled, schedule_by_section, schedule_by_faculty)
+    return SolveResult(
+        status="FEASIBLE",
+        schedule_by_section=dict(schedule_by_section),
+        schedule_by_faculty=dict(schedule_by_faculty),
+        timeslots=timeslots,
+        available_rooms=available_rooms,
+        available_faculty=available_faculty,
+        stop_reason=STOP_COMPLETE,
+        metrics=metrics,
+    )
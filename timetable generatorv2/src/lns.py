@@ -0,0 +1,428 @@
+from __future__ import annotations
+
+import random
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from ortools.sat.python import cp_model
+
+try:
+    from .compiled_problem import CompiledProblem, compile_problem
+    from .decomposition import sub_problem
+    from .greedy import solve_greedy
+    from .models import ProblemData
+    from .repair import ScheduleDelta, _forbid_background
+    from .solve_metrics import SolveMetrics
+    from .solver_params import SolverParams, reserve_workers
+    from .timetable_solver import (
+        GAP_MODELS,
+        STOP_PLATEAU,
+        STOP_TARGET,
+        STOP_TIME_LIMIT,
+        SolveResult,
+        _availability_maps,
+        _extract_result,
+        build_model,
+    )
+    from .validation import gaps_by_section
+    from .warm_start import HintEntry, add_solution_hints, hint_from_entries
+except ImportError:
+    from compiled_problem import CompiledProblem, compile_problem
+    from decomposition import sub_problem
+    from greedy import solve_greedy
+    from models import ProblemData
+    from repair import ScheduleDelta, _forbid_background
+    from solve_metrics import SolveMetrics
+    from solver_params import SolverParams, reserve_workers
+    from timetable_solver import (
+        GAP_MODELS,
+        STOP_PLATEAU,
+        STOP_TARGET,
+        STOP_TIME_LIMIT,
+        SolveResult,
+        _availability_maps,
+        _extract_result,
+        build_model,
+    )
+    from validation import gaps_by_section
+    from warm_start import HintEntry, add_solution_hints, hint_from_entries
+
+Schedule = Dict[str, Dict[int, Tuple[str, str, str, str]]]  # section_id -> timeslot_id -> (course_id, faculty_id, room_id, kind)
+
+# Neighbourhood size (sections) adapts to the sub-solves: it grows while they finish proven
+# optimal within their budget (model build included) and shrinks when they run out of time
+SIZE_GROWTH = 1.25
+SIZE_SHRINK = 0.8
+MIN_SIZE = 2
+
+
+@dataclass
+class Neighbourhood:
+    """Sections whose classes may move in one LNS step; with `timeslots`, only their classes inside those."""
+
+    sections: Set[str]
+    timeslots: Optional[Set[int]] = None
+
+
+@dataclass
+class LnsState:
+    """What a selector sees: the current timetable and the gap cost of each of its sections."""
+
+    compiled: CompiledProblem
+    schedule_by_section: Schedule
+    cost: Dict[str, int]
+
+    def costly_first(self, rng: random.Random, sections: Iterable[str]) -> List[str]:
+        # Sections with gaps in random order, then the others in random order
+        costly = [s for s in sections if self.cost.get(s, 0) > 0]
+        others = [s for s in sections if self.cost.get(s, 0) <= 0]
+        rng.shuffle(costly)
+        rng.shuffle(others)
+        return costly + others
+
+
+class NeighbourhoodSelector(ABC):
+    """Chooses the part of the timetable the next LNS step re-optimizes; subclasses implement select()."""
+
+    name = "selector"
+
+    @abstractmethod
+    def select(self, state: LnsState, rng: random.Random, size: int) -> Neighbourhood:
+        """The neighbourhood of about `size` sections the next step frees."""
+
+
+class RandomSections(NeighbourhoodSelector):
+    """`size` sections, those with gaps first; all their classes may move."""
+
+    name = "sections"
+
+    def select(self, state: LnsState, rng: random.Random, size: int) -> Neighbourhood:
+        return Neighbourhood(set(state.costly_first(rng, state.compiled.section_ids)[:size]))
+
+
+class FacultySections(NeighbourhoodSelector):
+    """The sections of one faculty member (teaching a section with gaps), then of their colleagues in those sections."""
+
+    name = "faculty"
+
+    def select(self, state: LnsState, rng: random.Random, size: int) -> Neighbourhood:
+        compiled = state.compiled
+        sections: Set[str] = set()
+        seen: Set[str] = set()
+        for start in state.costly_first(rng, compiled.section_ids):
+            queue = [req.faculty_id for req in compiled.requirements_by_section[start] if req.faculty_id]
+            while queue and len(sections) < size:
+                f = queue.pop(0)
+                if f in seen:
+                    continue
+                seen.add(f)
+                for req in compiled.requirements_by_faculty.get(f, []):
+                    if len(sections) < size and req.section_id not in sections:
+                        sections.add(req.section_id)
+                        queue.extend(r.faculty_id for r in compiled.requirements_by_section[req.section_id] if r.faculty_id)
+            if len(sections) >= size or queue:
+                break
+        return Neighbourhood(sections)
+
+
+class DaySections(NeighbourhoodSelector):
+    """`size` sections, those with gaps first, re-arranged within one day; their other days stay fixed."""
+
+    name = "day"
+
+    def select(self, state: LnsState, rng: random.Random, size: int) -> Neighbourhood:
+        compiled = state.compiled
+        day = rng.choice(sorted(compiled.blocks_by_day))
+        timeslots = {t for _block_id, tids in compiled.blocks_by_day[day] for t in tids}
+        return Neighbourhood(set(state.costly_first(rng, compiled.section_ids)[:size]), timeslots)
+
+
+class BlockSections(NeighbourhoodSelector):
+    """The sections holding a room in one teaching block (between breaks), re-arranged within its day.
+
+    Their rooms in that block are chosen again too, so this also moves room bookings around.
+    """
+
+    name = "block"
+
+    def select(self, state: LnsState, rng: random.Random, size: int) -> Neighbourhood:
+        compiled = state.compiled
+        day = rng.choice(sorted(compiled.blocks_by_day))
+        _block_id, block_tids = rng.choice(compiled.blocks_by_day[day])
+        in_block = [s for s, by_t in state.schedule_by_section.items() if any(t in by_t for t in block_tids)]
+        if not in_block:
+            in_block = list(compiled.section_ids)
+        timeslots = {t for _block_id, tids in compiled.blocks_by_day[day] for t in tids}
+        return Neighbourhood(set(state.costly_first(rng, in_block)[:size]), timeslots)
+
+
+DEFAULT_SELECTORS = (RandomSections(), FacultySections(), DaySections(), BlockSections())
+
+
+@dataclass
+class LnsProgress:
+    """One LNS step, reported to solve_lns' on_progress."""
+
+    iteration: int
+    selector: str
+    sections: int  # size of the neighbourhood
+    objective_value: int  # of the whole timetable after this step
+    improved: bool
+    wall_time: float  # seconds since solve_lns started
+
+
+def _pick_rooms(compiled: CompiledProblem, schedule: Schedule, sections: Set[str], rng: random.Random, extra: int, least_used: bool) -> List[str]:
+    # The rooms the sections hold now plus `extra` others that fit the smallest of them: random
+    # ones to diversify, or the least booked ones while the timetable is still being built
+    used = {room_id for s in sections for (_c, _f, room_id, _k) in schedule.get(s, {}).values() if room_id}
+    smallest = min(compiled.section_size[s] for s in sections)
+    others = [r.room_id for r in compiled.rooms if r.capacity >= smallest and r.room_id not in used]
+    if least_used:
+        booked: Dict[str, int] = defaultdict(int)
+        for by_t in schedule.values():
+            for _c, _f, room_id, _k in by_t.values():
+                booked[room_id] += 1
+        rng.shuffle(others)
+        others.sort(key=lambda r_id: booked[r_id])
+        return sorted(used) + others[:extra]
+    return sorted(used) + rng.sample(others, min(extra, len(others)))
+
+
+def _hint_entries(compiled: CompiledProblem, schedule: Schedule, sections: Iterable[str]) -> List[HintEntry]:
+    timeslot_by_id = compiled.timeslot_by_id
+    entries: List[HintEntry] = []
+    for s in sections:
+        for t, (c, _f, room_id, kind) in schedule.get(s, {}).items():
+            ts = timeslot_by_id[t]
+            entries.append((s, ts.day_name, ts.period_index, c, kind, room_id))
+    return entries
+
+
+def _sub_solve(
+    problem: ProblemData,
+    compiled: CompiledProblem,
+    schedule: Schedule,
+    neighbourhood: Neighbourhood,
+    rng: random.Random,
+    optimize_gaps: bool,
+    engine: str,
+    gap_model: str,
+    params: SolverParams,
+    num_workers: int,
+    time_limit_sec: float,
+    extra_rooms: int,
+    metrics: SolveMetrics,
+) -> SolveResult:
+    """Re-solve the neighbourhood's sections (block room model) around the fixed rest of `schedule`."""
+    sections = neighbourhood.sections
+    rooms = _pick_rooms(compiled, schedule, sections, rng, extra_rooms, least_used=not optimize_gaps) if compiled.have_rooms else None
+    with metrics.stage("build"):
+        sub_compiled = compile_problem(sub_problem(problem, sections, rooms))
+        tm = build_model(sub_compiled, optimize_gaps=optimize_gaps, room_model="block", engine=engine, gap_model=gap_model)
+        background = SolveResult(status="FEASIBLE", schedule_by_section=schedule, schedule_by_faculty={}, timeslots=compiled.timeslots)
+        _forbid_background(tm, background, set(compiled.section_ids) - sections, ScheduleDelta())
+    metrics.absorb(SolveMetrics(families=tm.families))
+    hint = hint_from_entries(sub_compiled, _hint_entries(compiled, schedule, sections))
+    add_solution_hints(tm, hint)
+    if neighbourhood.timeslots is not None:
+        free = neighbourhood.timeslots
+        for key, x in tm.X_lec.items():
+            if key[2] not in free:
+                tm.model.Add(x == int(key in hint.lectures))
+        for key, y in tm.Y_lab_start.items():
+            if key[2] not in free:
+                tm.model.Add(y == int(key in hint.lab_starts))
+    solver = params.new_solver(time_limit_sec, num_workers, log_observer=metrics.observe_log_line)
+    with metrics.stage("search"):
+        status = solver.Solve(tm.model)
+    metrics.add_search(solver, bool(tm.objective_terms))
+    return _extract_result(tm, solver, status)
+
+
+def _construct(
+    problem: ProblemData,
+    compiled: CompiledProblem,
+    rng: random.Random,
+    size: int,
+    deadline: float,
+    solve_step: Callable[..., SolveResult],
+) -> Optional[Schedule]:
+    """Place the sections chunk by chunk, each chunk against the ones placed before it.
+
+    Chunks follow the faculty (sections sharing teachers are placed together). A chunk that
+    finds no timetable is retried once with the placed sections of its faculty freed as well.
+    """
+    order: List[str] = []
+    for f in sorted(compiled.requirements_by_faculty):
+        for req in compiled.requirements_by_faculty[f]:
+            if req.section_id not in order:
+                order.append(req.section_id)
+    order.extend(s for s in compiled.section_ids if s not in order)
+
+    schedule: Schedule = {}
+    chunks = [set(order[i : i + size]) for i in range(0, len(order), size)]
+    for index, chunk in enumerate(chunks):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        # Every chunk left gets an equal share of the time, the retry the rest of this chunk's
+        share = remaining / (len(chunks) - index)
+        result = solve_step(schedule, Neighbourhood(chunk), time_limit_sec=share / 2, extra_rooms=2 * len(chunk))
+        if result.status == "INFEASIBLE":
+            teachers = {req.faculty_id for s in chunk for req in compiled.requirements_by_section[s] if req.faculty_id}
+            chunk = chunk | {req.section_id for f in teachers for req in compiled.requirements_by_faculty[f] if req.section_id in schedule}
+            result = solve_step(schedule, Neighbourhood(chunk), time_limit_sec=max(deadline - time.monotonic(), 0.1) / (len(chunks) - index), extra_rooms=4 * len(chunk))
+            if result.status == "INFEASIBLE":
+                return None
+        for s in chunk:
+            schedule[s] = result.schedule_by_section.get(s, {})
+    return schedule
+
+
+def solve_lns(
+    problem: ProblemData,
+    time_limit_sec: float = 60,
+    compiled: Optional[CompiledProblem] = None,
+    start: Optional[SolveResult] = None,
+    engine: str = "boolean",
+    gap_model: str = "triple",
+    params: Optional[SolverParams] = None,
+    selectors: Optional[Sequence[NeighbourhoodSelector]] = None,
+    sub_time_sec: float = 5.0,
+    initial_size: int = 6,
+    extra_rooms: int = 4,
+    on_progress: Optional[Callable[[LnsProgress], None]] = None,
+) -> SolveResult:
+    """Minimize gaps by Large Neighbourhood Search over short CP-SAT sub-solves.
+
+    Starts from `start` (any valid timetable, e.g. a solve() result) or, without one, from a
+    solve_greedy() timetable, or failing that builds one chunk by chunk with CP-SAT. Each step lets a `selectors` neighbourhood move (sections, a
+    faculty member's sections, a day or a teaching block of some sections) while everything
+    else stays fixed: only those sections are modelled (block room model, on their current
+    rooms plus `extra_rooms` others) against the faculty, rooms and P1 slots the rest uses,
+    for at most `sub_time_sec`. The result is kept when its gaps are no worse. Selectors that
+    improve the timetable are picked more often; the neighbourhood grows while steps are
+    solved to optimality and shrinks when they time out. `params` (seed, workers, stop
+    rules) apply as in solve(); `on_progress` sees every step.
+    """
+    if gap_model not in GAP_MODELS:
+        raise ValueError(f"Unknown gap_model {gap_model!r}; expected one of {GAP_MODELS}")
+    metrics = SolveMetrics()
+    if compiled is None:
+        with metrics.stage("compile"):
+            compiled = compile_problem(problem)
+    if params is None:
+        params = SolverParams()
+    if selectors is None:
+        selectors = DEFAULT_SELECTORS
+    rng = random.Random(params.random_seed)
+    started = time.monotonic()
+    deadline = started + time_limit_sec
+    rules = params.stop_rules
+    plateau_sec = rules.plateau_sec(time_limit_sec)
+    target = rules.target_objective if rules.target_objective is not None else 0
+    all_sections = len(compiled.section_ids)
+
+    with reserve_workers(params.requested_workers()) as num_workers:
+
+        def step(schedule: Schedule, neighbourhood: Neighbourhood, time_limit_sec: float, extra_rooms: int, optimize_gaps: bool = False) -> SolveResult:
+            return _sub_solve(
+                problem, compiled, schedule, neighbourhood, rng, optimize_gaps, engine, gap_model, params, num_workers, time_limit_sec, extra_rooms, metrics
+            )
+
+        with metrics.stage("start"):
+            if start is not None:
+                schedule: Optional[Schedule] = {s: dict(by_t) for s, by_t in start.schedule_by_section.items()}
+            else:
+                greedy = solve_greedy(problem, time_limit_sec=max(deadline - time.monotonic(), 0.0), compiled=compiled, params=params)
+                if greedy.status != "INFEASIBLE":
+                    schedule = greedy.schedule_by_section
+                else:
+                    schedule = _construct(problem, compiled, rng, initial_size, deadline, step)
+        if schedule is None:
+            return SolveResult(
+                status="INFEASIBLE",
+                schedule_by_section={},
+                schedule_by_faculty={},
+                timeslots=compiled.timeslots,
+                stop_reason=STOP_TIME_LIMIT,
+                metrics=metrics,
+            )
+
+        measure = 0 if gap_model == "span" else 1  # gaps_by_section: (idle, single)
+        cost = {s: gaps[measure] for s, gaps in gaps_by_section(compiled, schedule).items()}
+        objective = sum(cost.values())
+        weights = [1.0] * len(selectors)
+        size = min(initial_size, all_sections)
+        improved_at = time.monotonic()
+        stop_reason = STOP_TIME_LIMIT
+        iteration = 0
+        with metrics.stage("lns"):
+            while True:
+                now = time.monotonic()
+                if objective <= target:
+                    stop_reason = STOP_TARGET
+                    break
+                if now >= deadline:
+                    break
+                if plateau_sec is not None and now - improved_at >= plateau_sec:
+                    stop_reason = STOP_PLATEAU
+                    break
+                k = rng.choices(range(len(selectors)), weights=weights)[0]
+                neighbourhood = selectors[k].select(LnsState(compiled, schedule, cost), rng, size)
+                if not neighbourhood.sections:
+                    neighbourhood = RandomSections().select(LnsState(compiled, schedule, cost), rng, size)
+                before = sum(cost.get(s, 0) for s in neighbourhood.sections)
+                step_start = time.monotonic()
+                result = step(schedule, neighbourhood, min(sub_time_sec, deadline - now), extra_rooms, optimize_gaps=True)
+                iteration += 1
+                improved = False
+                if result.status in ("OPTIMAL", "FEASIBLE") and result.objective_value is not None and result.objective_value <= before:
+                    for s in neighbourhood.sections:
+                        schedule[s] = result.schedule_by_section.get(s, {})
+                    after = gaps_by_section(compiled, {s: schedule[s] for s in neighbourhood.sections})
+                    cost.update({s: gaps[measure] for s, gaps in after.items()})
+                    objective = sum(cost.values())
+                    improved = result.objective_value < before
+                metrics.lns_steps += 1
+                if improved:
+                    metrics.lns_improved += 1
+                    improved_at = time.monotonic()
+                weights[k] = max(0.1, 0.9 * weights[k] + (1.0 if improved else 0.0))
+                if result.status == "OPTIMAL" and time.monotonic() - step_start < sub_time_sec:
+                    size = min(int(size * SIZE_GROWTH) + 1, all_sections)
+                elif result.status != "OPTIMAL":
+                    size = max(int(size * SIZE_SHRINK), MIN_SIZE)
+                if on_progress is not None:
+                    on_progress(
+                        LnsProgress(
+                            iteration=iteration,
+                            selector=selectors[k].name,
+                            sections=len(neighbourhood.sections),
+                            objective_value=objective,
+                            improved=improved,
+                            wall_time=time.monotonic() - started,
+                        )
+                    )
+
+    schedule_by_faculty: Schedule = defaultdict(dict)
+    for s, by_t in schedule.items():
+        for t, (c, f, room_id, kind) in by_t.items():
+            if f:
+                schedule_by_faculty[f][t] = (c, s, room_id, kind)
+    available_rooms, available_faculty = _availability_maps(compiled, schedule, schedule_by_faculty)
+    return SolveResult(
+        # Gap counts cannot go below 0, so a gap-free timetable is optimal
+        status="OPTIMAL" if objective == 0 else "FEASIBLE",
+        schedule_by_section=schedule,
+        schedule_by_faculty=dict(schedule_by_faculty),
+        timeslots=compiled.timeslots,
+        objective_value=objective,
+        available_rooms=available_rooms,
+        available_faculty=available_faculty,
+        stop_reason=stop_reason,
+        metrics=metrics,
+    )
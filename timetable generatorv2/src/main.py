@@ -4,10 +4,26 @@ import argparse
 import os
 import sys
 
+from .compiled_problem import ROOM_DOMAINS, compile_problem
+from .decomposition import solve_decomposed
+from .explain import explain_infeasibility
 from .exporter import export_all
 from .feasibility import pre_solve_feasibility_check
+from .greedy import GREEDY_ENGINE, solve_greedy
+from .lns import LnsProgress, solve_lns
 from .loader import load_problem_from_directory
-from .timetable_solver import solve
+from .model_cache import default_model_cache
+from .portfolio import solve_portfolio
+from .result_cache import default_result_cache
+from .solver_params import SolverParams, StopRules
+from .timetable_solver import ENGINES, GAP_MODELS, ROOM_MODELS, SolveResult, solve
+from .warm_start import hint_from_output_dir
+
+
+def _print_metrics(result: SolveResult) -> None:
+    if result.metrics is not None:
+        for line in result.metrics.summary_lines():
+            print(line)
 
 
 def main() -> int:
@@ -16,10 +32,141 @@ def main() -> int:
     parser.add_argument("--output", required=True, help="Directory to write outputs")
     parser.add_argument("--time_limit_sec", type=int, default=60, help="Solver time limit in seconds")
     parser.add_argument("--optimize_gaps", action="store_true", help="Minimize gaps (slower)")
+    parser.add_argument(
+        "--gap_model",
+        choices=GAP_MODELS,
+        default="triple",
+        help="Gap objective: triple (single free periods, BoolVar per timeslot) or span (all idle periods, first/last integers per day)",
+    )
+    parser.add_argument(
+        "--room_model",
+        choices=ROOM_MODELS,
+        default="per_slot",
+        help="Room formulation: per_slot (room variable per class), block (room per section block only, smaller model) or two_phase (timetable first, then rooms per block)",
+    )
+    parser.add_argument(
+        "--room_domains",
+        choices=ROOM_DOMAINS,
+        default="capacity",
+        help="Rooms a class may use: capacity (every room that fits), typed (lectures in non-lab rooms, labs in lab rooms) or typed_fallback (typed, unless no room of the type fits the section)",
+    )
+    parser.add_argument(
+        "--room_slack",
+        type=float,
+        default=None,
+        help="Leave out rooms with more than (1 + slack) x the section's students, e.g. 0.25 (the smallest fitting rooms always stay)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES + (GREEDY_ENGINE,),
+        default="boolean",
+        help="Clash formulation: boolean (per-timeslot sums) or interval (optional intervals with AddNoOverlap); greedy builds a timetable without CP-SAT in about a second (no gap optimization)",
+    )
+    parser.add_argument(
+        "--greedy_hint",
+        action="store_true",
+        help="Warm-start the solver from a greedy timetable (see --engine greedy)",
+    )
+    parser.add_argument(
+        "--hint_from",
+        default=None,
+        help="Output directory of a previous run (its sections/*.csv) used to warm-start the solver",
+    )
+    parser.add_argument(
+        "--room_symmetry",
+        action="store_true",
+        help="Add room equivalence-class capacity cuts and symmetry breaking (helps prove infeasibility/optimality)",
+    )
+    parser.add_argument(
+        "--num_workers",
+        type=int,
+        default=None,
+        help="CP-SAT search workers (default: one per CPU this process may use)",
+    )
+    parser.add_argument("--seed", type=int, default=1, help="CP-SAT random seed")
+    parser.add_argument(
+        "--relative_gap",
+        type=float,
+        default=None,
+        help="Stop optimizing once the relative gap to the best bound is below this (e.g. 0.05)",
+    )
+    parser.add_argument("--solver_log", action="store_true", help="Print the CP-SAT search log")
+    parser.add_argument(
+        "--no_cache",
+        action="store_true",
+        help="Always build and solve, instead of reusing the stored result (TT_RESULT_CACHE_DIR) or built model (TT_MODEL_CACHE_DIR) of an earlier run",
+    )
+    parser.add_argument(
+        "--decompose",
+        action="store_true",
+        help="Solve the independent parts of the problem (no shared faculty or rooms) in parallel processes",
+    )
+    parser.add_argument(
+        "--split_rooms",
+        action="store_true",
+        help="With --decompose: give faculty-independent parts disjoint room pools so they can be solved apart",
+    )
+    parser.add_argument(
+        "--max_processes",
+        type=int,
+        default=None,
+        help="With --decompose: parts solved at once (default: one per CPU)",
+    )
+    parser.add_argument(
+        "--portfolio",
+        type=int,
+        default=0,
+        help="Race this many CP-SAT configurations (seeds, LP levels, branching) in parallel processes and keep the winner (0: off)",
+    )
+    parser.add_argument(
+        "--lns",
+        action="store_true",
+        help="Minimize gaps by Large Neighbourhood Search: short sub-solves of a few sections each around the fixed rest (for instances too large to solve whole)",
+    )
+    parser.add_argument(
+        "--lns_sub_time_sec",
+        type=float,
+        default=5.0,
+        help="With --lns: time limit of each sub-solve",
+    )
+    parser.add_argument(
+        "--stop_after_no_improvement_sec",
+        type=float,
+        default=None,
+        help="With --optimize_gaps: stop when the objective has not improved for this many seconds",
+    )
+    parser.add_argument(
+        "--stop_after_no_improvement_fraction",
+        type=float,
+        default=None,
+        help="With --optimize_gaps: stop when the objective has not improved for this share of the time limit (e.g. 0.1)",
+    )
+    parser.add_argument(
+        "--explain",
+        action="store_true",
+        help="When no timetable is found, search for a small set of requirements, sections, faculty and rooms that cannot all be satisfied",
+    )
+    parser.add_argument(
+        "--explain_time_limit_sec",
+        type=float,
+        default=120,
+        help="With --explain: time limit of the conflict search",
+    )
     args = parser.parse_args()
+    if args.portfolio > 1 and args.decompose:
+        parser.error("--portfolio and --decompose cannot be combined")
+    if args.lns and (args.decompose or args.portfolio > 1):
+        parser.error("--lns cannot be combined with --decompose or --portfolio")
+    if args.engine == GREEDY_ENGINE and (args.lns or args.decompose or args.portfolio > 1 or args.greedy_hint):
+        parser.error("--engine greedy cannot be combined with --lns, --decompose, --portfolio or --greedy_hint")
+    if args.greedy_hint and args.hint_from:
+        parser.error("--greedy_hint and --hint_from cannot be combined")
+    if (args.room_domains != "capacity" or args.room_slack is not None) and (args.engine == GREEDY_ENGINE or args.lns):
+        parser.error("--room_domains and --room_slack cannot be combined with --engine greedy or --lns")
 
     problem = load_problem_from_directory(args.inputs)
-    report = pre_solve_feasibility_check(problem)
+    compiled = compile_problem(problem)
+    report = pre_solve_feasibility_check(problem, compiled=compiled)
     if not report.ok():
         print("Feasibility errors detected:")
         for e in report.errors:
@@ -34,15 +181,89 @@ def main() -> int:
         for w in report.warnings:
             print(f" - {w}")
 
-    result = solve(problem, time_limit_sec=args.time_limit_sec, optimize_gaps=args.optimize_gaps)
+    hint = None
+    if args.hint_from:
+        hint = hint_from_output_dir(compiled, args.hint_from)
+        print(f"Warm start: {hint.num_classes} classes hinted from {args.hint_from}")
+        if hint.dropped:
+            print(f" - {len(hint.dropped)} previous entries no longer fit (first: {hint.dropped[0]})")
+    elif args.greedy_hint:
+        greedy = solve_greedy(problem, time_limit_sec=args.time_limit_sec, compiled=compiled, params=SolverParams(random_seed=args.seed))
+        if greedy.status == "INFEASIBLE":
+            print("Warm start: the greedy constructor found no timetable, solving without a hint")
+        else:
+            hint = greedy
+            print(f"Warm start: greedy timetable built in {greedy.metrics.stage_sec['construct']:.2f}s")
+
+    options = dict(
+        time_limit_sec=args.time_limit_sec,
+        optimize_gaps=args.optimize_gaps,
+        compiled=compiled,
+        room_model=args.room_model,
+        room_symmetry=args.room_symmetry,
+        room_domains=args.room_domains,
+        room_slack=args.room_slack,
+        engine=args.engine,
+        hint_from=hint,
+        gap_model=args.gap_model,
+        cache=None if args.no_cache else default_result_cache(),
+        model_cache=None if args.no_cache else default_model_cache(),
+        params=SolverParams(
+            num_workers=args.num_workers,
+            random_seed=args.seed,
+            relative_gap_limit=args.relative_gap,
+            log_search_progress=args.solver_log,
+            stop_rules=StopRules(
+                no_improvement_sec=args.stop_after_no_improvement_sec,
+                no_improvement_fraction=args.stop_after_no_improvement_fraction,
+            ),
+        ),
+    )
+    if args.engine == GREEDY_ENGINE:
+        result = solve_greedy(problem, time_limit_sec=args.time_limit_sec, compiled=compiled, params=options["params"])
+    elif args.lns:
+
+        def report_step(progress: LnsProgress) -> None:
+            if progress.improved:
+                print(f"LNS step {progress.iteration} ({progress.selector}, {progress.sections} sections): objective {progress.objective_value} at {progress.wall_time:.1f}s")
+
+        result = solve_lns(
+            problem,
+            time_limit_sec=args.time_limit_sec,
+            compiled=compiled,
+            engine=args.engine,
+            gap_model=args.gap_model,
+            params=options["params"],
+            sub_time_sec=args.lns_sub_time_sec,
+            on_progress=report_step,
+        )
+    elif args.decompose:
+        result = solve_decomposed(problem, split_rooms=args.split_rooms, max_processes=args.max_processes, **options)
+    elif args.portfolio > 1:
+        result = solve_portfolio(problem, size=args.portfolio, **options)
+    else:
+        result = solve(problem, **options)
     if result.status == "INFEASIBLE":
         print("Solver could not find a feasible timetable.")
+        _print_metrics(result)
+        if args.explain:
+            explanation = explain_infeasibility(
+                problem,
+                time_limit_sec=args.explain_time_limit_sec,
+                compiled=compiled,
+                params=options["params"],
+                room_domains=args.room_domains,
+                room_slack=args.room_slack,
+            )
+            for line in explanation.summary_lines():
+                print(line)
         return 3
 
     export_all(result, args.output)
-    print(f"Solver status: {result.status}")
+    print(f"Solver status: {result.status} (stopped: {result.stop_reason})" + (" [result cache hit]" if result.cache_hit else ""))
     if result.objective_value is not None:
         print(f"Objective value: {result.objective_value}")
+    _print_metrics(result)
     print(f"Outputs written to: {args.output}")
     return 0
 
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import functools
+import hashlib
+import os
+from typing import Any, Optional
+
+try:
+    from .disk_cache import DiskCache, digest, normalized_problem
+    from .models import ProblemData
+except ImportError:
+    from disk_cache import DiskCache, digest, normalized_problem
+    from models import ProblemData
+
+# Where built models are kept and how much disk they may take (least recently used go first)
+MODEL_CACHE_DIR_ENV = "TT_MODEL_CACHE_DIR"
+MODEL_CACHE_MAX_MB_ENV = "TT_MODEL_CACHE_MAX_MB"
+DEFAULT_MODEL_CACHE_MAX_MB = 1024
+
+# Bump when the TimetableModel snapshot layout changes
+CACHE_FORMAT = 1
+
+# Sources that decide what build_model produces; editing any of them invalidates every entry
+_BUILDER_SOURCES = ("compiled_problem.py", "models.py", "timetable_solver.py")
+
+
+@functools.lru_cache(maxsize=None)
+def _builder_version() -> str:
+    h = hashlib.sha256()
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in _BUILDER_SOURCES:
+        with open(os.path.join(here, name), "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def model_cache_key(problem: ProblemData, **options: Any) -> str:
+    """Hash of the normalized problem, the build_model options and the model-building code.
+
+    Time limits, seeds, hints and the other solver settings are not part of the key: they
+    only change how the model is searched.
+    """
+    payload = {
+        "format": CACHE_FORMAT,
+        "builder": _builder_version(),
+        "problem": normalized_problem(problem),
+        "options": options,
+    }
+    return digest(payload)
+
+
+class ModelCache(DiskCache):
+    """TimetableModel snapshots (CpModelProto bytes plus variable index maps), keyed by model_cache_key."""
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MODEL_CACHE_MAX_MB * 1024 * 1024) -> None:
+        super().__init__(directory, max_bytes)
+
+
+_default_cache: Optional[ModelCache] = None
+
+
+def default_model_cache() -> ModelCache:
+    """The process-wide model cache used by the CLI, API and Streamlit app (see MODEL_CACHE_*_ENV)."""
+    global _default_cache
+    if _default_cache is None:
+        directory = os.environ.get(MODEL_CACHE_DIR_ENV) or os.path.join(os.path.expanduser("~"), ".cache", "timetable_generator", "models")
+        max_mb = float(os.environ.get(MODEL_CACHE_MAX_MB_ENV) or DEFAULT_MODEL_CACHE_MAX_MB)
+        _default_cache = ModelCache(directory, max_bytes=int(max_mb * 1024 * 1024))
+    return _default_cache
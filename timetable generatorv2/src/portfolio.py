@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import dataclasses
+import multiprocessing
+import queue
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+try:
+    from .compiled_problem import CompiledProblem, compile_problem
+    from .model_cache import ModelCache
+    from .models import ProblemData
+    from .result_cache import ResultCache
+    from .solve_metrics import PortfolioMember, SolveMetrics
+    from .solver_params import SolverParams, default_workers, reserve_workers
+    from .timetable_solver import STOP_INFEASIBLE, STOP_OPTIMAL, STOP_TARGET, STOP_TIME_LIMIT, SolveResult, solve
+    from .warm_start import WarmStartHint
+except ImportError:
+    from compiled_problem import CompiledProblem, compile_problem
+    from model_cache import ModelCache
+    from models import ProblemData
+    from result_cache import ResultCache
+    from solve_metrics import PortfolioMember, SolveMetrics
+    from solver_params import SolverParams, default_workers, reserve_workers
+    from timetable_solver import STOP_INFEASIBLE, STOP_OPTIMAL, STOP_TARGET, STOP_TIME_LIMIT, SolveResult, solve
+    from warm_start import WarmStartHint
+
+# How long after the time limit a configuration may still take to hand back its result
+# (extraction, two-phase room assignment) before it is cancelled
+PORTFOLIO_GRACE_SEC = 10.0
+
+
+@dataclass
+class PortfolioConfig:
+    """CP-SAT settings one member of the portfolio runs with, on top of the caller's SolverParams."""
+
+    name: str
+    seed_offset: int = 0  # added to SolverParams.random_seed
+    cp_sat: Dict[str, Any] = field(default_factory=dict)  # SatParameters fields, see SolverParams.cp_sat
+
+
+# In order: the first K are used for a portfolio of size K. Seeds alone already change run
+# times a lot on these models (large_1000: 6-30s+ to the gap optimum); the others vary the
+# LP relaxation and the branching of the fixed-search workers.
+DEFAULT_PORTFOLIO = (
+    PortfolioConfig("default", 0),
+    PortfolioConfig("seed", 1),
+    PortfolioConfig("no_lp", 2, {"linearization_level": 0}),
+    PortfolioConfig("full_lp", 3, {"linearization_level": 2}),
+    PortfolioConfig("quick_restart", 4, {"search_branching": "PORTFOLIO_WITH_QUICK_RESTART_SEARCH"}),
+    PortfolioConfig("pseudo_cost", 5, {"search_branching": "PSEUDO_COST_SEARCH"}),
+)
+
+
+def portfolio_configs(size: int) -> List[PortfolioConfig]:
+    """The first `size` DEFAULT_PORTFOLIO entries, padded with further seeds."""
+    configs = list(DEFAULT_PORTFOLIO[:size])
+    for offset in range(len(configs), size):
+        configs.append(PortfolioConfig(f"seed_{offset}", offset))
+    return configs
+
+
+def _run_member(index: int, problem: ProblemData, deadline: float, kwargs: Dict, results: multiprocessing.Queue) -> None:
+    # Runs in its own process; time.time() is shared across processes, time.monotonic() is not
+    try:
+        result = solve(problem, time_limit_sec=max(deadline - time.time(), 1.0), **kwargs)
+        results.put((index, result, None))
+    except Exception as e:  # pragma: no cover - reported as the member's status
+        results.put((index, None, f"{type(e).__name__}: {e}"))
+
+
+def _is_final(result: SolveResult, has_objective: bool) -> bool:
+    # A result no other configuration can beat: any timetable without an objective, else a proven optimum
+    if result.status == "INFEASIBLE":
+        return result.stop_reason == STOP_INFEASIBLE
+    return not has_objective or result.stop_reason in (STOP_OPTIMAL, STOP_TARGET)
+
+
+def solve_portfolio(
+    problem: ProblemData,
+    time_limit_sec: int = 60,
+    optimize_gaps: bool = False,
+    compiled: Optional[CompiledProblem] = None,
+    room_model: str = "per_slot",
+    room_symmetry: bool = False,
+    engine: str = "boolean",
+    hint_from: Union[SolveResult, str, WarmStartHint, None] = None,
+    params: Optional[SolverParams] = None,
+    gap_model: str = "triple",
+    cache: Optional[ResultCache] = None,
+    model_cache: Optional[ModelCache] = None,
+    room_domains: str = "capacity",
+    room_slack: Optional[float] = None,
+    size: int = 4,
+    configs: Optional[Sequence[PortfolioConfig]] = None,
+) -> SolveResult:
+    """Race `size` solve() configurations (or `configs`) in separate processes.
+
+    The race reserves the default workers (or `params.num_workers` per member) from the
+    process-wide budget for its whole run, and each member gets an equal share of what was
+    granted as CP-SAT workers, with its own seed and SatParameters. The first timetable wins
+    when there is no objective, and the first proven optimum (or target objective) when there
+    is; otherwise the best objective at the time limit. The other members are then cancelled.
+    A proof of infeasibility from any member ends the race too. `result.metrics.portfolio`
+    records how every member ended and which one won.
+    """
+    if params is None:
+        params = SolverParams()
+    if configs is None:
+        configs = portfolio_configs(size)
+    if len(configs) <= 1:
+        config = configs[0] if configs else PortfolioConfig("default")
+        member_params = dataclasses.replace(params, random_seed=params.random_seed + config.seed_offset, cp_sat={**params.cp_sat, **config.cp_sat})
+        return solve(
+            problem,
+            time_limit_sec=time_limit_sec,
+            optimize_gaps=optimize_gaps,
+            compiled=compiled,
+            room_model=room_model,
+            room_symmetry=room_symmetry,
+            engine=engine,
+            hint_from=hint_from,
+            params=member_params,
+            gap_model=gap_model,
+            cache=cache,
+            model_cache=model_cache,
+            room_domains=room_domains,
+            room_slack=room_slack,
+        )
+
+    start = time.time()
+    deadline = start + time_limit_sec
+    requested = default_workers() if params.num_workers is None else params.num_workers * len(configs)
+    # The members' workers come from this process's budget for the whole race
+    with reserve_workers(requested) as granted:
+        num_workers = max(granted // len(configs), 1)
+        members: List[PortfolioMember] = []
+        # Spawned, not forked: callers (uvicorn, Streamlit) run threads a fork would copy mid-flight
+        context = multiprocessing.get_context("spawn")
+        results: multiprocessing.Queue = context.Queue()
+        processes = []
+        for index, config in enumerate(configs):
+            member_params = dataclasses.replace(
+                params,
+                num_workers=num_workers,
+                random_seed=params.random_seed + config.seed_offset,
+                cp_sat={**params.cp_sat, **config.cp_sat},
+                log_lines=None,
+                log_search_progress=False,
+            )
+            members.append(PortfolioMember(name=config.name, random_seed=member_params.random_seed, cp_sat=member_params.cp_sat))
+            kwargs = dict(
+                optimize_gaps=optimize_gaps,
+                room_model=room_model,
+                room_symmetry=room_symmetry,
+                engine=engine,
+                hint_from=hint_from,
+                params=member_params,
+                gap_model=gap_model,
+                cache=cache,
+                model_cache=model_cache,
+                room_domains=room_domains,
+                room_slack=room_slack,
+            )
+            process = context.Process(target=_run_member, args=(index, problem, deadline, kwargs, results), daemon=True)
+            process.start()
+            processes.append(process)
+
+        best: Optional[int] = None
+        best_result: Optional[SolveResult] = None
+        pending = set(range(len(configs)))
+        try:
+            while pending:
+                try:
+                    index, result, error = results.get(timeout=max(deadline + PORTFOLIO_GRACE_SEC - time.time(), 0.0))
+                except queue.Empty:
+                    break
+                pending.discard(index)
+                member = members[index]
+                member.wall_sec = time.time() - start
+                if result is None:
+                    member.status = f"error ({error})"
+                    continue
+                member.status = result.status
+                member.stop_reason = result.stop_reason
+                member.objective_value = result.objective_value
+                final = _is_final(result, optimize_gaps)
+                if result.status == "INFEASIBLE" and not final:
+                    continue
+                if final or best_result is None or (result.objective_value or 0) < (best_result.objective_value or 0):
+                    best, best_result = index, result
+                if final:
+                    break
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+            for process in processes:
+                process.join()
+
+    if best_result is None:
+        best_result = SolveResult(
+            status="INFEASIBLE",
+            schedule_by_section={},
+            schedule_by_faculty={},
+            timeslots=(compiled or compile_problem(problem)).timeslots,
+            stop_reason=STOP_TIME_LIMIT,
+        )
+    else:
+        members[best].winner = True
+    if best_result.metrics is None:
+        best_result.metrics = SolveMetrics()
+    best_result.metrics.stage_sec["portfolio"] = time.time() - start
+    best_result.metrics.portfolio = members
+    return best_result
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from ortools.sat.python import cp_model
+
+try:
+    from .compiled_problem import CompiledProblem, compile_problem
+    from .decomposition import sub_problem
+    from .models import FacultyCourseAssignment, ProblemData, SectionCourseRequirement
+    from .solver_params import SolverParams, reserve_workers
+    from .timetable_solver import MAX_P1_PER_FACULTY, SolveResult, TimetableModel, _availability_maps, _extract_result, build_model
+    from .warm_start import HintEntry, _hinted_block_rooms, add_solution_hints, hint_from_entries
+except ImportError:
+    from compiled_problem import CompiledProblem, compile_problem
+    from decomposition import sub_problem
+    from models import FacultyCourseAssignment, ProblemData, SectionCourseRequirement
+    from solver_params import SolverParams, reserve_workers
+    from timetable_solver import MAX_P1_PER_FACULTY, SolveResult, TimetableModel, _availability_maps, _extract_result, build_model
+    from warm_start import HintEntry, _hinted_block_rooms, add_solution_hints, hint_from_entries
+
+# Objective weights of the repair model: moving a class is worse than changing the room of a block
+MOVE_WEIGHT = 10
+ROOM_CHANGE_WEIGHT = 1
+
+
+@dataclass
+class ScheduleDelta:
+    """Changes to a solved timetable that force a repair."""
+
+    blocked_faculty_timeslots: Dict[str, List[int]] = field(default_factory=dict)  # faculty_id -> timeslot_ids they cannot teach
+    removed_rooms: List[str] = field(default_factory=list)
+    changed_requirements: List[SectionCourseRequirement] = field(default_factory=list)  # replace the (section, course) requirement
+    faculty_reassignments: List[FacultyCourseAssignment] = field(default_factory=list)  # new teacher of a (section, course)
+
+    def apply(self, problem: ProblemData) -> ProblemData:
+        removed = set(self.removed_rooms)
+        changed = {(r.section_id, r.course_id): r for r in self.changed_requirements}
+        reassigned = {(a.section_id, a.course_id): a for a in self.faculty_reassignments}
+        requirements = [r for r in problem.section_requirements if (r.section_id, r.course_id) not in changed]
+        faculty_courses = [a for a in problem.faculty_courses if (a.section_id, a.course_id) not in reassigned]
+        return problem.copy(
+            update={
+                "rooms": [r for r in problem.rooms if r.room_id not in removed] if problem.rooms else problem.rooms,
+                "section_requirements": requirements + list(changed.values()),
+                "faculty_courses": faculty_courses + list(reassigned.values()),
+            }
+        )
+
+
+@dataclass
+class RepairResult:
+    result: SolveResult  # the full repaired timetable
+    problem: ProblemData  # problem with the delta applied
+    resolved_sections: List[str]  # sections whose classes were allowed to move
+    moved_classes: int = 0
+    changed_rooms: int = 0
+
+
+def _touched_sections(problem: ProblemData, previous: SolveResult, delta: ScheduleDelta) -> Set[str]:
+    blocked = {(f, t) for f, tids in delta.blocked_faculty_timeslots.items() for t in tids}
+    removed = set(delta.removed_rooms)
+    touched = {r.section_id for r in delta.changed_requirements} | {a.section_id for a in delta.faculty_reassignments}
+    for s, by_t in previous.schedule_by_section.items():
+        for t, (_c, f, room_id, _kind) in by_t.items():
+            if (f, t) in blocked or room_id in removed:
+                touched.add(s)
+                break
+    # Sections that had nothing scheduled before (new sections) must be placed too
+    touched.update(s.section_id for s in problem.sections if s.section_id not in previous.schedule_by_section)
+    return touched
+
+
+def _with_faculty_neighbours(problem: ProblemData, sections: Set[str]) -> Set[str]:
+    faculty = {a.faculty_id for a in problem.faculty_courses if a.section_id in sections}
+    return sections | {a.section_id for a in problem.faculty_courses if a.faculty_id in faculty}
+
+
+def _with_room_neighbours(compiled: CompiledProblem, previous: SolveResult, sections: Set[str]) -> Set[str]:
+    # Sections that held a room the neighbourhood may use in a block the neighbourhood had classes
+    # in (any block when one of its sections had none, e.g. a new section)
+    rooms = {r_id for s in sections for r_id in compiled.candidate_rooms_by_section.get(s, [])}
+    blocks: Set[int] = set()
+    for s in sections:
+        if not previous.schedule_by_section.get(s):
+            blocks = set(compiled.timeslot_to_block.values())
+            break
+        blocks.update(compiled.timeslot_to_block[t] for t in previous.schedule_by_section[s])
+    neighbours = {
+        s
+        for s in compiled.section_ids
+        if any(room_id in rooms and compiled.timeslot_to_block[t] in blocks for t, (_c, _f, room_id, _kind) in previous.schedule_by_section.get(s, {}).items())
+    }
+    return sections | neighbours
+
+
+def _forbid_background(tm: TimetableModel, previous: SolveResult, fixed: Set[str], delta: ScheduleDelta) -> None:
+    # Classes of the fixed sections keep their faculty and rooms busy; blocked faculty slots are busy too
+    model = tm.model
+    compiled = tm.compiled
+    faculty_busy: Set[Tuple[str, int]] = {(f, t) for f, tids in delta.blocked_faculty_timeslots.items() for t in tids}
+    room_busy: Set[Tuple[str, int]] = set()
+    p1_used: Dict[str, int] = defaultdict(int)
+    P1 = set(compiled.P1_timeslots)
+    for s in fixed:
+        for t, (_c, f, room_id, _kind) in previous.schedule_by_section.get(s, {}).items():
+            if f:
+                faculty_busy.add((f, t))
+                if t in P1:
+                    p1_used[f] += 1
+            if room_id:
+                room_busy.add((room_id, t))
+
+    requirement_by_pair = compiled.requirement_by_pair
+    p1_terms: Dict[str, List[cp_model.IntVar]] = defaultdict(list)
+    for (s, c, t), x in tm.X_lec.items():
+        f = requirement_by_pair[(s, c)].faculty_id
+        if f and (f, t) in faculty_busy:
+            model.Add(x == 0)
+        if f and t in P1:
+            p1_terms[f].append(x)
+    for (s, c, start_t), y in tm.Y_lab_start.items():
+        req = requirement_by_pair[(s, c)]
+        if req.faculty_id and any((req.faculty_id, t) in faculty_busy for t in compiled.lab_covered_timeslots(req, start_t)):
+            model.Add(y == 0)
+        if req.faculty_id and start_t in P1:
+            p1_terms[req.faculty_id].append(y)
+    # A section holding room r for a block cannot have a class in it while r is taken
+    for s in compiled.section_ids:
+        candidates = compiled.candidate_rooms_by_section.get(s, [])
+        terms_by_t = tm.coverage_terms_by_timeslot(compiled.requirements_by_section[s])
+        for t, terms in terms_by_t.items():
+            block_id = compiled.timeslot_to_block[t]
+            for r_id in candidates:
+                if (r_id, t) in room_busy:
+                    model.Add(tm.SectionBlockRoom[(s, block_id, r_id)] + cp_model.LinearExpr.Sum(terms) <= 1)
+    for f, used in p1_used.items():
+        if p1_terms.get(f):
+            model.Add(cp_model.LinearExpr.Sum(p1_terms[f]) <= max(MAX_P1_PER_FACULTY - used, 0))
+
+
+def resolve_with_delta(
+    problem: ProblemData,
+    previous: SolveResult,
+    delta: ScheduleDelta,
+    time_limit_sec: float = 10.0,
+    params: Optional[SolverParams] = None,
+) -> RepairResult:
+    """Repair a solved timetable after `delta`, moving as little as possible.
+
+    Sections the delta does not touch keep their timetable exactly; only the touched sections
+    are re-modelled (block room model), against the faculty, rooms and P1 slots the fixed
+    sections already use. The objective counts moved classes and changed block rooms. If the
+    neighbourhood cannot be repaired, sections sharing a faculty member with it and sections
+    that held one of its rooms in one of its blocks are added; when that adds no section, every
+    section is re-solved (the blocked faculty periods stay free).
+    """
+    if params is None:
+        params = SolverParams()
+    changed = delta.apply(problem)
+    compiled = compile_problem(changed)
+    all_sections = set(changed.section_ids())
+    deadline = time.monotonic() + time_limit_sec
+    neighbourhood = _touched_sections(changed, previous, delta) & all_sections
+    timeslot_by_id = {t.timeslot_id: t for t in previous.timeslots}
+
+    while True:
+        fixed = all_sections - neighbourhood
+        sub_compiled = compile_problem(sub_problem(changed, neighbourhood))
+        tm = build_model(sub_compiled, room_model="block")
+        _forbid_background(tm, previous, fixed, delta)
+
+        entries: List[HintEntry] = []
+        for s in neighbourhood:
+            for t, (c, _f, room_id, kind) in previous.schedule_by_section.get(s, {}).items():
+                ts = timeslot_by_id[t]
+                entries.append((s, ts.day_name, ts.period_index, c, kind, room_id))
+        hint = hint_from_entries(sub_compiled, entries)
+        add_solution_hints(tm, hint)
+        kept = [tm.X_lec[k] for k in hint.lectures] + [tm.Y_lab_start[k] for k in hint.lab_starts]
+        _busy, block_room = _hinted_block_rooms(sub_compiled, hint)
+        kept_rooms = [tm.SectionBlockRoom[(s, b, r_id)] for (s, b), r_id in block_room.items() if (s, b, r_id) in tm.SectionBlockRoom]
+        moved = len(kept) - cp_model.LinearExpr.Sum(kept)
+        room_changes = len(kept_rooms) - cp_model.LinearExpr.Sum(kept_rooms)
+        tm.model.Minimize(MOVE_WEIGHT * moved + ROOM_CHANGE_WEIGHT * room_changes)
+
+        with reserve_workers(params.requested_workers()) as num_workers:
+            solver = params.new_solver(max(deadline - time.monotonic(), 0.1), num_workers)
+            status = solver.Solve(tm.model)
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            break
+        grown = _with_faculty_neighbours(changed, neighbourhood) | _with_room_neighbours(compiled, previous, neighbourhood)
+        if grown == neighbourhood:
+            grown = all_sections
+        if status != cp_model.INFEASIBLE or grown == neighbourhood or time.monotonic() >= deadline:
+            return RepairResult(
+                result=SolveResult(status="INFEASIBLE", schedule_by_section={}, schedule_by_faculty={}, timeslots=previous.timeslots),
+                problem=changed,
+                resolved_sections=sorted(neighbourhood),
+            )
+        neighbourhood = grown
+
+    sub_result = _extract_result(tm, solver, status)
+    schedule_by_section: Dict[str, Dict[int, Tuple[str, str, str, str]]] = {}
+    for s in changed.section_ids():
+        if s in neighbourhood:
+            schedule_by_section[s] = dict(sub_result.schedule_by_section.get(s, {}))
+        elif s in previous.schedule_by_section:
+            schedule_by_section[s] = dict(previous.schedule_by_section[s])
+    schedule_by_faculty: Dict[str, Dict[int, Tuple[str, str, str, str]]] = defaultdict(dict)
+    for s, by_t in schedule_by_section.items():
+        for t, (c, f, room_id, kind) in by_t.items():
+            if f:
+                schedule_by_faculty[f][t] = (c, s, room_id, kind)
+    available_rooms, available_faculty = _availability_maps(compiled, schedule_by_section, schedule_by_faculty)
+    result = SolveResult(
+        status=sub_result.status,
+        schedule_by_section=schedule_by_section,
+        schedule_by_faculty=schedule_by_faculty,
+        timeslots=compiled.timeslots,
+        objective_value=int(solver.ObjectiveValue()),
+        available_rooms=available_rooms,
+        available_faculty=available_faculty,
+    )
+    return RepairResult(
+        result=result,
+        problem=changed,
+        resolved_sections=sorted(neighbourhood),
+        moved_classes=sum(1 for v in kept if solver.Value(v) == 0),
+        changed_rooms=sum(1 for v in kept_rooms if solver.Value(v) == 0),
+    )
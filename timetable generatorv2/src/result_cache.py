@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import os
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional
+
+try:
+    from .disk_cache import CacheStats, DiskCache, digest, normalized_problem
+    from .models import ProblemData
+    from .solver_params import SolverParams
+    from .warm_start import WarmStartHint
+except ImportError:
+    from disk_cache import CacheStats, DiskCache, digest, normalized_problem
+    from models import ProblemData
+    from solver_params import SolverParams
+    from warm_start import WarmStartHint
+
+# Where solve results are kept and how much disk they may take (least recently used go first)
+RESULT_CACHE_DIR_ENV = "TT_RESULT_CACHE_DIR"
+RESULT_CACHE_MAX_MB_ENV = "TT_RESULT_CACHE_MAX_MB"
+DEFAULT_RESULT_CACHE_MAX_MB = 256
+
+# Bump when SolveResult or the key layout changes so stale entries are never read back
+CACHE_FORMAT = 1
+
+
+def _hint_key(hint: Optional[WarmStartHint]) -> Optional[Dict[str, List]]:
+    if hint is None:
+        return None
+    return {
+        "lectures": sorted(hint.lectures),
+        "lab_starts": sorted(hint.lab_starts),
+        "rooms": sorted((s, t, r) for (s, t), r in hint.rooms.items()),
+    }
+
+
+def solve_cache_key(problem: ProblemData, params: SolverParams, hint: Optional[WarmStartHint] = None, **options: Any) -> str:
+    """Hash of the normalized problem, the formulation / solver options and the warm-start hint.
+
+    Row order of the inputs does not matter; logging settings are not part of the key.
+    """
+    payload = {
+        "format": CACHE_FORMAT,
+        "problem": normalized_problem(problem),
+        "options": options,
+        "solver": {
+            "num_workers": params.requested_workers(),
+            "random_seed": params.random_seed,
+            "relative_gap_limit": params.relative_gap_limit,
+            "stop_rules": asdict(params.stop_rules),
+            "cp_sat": params.cp_sat,
+        },
+        "hint": _hint_key(hint),
+    }
+    return digest(payload)
+
+
+class ResultCache(DiskCache):
+    """SolveResults on local disk, keyed by solve_cache_key (see DiskCache for eviction)."""
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_RESULT_CACHE_MAX_MB * 1024 * 1024) -> None:
+        super().__init__(directory, max_bytes)
+
+
+_default_cache: Optional[ResultCache] = None
+
+
+def default_result_cache() -> ResultCache:
+    """The process-wide cache used by the CLI, API and Streamlit app (see RESULT_CACHE_*_ENV)."""
+    global _default_cache
+    if _default_cache is None:
+        directory = os.environ.get(RESULT_CACHE_DIR_ENV) or os.path.join(os.path.expanduser("~"), ".cache", "timetable_generator", "results")
+        max_mb = float(os.environ.get(RESULT_CACHE_MAX_MB_ENV) or DEFAULT_RESULT_CACHE_MAX_MB)
+        _default_cache = ResultCache(directory, max_bytes=int(max_mb * 1024 * 1024))
+    return _default_cache
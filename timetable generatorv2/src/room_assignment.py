@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from ortools.sat.python import cp_model
+
+try:
+    from .compiled_problem import CompiledProblem
+except ImportError:
+    from compiled_problem import CompiledProblem
+
+
+@dataclass
+class BlockRoomAssignment:
+    """Rooms chosen for a fixed timetable, one room per (section, block)."""
+
+    rooms: Dict[Tuple[str, int], str] = field(default_factory=dict)  # (section_id, block_id) -> room_id
+    conflicts: Dict[int, List[str]] = field(default_factory=dict)  # block_id -> sections that cannot all be roomed
+    timed_out: bool = False
+
+    @property
+    def complete(self) -> bool:
+        return not self.conflicts and not self.timed_out
+
+
+def _match_distinct_rooms(sections: List[str], candidates: Dict[str, List[str]]) -> Optional[Dict[str, str]]:
+    # Bipartite matching (augmenting paths): give every busy section its own room for the whole block
+    room_owner: Dict[str, str] = {}
+
+    def augment(s: str, seen: set) -> bool:
+        for r_id in candidates[s]:
+            if r_id in seen:
+                continue
+            seen.add(r_id)
+            if r_id not in room_owner or augment(room_owner[r_id], seen):
+                room_owner[r_id] = s
+                return True
+        return False
+
+    # Most constrained sections first keeps the augmenting paths short
+    for s in sorted(sections, key=lambda sec: len(candidates[sec])):
+        if not augment(s, set()):
+            return None
+    return {s: r_id for r_id, s in room_owner.items()}
+
+
+def _assign_shared_rooms(
+    sections: List[str],
+    candidates: Dict[str, List[str]],
+    occupied: Dict[str, List[int]],
+    time_limit_sec: float,
+) -> Tuple[Optional[Dict[str, str]], List[str], bool]:
+    """Rooms may be shared by sections that are never in class at the same timeslot of the block.
+
+    Returns (assignment, conflicting sections, timed_out). Each section is an assumption, so an
+    infeasible block reports the subset of sections that already cannot be roomed together.
+    """
+    model = cp_model.CpModel()
+    present = {s: model.NewBoolVar(f"present_s{s}") for s in sections}
+    assign: Dict[Tuple[str, str], cp_model.IntVar] = {}
+    for s in sections:
+        for r_id in candidates[s]:
+            assign[(s, r_id)] = model.NewBoolVar(f"blkroom_s{s}_r{r_id}")
+        model.Add(cp_model.LinearExpr.Sum([assign[(s, r_id)] for r_id in candidates[s]]) == 1).OnlyEnforceIf(present[s])
+    sections_at: Dict[Tuple[int, str], List[cp_model.IntVar]] = {}
+    for s in sections:
+        for t in occupied[s]:
+            for r_id in candidates[s]:
+                sections_at.setdefault((t, r_id), []).append(assign[(s, r_id)])
+    for terms in sections_at.values():
+        if len(terms) > 1:
+            model.AddAtMostOne(terms)
+    model.AddAssumptions([present[s] for s in sections])
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = max(time_limit_sec, 0.01)
+    solver.parameters.num_search_workers = 1
+    status = solver.Solve(model)
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        rooms = {s: r_id for (s, r_id), v in assign.items() if solver.Value(v) == 1}
+        return rooms, [], False
+    if status != cp_model.INFEASIBLE:
+        return None, [], True
+    core = set(solver.SufficientAssumptionsForInfeasibility())
+    conflicting = [s for s in sections if present[s].Index() in core] or list(sections)
+    return None, conflicting, False
+
+
+def assign_rooms_by_block(
+    compiled: CompiledProblem,
+    occupied: Dict[str, List[int]],
+    time_limit_sec: float = 10.0,
+    kinds: Optional[Dict[str, Dict[int, str]]] = None,
+) -> BlockRoomAssignment:
+    """Assign one room per (section, block) for a solved timetable.
+
+    `occupied` maps section_id -> timeslots where the section has a class, and `kinds` the
+    kind of each of those classes ("lecture" / "lab"): the block's room must suit every kind
+    in it (see CompiledProblem.block_room_candidates). Blocks are tried with a plain matching
+    first and fall back to a small CP-SAT model when busy sections have to share rooms.
+    """
+    result = BlockRoomAssignment()
+    for day_idx, blocks in compiled.blocks_by_day.items():
+        for block_id, block_tids in blocks:
+            tids = set(block_tids)
+            in_block: Dict[str, List[int]] = {}
+            candidates: Dict[str, List[str]] = {}
+            for s in compiled.section_ids:
+                if not compiled.candidate_rooms_by_section.get(s):
+                    continue
+                ts = [t for t in occupied.get(s, []) if t in tids]
+                if ts:
+                    in_block[s] = ts
+                    if kinds is None:
+                        candidates[s] = compiled.candidate_rooms_by_section[s]
+                    else:
+                        candidates[s] = compiled.block_room_candidates(s, (kinds[s][t] for t in ts))
+            if not in_block:
+                continue
+            sections = list(in_block)
+            rooms = _match_distinct_rooms(sections, candidates)
+            if rooms is None:
+                rooms, conflicting, timed_out = _assign_shared_rooms(sections, candidates, in_block, time_limit_sec)
+                if timed_out:
+                    result.timed_out = True
+                    return result
+                if rooms is None:
+                    result.conflicts[block_id] = conflicting
+                    continue
+            for s, r_id in rooms.items():
+                result.rooms[(s, block_id)] = r_id
+    return result
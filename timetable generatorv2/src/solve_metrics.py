@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import re
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from ortools.sat.python import cp_model
+
+# CP-SAT logs this line once presolve (and symmetry detection) is done and the search begins
+_SEARCH_START_RE = re.compile(r"^Starting search at ([0-9.]+)s")
+
+
+@dataclass
+class FamilySize:
+    """Variables and constraints one constraint family added to the model, and its Python build time."""
+
+    variables: int = 0
+    constraints: int = 0
+    build_sec: float = 0.0
+
+
+@dataclass
+class SearchStats:
+    """CP-SAT response statistics, summed over every solver pass of a solve."""
+
+    passes: int = 0
+    wall_sec: float = 0.0
+    presolve_sec: float = 0.0  # until "Starting search at", including symmetry detection
+    deterministic_time: float = 0.0
+    branches: int = 0
+    conflicts: int = 0
+    best_bound: Optional[float] = None  # of the last pass, only with an objective
+
+
+@dataclass
+class PortfolioMember:
+    """One configuration of a portfolio solve and how it ended ("cancelled": stopped once another won)."""
+
+    name: str
+    random_seed: int
+    cp_sat: Dict[str, Any] = field(default_factory=dict)
+    status: str = "cancelled"
+    stop_reason: Optional[str] = None
+    objective_value: Optional[int] = None
+    wall_sec: Optional[float] = None  # from the portfolio start until its result arrived
+    winner: bool = False
+
+
+@dataclass
+class RoomDomainStats:
+    """Room assignment variables (R_lec, R_lab_start, SectionBlockRoom) of a solve under its room
+    domain policy, and what every room that fits the sections would have taken."""
+
+    policy: str  # room_domains, with the slack if any (e.g. "typed, slack 0.25")
+    room_variables: int = 0
+    capacity_room_variables: int = 0
+
+
+@dataclass
+class SolveMetrics:
+    """Where the time of a solve() went and how large its model was.
+
+    `stage_sec` has compile (only when solve() compiled the problem), hint, cache / model_cache
+    (lookups and stores), build (skipped when the model came from the model cache), search,
+    room_assignment (two_phase) and extract: everything else after the model was built, i.e.
+    decoding solutions, availability maps and two-phase no-good cuts. A model loaded from the
+    cache keeps the `families` of its original build.
+
+    A decomposed solve (`parts` > 0) times decompose, solve_parts (wall clock of the process
+    pool) and merge instead; `families` and `search` are the sums over its parts. A portfolio
+    solve returns the metrics of the winning configuration, with every configuration in
+    `portfolio` and the wall clock of the whole race as the portfolio stage. An LNS solve
+    times start (the first timetable) and lns; `families` and `search` are the sums over its
+    `lns_steps` sub-models, `lns_improved` of which lowered the objective. `room_domains` is set
+    when the solve restricted the rooms of its classes (see CompiledProblem.with_room_domains).
+    """
+
+    stage_sec: Dict[str, float] = field(default_factory=dict)
+    families: Dict[str, FamilySize] = field(default_factory=dict)
+    search: SearchStats = field(default_factory=SearchStats)
+    parts: int = 0
+    portfolio: List[PortfolioMember] = field(default_factory=list)
+    lns_steps: int = 0
+    lns_improved: int = 0
+    room_domains: Optional[RoomDomainStats] = None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_sec[name] = self.stage_sec.get(name, 0.0) + time.perf_counter() - start
+
+    def observe_log_line(self, line: str) -> None:
+        match = _SEARCH_START_RE.match(line)
+        if match:
+            self.search.presolve_sec += float(match.group(1))
+
+    def add_search(self, solver: cp_model.CpSolver, has_objective: bool) -> None:
+        stats = self.search
+        stats.passes += 1
+        stats.wall_sec += solver.WallTime()
+        stats.deterministic_time += solver.ResponseProto().deterministic_time
+        stats.branches += solver.NumBranches()
+        stats.conflicts += solver.NumConflicts()
+        if has_objective:
+            stats.best_bound = solver.BestObjectiveBound()
+
+    def absorb(self, other: SolveMetrics) -> None:
+        """Add the model sizes and search statistics of an independently solved part."""
+        for name, size in other.families.items():
+            total = self.families.setdefault(name, FamilySize())
+            total.variables += size.variables
+            total.constraints += size.constraints
+            total.build_sec += size.build_sec
+        stats, part = self.search, other.search
+        stats.passes += part.passes
+        stats.wall_sec += part.wall_sec
+        stats.presolve_sec += part.presolve_sec
+        stats.deterministic_time += part.deterministic_time
+        stats.branches += part.branches
+        stats.conflicts += part.conflicts
+        if part.best_bound is not None:
+            stats.best_bound = (stats.best_bound or 0.0) + part.best_bound
+        if other.room_domains is not None:
+            if self.room_domains is None:
+                self.room_domains = RoomDomainStats(policy=other.room_domains.policy)
+            self.room_domains.room_variables += other.room_domains.room_variables
+            self.room_domains.capacity_room_variables += other.room_domains.capacity_room_variables
+
+    @property
+    def num_variables(self) -> int:
+        return sum(f.variables for f in self.families.values())
+
+    @property
+    def num_constraints(self) -> int:
+        return sum(f.constraints for f in self.families.values())
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data["num_variables"] = self.num_variables
+        data["num_constraints"] = self.num_constraints
+        return data
+
+    def summary_lines(self) -> List[str]:
+        lines = ["Stages: " + ", ".join(f"{name} {sec:.2f}s" for name, sec in self.stage_sec.items())]
+        if self.parts:
+            lines.append(f"Decomposed into {self.parts} independent parts (sizes and search summed)")
+        if self.lns_steps:
+            lines.append(f"LNS: {self.lns_steps} steps, {self.lns_improved} improving (sizes and search summed over sub-models)")
+        lines.append(f"Model: {self.num_variables} variables, {self.num_constraints} constraints")
+        domains = self.room_domains
+        if domains is not None and domains.capacity_room_variables:
+            saved = 1 - domains.room_variables / domains.capacity_room_variables
+            lines.append(
+                f"Room domains ({domains.policy}): {domains.room_variables} room variables "
+                f"instead of {domains.capacity_room_variables} ({saved:.0%} fewer)"
+            )
+        for name, size in self.families.items():
+            lines.append(f"  {name:<16} {size.variables:>8} vars {size.constraints:>8} constraints {size.build_sec:>7.2f}s")
+        s = self.search
+        bound = f", best bound {s.best_bound:g}" if s.best_bound is not None else ""
+        lines.append(
+            f"CP-SAT: {s.passes} pass(es), presolve {s.presolve_sec:.2f}s, wall {s.wall_sec:.2f}s, "
+            f"{s.branches} branches, {s.conflicts} conflicts{bound}"
+        )
+        for member in self.portfolio:
+            objective = f", objective {member.objective_value}" if member.objective_value is not None else ""
+            elapsed = f" after {member.wall_sec:.1f}s" if member.wall_sec is not None else ""
+            mark = " <- winner" if member.winner else ""
+            lines.append(f"  portfolio {member.name:<14} seed {member.random_seed:<3} {member.status}{objective}{elapsed}{mark}")
+        return lines
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from ortools.sat import sat_parameters_pb2
+from ortools.sat.python import cp_model
+
+# Environment variable capping the CP-SAT workers all solves of this process may use at once
+WORKER_BUDGET_ENV = "TT_SOLVER_WORKER_BUDGET"
+
+# Environment variable raising the default CP-SAT workers of a solve to at least this many
+WORKER_MINIMUM_ENV = "TT_SOLVER_MIN_WORKERS"
+
+# CP-SAT only runs its full subsolver portfolio (LNS, feasibility jump, ...) from about 6-8
+# workers; with fewer, these models often time out even on a single core. Defaults stay at one
+# worker per CPU unless TT_SOLVER_MIN_WORKERS asks for more
+MIN_PORTFOLIO_WORKERS = 8
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on (its affinity mask, not the host's core count)."""
+    try:
+        return max(len(os.sched_getaffinity(0)), 1)
+    except AttributeError:  # pragma: no cover - not available on macOS / Windows
+        return max(os.cpu_count() or 1, 1)
+
+
+def default_workers() -> int:
+    """CP-SAT workers of a solve without num_workers: one per available CPU, at least TT_SOLVER_MIN_WORKERS."""
+    return max(available_cpus(), int(os.environ.get(WORKER_MINIMUM_ENV) or 1))
+
+
+@dataclass
+class StopRules:
+    """Adaptive stopping for solves with an objective (optimize_gaps).
+
+    The search stops once the best objective has not improved for `no_improvement_sec`
+    seconds or `no_improvement_fraction` of the time limit (whichever is shorter), or as soon
+    as a timetable reaches `target_objective` (default: solve()'s lower bound of the objective).
+    """
+
+    no_improvement_sec: Optional[float] = None
+    no_improvement_fraction: Optional[float] = None
+    target_objective: Optional[int] = None
+
+    def plateau_sec(self, time_limit_sec: float) -> Optional[float]:
+        limits: List[float] = []
+        if self.no_improvement_sec is not None:
+            limits.append(self.no_improvement_sec)
+        if self.no_improvement_fraction is not None:
+            limits.append(self.no_improvement_fraction * time_limit_sec)
+        return min(limits) if limits else None
+
+
+@dataclass
+class SolverParams:
+    """CP-SAT settings shared by every solve entry point."""
+
+    num_workers: Optional[int] = None  # None: default_workers()
+    random_seed: int = 1
+    relative_gap_limit: Optional[float] = None  # stop optimizing once (best - bound) / best is below this
+    log_search_progress: bool = False
+    log_lines: Optional[List[str]] = None  # when set, the search log is captured here instead of printed
+    stop_rules: StopRules = field(default_factory=StopRules)
+    cp_sat: Dict[str, Any] = field(default_factory=dict)  # further SatParameters fields, e.g. {"linearization_level": 2}
+
+    def requested_workers(self) -> int:
+        if self.num_workers is not None:
+            return max(self.num_workers, 1)
+        return default_workers()
+
+    def new_solver(
+        self,
+        time_limit_sec: float,
+        num_workers: Optional[int] = None,
+        log_observer: Optional[Callable[[str], None]] = None,
+    ) -> cp_model.CpSolver:
+        """A CpSolver with these settings; `log_observer` sees every search log line even when logging is off."""
+        solver = cp_model.CpSolver()
+        params = solver.parameters
+        params.max_time_in_seconds = float(time_limit_sec)
+        params.num_workers = num_workers if num_workers is not None else self.requested_workers()
+        params.random_seed = self.random_seed
+        if self.relative_gap_limit is not None:
+            params.relative_gap_limit = self.relative_gap_limit
+        if self.cp_sat:
+            # Enum fields take their names, e.g. {"search_branching": "PSEUDO_COST_SEARCH"}
+            params.MergeFrom(sat_parameters_pb2.SatParameters(**self.cp_sat))
+        params.log_search_progress = self.log_search_progress or self.log_lines is not None or log_observer is not None
+        params.log_to_stdout = self.log_search_progress and self.log_lines is None
+        sinks: List[Callable[[str], None]] = []
+        if self.log_lines is not None:
+            sinks.append(self.log_lines.append)
+        if log_observer is not None:
+            sinks.append(log_observer)
+        if sinks:
+
+            def log(line: str) -> None:
+                for sink in sinks:
+                    sink(line)
+
+            solver.log_callback = log
+        return solver
+
+
+class WorkerBudget:
+    """Process-wide pool of CP-SAT workers.
+
+    Each solve reserves its workers for its whole run. When the pool is short a solve gets
+    what is left instead of oversubscribing the CPUs, but never less than `min_workers` (or
+    what it asked for if smaller); until that much is free it waits for a running solve to
+    finish. The default of 1 lets concurrent solves share the CPUs instead of queueing.
+    """
+
+    def __init__(self, total: int, min_workers: int = 1) -> None:
+        self.total = max(total, 1)
+        self.min_workers = max(min(min_workers, self.total), 1)
+        self._free = self.total
+        self._cond = threading.Condition()
+
+    def acquire(self, requested: int) -> int:
+        requested = max(requested, 1)
+        needed = min(requested, self.min_workers)
+        with self._cond:
+            while self._free < needed:
+                self._cond.wait()
+            granted = min(requested, self._free)
+            self._free -= granted
+            return granted
+
+    def release(self, granted: int) -> None:
+        with self._cond:
+            self._free += granted
+            self._cond.notify_all()
+
+    @contextmanager
+    def reserve(self, requested: int) -> Iterator[int]:
+        granted = self.acquire(requested)
+        try:
+            yield granted
+        finally:
+            self.release(granted)
+
+
+_budget = WorkerBudget(int(os.environ.get(WORKER_BUDGET_ENV) or default_workers()))
+
+
+def set_worker_budget(total: int) -> None:
+    """Resize the process-wide worker pool (call before starting concurrent solves)."""
+    global _budget
+    _budget = WorkerBudget(total)
+
+
+def reserve_workers(requested: int):
+    """Context manager yielding how many workers a solve may use right now."""
+    return _budget.reserve(requested)
@@ -1,17 +1,33 @@
 from __future__ import annotations
 
+import threading
+import time
 from collections import defaultdict
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
 
+import numpy as np
 from ortools.sat.python import cp_model
 
 try:
-    from .feasibility import compute_valid_lab_starts
+    from .compiled_problem import CompiledProblem, EffectiveRequirement, _identify_continuous_blocks, compile_problem
     from .models import ProblemData, Timeslot
+    from .model_cache import ModelCache, model_cache_key
+    from .result_cache import ResultCache, solve_cache_key
+    from .room_assignment import assign_rooms_by_block
+    from .solve_metrics import FamilySize, RoomDomainStats, SolveMetrics
+    from .solver_params import SolverParams, reserve_workers
+    from .warm_start import WarmStartHint, add_solution_hints, load_warm_start_hint
 except ImportError:
-    from feasibility import compute_valid_lab_starts
+    from compiled_problem import CompiledProblem, EffectiveRequirement, _identify_continuous_blocks, compile_problem
     from models import ProblemData, Timeslot
+    from model_cache import ModelCache, model_cache_key
+    from result_cache import ResultCache, solve_cache_key
+    from room_assignment import assign_rooms_by_block
+    from solve_metrics import FamilySize, RoomDomainStats, SolveMetrics
+    from solver_params import SolverParams, reserve_workers
+    from warm_start import WarmStartHint, add_solution_hints, load_warm_start_hint
 
 
 @dataclass
@@ -23,304 +39,815 @@ class SolveResult:
     objective_value: Optional[int] = None
     available_rooms: Dict[int, List[str]] = None  # timeslot_id -> list of available room_ids
     available_faculty: Dict[int, List[str]] = None  # timeslot_id -> list of available faculty_ids
+    stop_reason: Optional[str] = None  # one of the STOP_* values below
+    metrics: Optional[SolveMetrics] = None  # stage times, model size per constraint family, CP-SAT stats (set by solve())
+    cache_hit: bool = False  # returned from a ResultCache instead of solved
 
 
-def _identify_continuous_blocks(timeslots: List[Timeslot]) -> Dict[int, List[Tuple[int, List[int]]]]:
-    """Identify continuous blocks of non-break periods separated by breaks, per day.
-    Returns: day_index -> [(block_id, [timeslot_ids])]"""
-    blocks_by_day: Dict[int, List[Tuple[int, List[int]]]] = defaultdict(list)
-    by_day: Dict[int, List[Timeslot]] = defaultdict(list)
-    for t in timeslots:
-        by_day[t.day_index].append(t)
-    
-    block_counter = 0
-    for day_idx, day_slots in by_day.items():
-        day_slots = sorted(day_slots, key=lambda x: x.period_index)
-        current_block = []
-        for t in day_slots:
-            if t.is_break:
-                if current_block:
-                    blocks_by_day[day_idx].append((block_counter, current_block))
-                    block_counter += 1
-                    current_block = []
+# Room formulations:
+# - "per_slot": one room variable per scheduled lecture / lab start, tied to SectionBlockRoom for stickiness
+# - "block":    room choice lives only on SectionBlockRoom, linked to a per-block busy indicator
+# - "two_phase": no room variables; the timetable is solved against per-timeslot room capacity,
+#                then rooms are assigned block by block (see room_assignment.py)
+ROOM_MODELS = ("per_slot", "block", "two_phase")
+
+# Clash formulations:
+# - "boolean":  one linear "at most one" per (section | faculty | room, timeslot), summing every
+#               lecture variable and every lab start covering that timeslot
+# - "interval": each lecture / lab start is an optional fixed interval (length 1 / lab_block_size)
+#               and clashes are AddNoOverlap per section, faculty and room
+ENGINES = ("boolean", "interval")
+
+# Gap objective formulations (optimize_gaps):
+# - "triple": an Occ BoolVar per (section, timeslot) and a gap BoolVar per consecutive triple of
+#             periods; counts single free periods between two classes
+# - "span":   per (section, day) integer first / last occupied period; counts every idle period
+#             between them as (last - first + 1) - load, with no extra variables per timeslot
+GAP_MODELS = ("triple", "span")
+
+# First-period classes (lectures and lab starts in P1) per faculty member and week
+MAX_P1_PER_FACULTY = 3
+
+# Why a solve stopped (SolveResult.stop_reason)
+STOP_OPTIMAL = "optimal"
+STOP_INFEASIBLE = "infeasible"
+STOP_TIME_LIMIT = "time_limit"
+STOP_PLATEAU = "plateau"  # no improvement within StopRules' plateau window
+STOP_TARGET = "target_objective"  # objective reached the target / lower bound
+STOP_ACCEPTED = "accepted"  # a SolutionStream accepted the timetable
+STOP_COMPLETE = "complete"  # the greedy constructor (greedy.py) placed every class
+STOP_UNPLACED = "unplaced"  # the greedy constructor gave up on a class (proves nothing)
+
+
+# TimetableModel fields holding model variables / intervals, as stored in a model snapshot
+_VARIABLE_MAPS = ("X_lec", "Y_lab_start", "R_lec", "R_lab_start", "SectionBlockRoom", "SectionBlockBusy", "RoomUse")
+_INTERVAL_MAPS = ("I_lec", "I_lab")
+
+
+@dataclass
+class TimetableModel:
+    """A built CP-SAT model together with the variable maps needed to decode it."""
+
+    model: cp_model.CpModel
+    compiled: CompiledProblem
+    X_lec: Dict[Tuple[str, str, int], cp_model.IntVar] = field(default_factory=dict)  # (section_id, course_id, timeslot_id)
+    Y_lab_start: Dict[Tuple[str, str, int], cp_model.IntVar] = field(default_factory=dict)  # (section_id, course_id, start_timeslot_id)
+    R_lec: Dict[Tuple[str, str, int, str], cp_model.IntVar] = field(default_factory=dict)
+    R_lab_start: Dict[Tuple[str, str, int, str], cp_model.IntVar] = field(default_factory=dict)
+    SectionBlockRoom: Dict[Tuple[str, int, str], cp_model.IntVar] = field(default_factory=dict)  # (section_id, block_id, room_id)
+    SectionBlockBusy: Dict[Tuple[str, int], cp_model.IntVar] = field(default_factory=dict)  # (section_id, block_id), block room model only
+    RoomUse: Dict[Tuple[str, int, str], cp_model.IntVar] = field(default_factory=dict)  # (section_id, timeslot_id, room_id), block room model only
+    room_model: str = "per_slot"
+    engine: str = "boolean"
+    # Interval engine only: optional intervals keyed like X_lec / Y_lab_start, presence = that variable
+    I_lec: Dict[Tuple[str, str, int], cp_model.IntervalVar] = field(default_factory=dict)
+    I_lab: Dict[Tuple[str, str, int], cp_model.IntervalVar] = field(default_factory=dict)
+    gap_model: str = "triple"
+    objective_terms: List[cp_model.LinearExprT] = field(default_factory=list)
+    families: Dict[str, FamilySize] = field(default_factory=dict)  # what each constraint family added, see build_model
+    # (family, key) -> proto indices of the constraints of that group; set by build_model(guard_groups=True)
+    guards: Optional[Dict[Tuple[str, Tuple], List[int]]] = field(default=None, repr=False)
+    # Variable map name -> (keys, proto indices of their variables), built on first decode
+    _map_index: Dict[str, Tuple[List[Tuple], np.ndarray]] = field(default_factory=dict, repr=False)
+
+    def map_index(self, name: str) -> Tuple[List[Tuple], np.ndarray]:
+        """Keys of the variable map `name` and the proto indices of their variables, in map order."""
+        entry = self._map_index.get(name)
+        if entry is None:
+            variables = getattr(self, name)
+            entry = (list(variables), np.fromiter((v.Index() for v in variables.values()), dtype=np.int64, count=len(variables)))
+            self._map_index[name] = entry
+        return entry
+
+    def true_keys(self, name: str, values: np.ndarray) -> List[Tuple]:
+        """Keys of the variables of map `name` that are 1 in `values` (see solution_values), in map order."""
+        keys, index = self.map_index(name)
+        return [keys[i] for i in np.flatnonzero(values[index])]
+
+    def coverage_terms_by_timeslot(self, reqs: List[EffectiveRequirement], kind: Optional[str] = None) -> Dict[int, List[cp_model.IntVar]]:
+        """timeslot_id -> every lecture/lab-start variable of `reqs` that occupies that timeslot
+        (only the lectures or the labs with `kind`).
+
+        Built in a single pass over the variables of `reqs`, so callers can emit one
+        constraint per timeslot without rescanning the requirements for each slot.
+        """
+        terms_by_t: Dict[int, List[cp_model.IntVar]] = defaultdict(list)
+        compiled = self.compiled
+        for req in reqs:
+            s, c = req.section_id, req.course_id
+            if req.has_lectures and kind != "lab":
+                for t in compiled.T_non_break:
+                    terms_by_t[t].append(self.X_lec[(s, c, t)])
+            if req.has_labs and kind != "lecture":
+                for start_t in compiled.valid_starts_by_block_size[req.lab_block_size]:
+                    y = self.Y_lab_start[(s, c, start_t)]
+                    for tid in compiled.lab_covered_timeslots(req, start_t):
+                        terms_by_t[tid].append(y)
+        return terms_by_t
+
+    def hint_from_solver(self, solver: cp_model.CpSolver) -> None:
+        """Replace the model hints with the decision variables of the solver's last solution."""
+        values = solution_values(solver.ResponseProto())
+        self.model.ClearHints()
+        hint = self.model.Proto().solution_hint
+        for name in _VARIABLE_MAPS:
+            _keys, index = self.map_index(name)
+            hint.vars.extend(index.tolist())
+            hint.values.extend(values[index].tolist())
+
+    def snapshot(self) -> Dict:
+        """Serializable form of a freshly built model: the proto bytes plus proto indices of every map."""
+        maps = {name: {key: v.Index() for key, v in getattr(self, name).items()} for name in _VARIABLE_MAPS + _INTERVAL_MAPS}
+        return {
+            "proto": self.model.Proto().SerializeToString(),
+            "maps": maps,
+            "room_model": self.room_model,
+            "engine": self.engine,
+            "gap_model": self.gap_model,
+            "families": self.families,
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict, compiled: CompiledProblem) -> "TimetableModel":
+        model = cp_model.CpModel()
+        proto = model.Proto()
+        proto.ParseFromString(snapshot["proto"])
+        tm = cls(
+            model=model,
+            compiled=compiled,
+            room_model=snapshot["room_model"],
+            engine=snapshot["engine"],
+            gap_model=snapshot["gap_model"],
+            families=snapshot["families"],
+        )
+        maps = snapshot["maps"]
+        for name in _VARIABLE_MAPS:
+            setattr(tm, name, {key: model.GetIntVarFromProtoIndex(i) for key, i in maps[name].items()})
+        for name in _INTERVAL_MAPS:
+            setattr(tm, name, {key: model.GetIntervalVarFromProtoIndex(i) for key, i in maps[name].items()})
+        # The objective is already in the proto; rebuild objective_terms from it. Triple gap
+        # objectives are a plain sum of BoolVars (what objective_lower_bound reads), span
+        # objectives come back as a single expression.
+        if proto.HasField("objective"):
+            objective = proto.objective
+            terms = [model.GetIntVarFromProtoIndex(i) for i in objective.vars]
+            if all(c == 1 for c in objective.coeffs) and objective.offset == 0:
+                tm.objective_terms = terms
             else:
-                current_block.append(t.timeslot_id)
-        if current_block:
-            blocks_by_day[day_idx].append((block_counter, current_block))
-            block_counter += 1
-    return blocks_by_day
-
-
-def solve(problem: ProblemData, time_limit_sec: int = 60, optimize_gaps: bool = False) -> SolveResult:
-    model = cp_model.CpModel()
-
-    timeslots = problem.build_timeslots()
-    T = [t.timeslot_id for t in timeslots]
-    T_non_break = [t.timeslot_id for t in timeslots if not t.is_break]
-    timeslot_by_id = {t.timeslot_id: t for t in timeslots}
-    
-    # Identify continuous blocks for room stickiness
-    blocks_by_day = _identify_continuous_blocks(timeslots)
-    all_blocks = [(day, blk_id, tids) for day, blks in blocks_by_day.items() for blk_id, tids in blks]
-
-    section_ids = problem.section_ids()
-    faculty_ids = problem.faculty_ids()
-    course_ids = problem.course_ids()
-    course_by_id = problem.course_by_id()
-    req_map = problem.section_course_requirements_map()
-    fac_map = problem.faculty_assignment_map()
-
-    # Variables
-    X_lec: Dict[Tuple[str, str, int], cp_model.IntVar] = {}
-    Y_lab_start: Dict[Tuple[str, str, int], cp_model.IntVar] = {}
-
-    # Rooms
-    rooms = problem.rooms or []
-    have_rooms = len(rooms) > 0
-    candidate_rooms_by_section: Dict[str, List[str]] = {}
-    if have_rooms:
-        room_by_id = {r.room_id: r for r in rooms}
-        for s_obj in problem.sections:
-            s = s_obj.section_id
-            # All rooms with sufficient capacity (both lecture and lab rooms)
-            candidate_rooms_by_section[s] = [r.room_id for r in rooms if r.capacity >= s_obj.num_students]
-    R_lec: Dict[Tuple[str, str, int, str], cp_model.IntVar] = {}
-    R_lab_start: Dict[Tuple[str, str, int, str], cp_model.IntVar] = {}
-    
+                tm.objective_terms = [cp_model.LinearExpr.WeightedSum(terms, list(objective.coeffs)) + int(objective.offset)]
+        return tm
+
+    def intervals_for(self, reqs: List[EffectiveRequirement]) -> List[cp_model.IntervalVar]:
+        """Every lecture / lab interval of `reqs` (interval engine)."""
+        intervals: List[cp_model.IntervalVar] = []
+        for req in reqs:
+            s, c = req.section_id, req.course_id
+            if req.has_lectures:
+                intervals.extend(self.I_lec[(s, c, t)] for t in self.compiled.T_non_break)
+            if req.has_labs:
+                intervals.extend(self.I_lab[(s, c, start_t)] for start_t in self.compiled.valid_starts_by_block_size[req.lab_block_size])
+        return intervals
+
+
+@contextmanager
+def _family(tm: TimetableModel, name: str) -> Iterator[None]:
+    # Attribute the variables / constraints added inside the block (and its build time) to `name`
+    proto = tm.model.Proto()
+    variables, constraints = len(proto.variables), len(proto.constraints)
+    start = time.perf_counter()
+    yield
+    size = tm.families.setdefault(name, FamilySize())
+    size.variables += len(proto.variables) - variables
+    size.constraints += len(proto.constraints) - constraints
+    size.build_sec += time.perf_counter() - start
+
+
+@contextmanager
+def _guarded(tm: TimetableModel, family: str, key: Tuple) -> Iterator[None]:
+    # Record the constraints added inside the block as group (family, key) when the model keeps
+    # guard groups (see explain.py, which puts each group behind one literal)
+    if tm.guards is None:
+        yield
+        return
+    constraints = tm.model.Proto().constraints
+    start = len(constraints)
+    yield
+    tm.guards.setdefault((family, key), []).extend(range(start, len(constraints)))
+
+
+def _create_variables(tm: TimetableModel) -> None:
+    model = tm.model
+    compiled = tm.compiled
+    candidate_rooms_by_section = compiled.candidate_rooms_by_section
+
     # Block-level room assignment for stickiness (ONE room per section per block)
     # Section stays in same room for ALL classes (lectures and labs) within block
-    SectionBlockRoom: Dict[Tuple[str, int, str], cp_model.IntVar] = {}  # (section_id, block_id, room_id)
-    if have_rooms:
-        for s in section_ids:
-            for day_idx, blocks in blocks_by_day.items():
+    if compiled.have_rooms and tm.room_model != "two_phase":
+        for s in compiled.section_ids:
+            for day_idx, blocks in compiled.blocks_by_day.items():
                 for block_id, block_tids in blocks:
                     # Section can be assigned to ONE room per block (for both lectures and labs)
                     for room_id in candidate_rooms_by_section.get(s, []):
-                        SectionBlockRoom[(s, block_id, room_id)] = model.NewBoolVar(f"secblkroom_s{s}_b{block_id}_r{room_id}")
+                        tm.SectionBlockRoom[(s, block_id, room_id)] = model.NewBoolVar(f"secblkroom_s{s}_b{block_id}_r{room_id}")
                     # Exactly one room per section per block (if section has classes in that block)
                     if candidate_rooms_by_section.get(s):
-                        model.Add(sum(SectionBlockRoom[(s, block_id, rid)] for rid in candidate_rooms_by_section[s]) <= 1)
-
-    valid_starts_cache: Dict[int, List[int]] = {}
+                        model.Add(sum(tm.SectionBlockRoom[(s, block_id, rid)] for rid in candidate_rooms_by_section[s]) <= 1)
 
     # Create variables only where needed
-    for s in section_ids:
-        for c in course_ids:
-            defaults = course_by_id[c]
-            r = req_map.get((s, c))
-            weekly_lectures = defaults.lecture_periods_per_week if r is None else r.weekly_lectures
-            weekly_lab_sessions = (defaults.lab_sessions_per_week if defaults.is_lab else 0) if r is None else r.weekly_lab_sessions
-            lab_block_size = (defaults.lab_block_size if defaults.is_lab else 0) if r is None else (r.lab_block_size or (defaults.lab_block_size if defaults.is_lab else 0))
-
-            if weekly_lectures > 0:
-                for t in T_non_break:
-                    X_lec[(s, c, t)] = model.NewBoolVar(f"lec_s{s}_c{c}_t{t}")
-                    if have_rooms and candidate_rooms_by_section.get(s):
-                        for room_id in candidate_rooms_by_section[s]:
-                            R_lec[(s, c, t, room_id)] = model.NewBoolVar(f"rlec_s{s}_c{c}_t{t}_r{room_id}")
-
-            if weekly_lab_sessions > 0 and lab_block_size > 0:
-                if lab_block_size not in valid_starts_cache:
-                    starts_by_day = compute_valid_lab_starts(timeslots, lab_block_size)
-                    valid_starts_cache[lab_block_size] = [ts for v in starts_by_day.values() for ts in v]
-                for start_t in valid_starts_cache[lab_block_size]:
-                    Y_lab_start[(s, c, start_t)] = model.NewBoolVar(f"labstart_s{s}_c{c}_t{start_t}_b{lab_block_size}")
-                    if have_rooms and candidate_rooms_by_section.get(s):
-                        for room_id in candidate_rooms_by_section[s]:
-                            R_lab_start[(s, c, start_t, room_id)] = model.NewBoolVar(f"rlab_s{s}_c{c}_t{start_t}_b{lab_block_size}_r{room_id}")
-
-    # Requirements constraints
-    for s in section_ids:
-        for c in course_ids:
-            defaults = course_by_id[c]
-            r = req_map.get((s, c))
-            weekly_lectures = defaults.lecture_periods_per_week if r is None else r.weekly_lectures
-            weekly_lab_sessions = (defaults.lab_sessions_per_week if defaults.is_lab else 0) if r is None else r.weekly_lab_sessions
-            lab_block_size = (defaults.lab_block_size if defaults.is_lab else 0) if r is None else (r.lab_block_size or (defaults.lab_block_size if defaults.is_lab else 0))
-
-            if weekly_lectures > 0:
-                lec_vars = [X_lec[(s, c, t)] for t in T_non_break if (s, c, t) in X_lec]
-                model.Add(sum(lec_vars) == weekly_lectures)
-
-            if weekly_lab_sessions > 0 and lab_block_size > 0:
-                lab_vars = [Y_lab_start[(s, c, t)] for t in T if (s, c, t) in Y_lab_start]
-                model.Add(sum(lab_vars) == weekly_lab_sessions)
-
-    # Precompute coverage mapping for labs
-    day_period_to_tid: Dict[Tuple[int, int], int] = {(t.day_index, t.period_index): t.timeslot_id for t in timeslots}
-    cover_by_block_size: Dict[int, Dict[int, List[int]]] = {}
-    for block_size, start_list in valid_starts_cache.items():
-        cover_map: Dict[int, List[int]] = defaultdict(list)
-        for start_t in start_list:
-            start_ts = timeslot_by_id[start_t]
-            for k in range(block_size):
-                tid = day_period_to_tid[(start_ts.day_index, start_ts.period_index + k)]
-                cover_map[tid].append(start_t)
-        cover_by_block_size[block_size] = cover_map
+    per_slot_rooms = compiled.have_rooms and tm.room_model == "per_slot"
+    for req in compiled.requirements:
+        s, c = req.section_id, req.course_id
+        if req.has_lectures:
+            lecture_rooms = compiled.rooms_for_kind(s, "lecture") if per_slot_rooms else []
+            for t in compiled.T_non_break:
+                tm.X_lec[(s, c, t)] = model.NewBoolVar(f"lec_s{s}_c{c}_t{t}")
+                for room_id in lecture_rooms:
+                    tm.R_lec[(s, c, t, room_id)] = model.NewBoolVar(f"rlec_s{s}_c{c}_t{t}_r{room_id}")
+
+        if req.has_labs:
+            lab_block_size = req.lab_block_size
+            lab_rooms = compiled.rooms_for_kind(s, "lab") if per_slot_rooms else []
+            for start_t in compiled.valid_starts_by_block_size[lab_block_size]:
+                tm.Y_lab_start[(s, c, start_t)] = model.NewBoolVar(f"labstart_s{s}_c{c}_t{start_t}_b{lab_block_size}")
+                for room_id in lab_rooms:
+                    tm.R_lab_start[(s, c, start_t, room_id)] = model.NewBoolVar(f"rlab_s{s}_c{c}_t{start_t}_b{lab_block_size}_r{room_id}")
+
+
+def _create_intervals(tm: TimetableModel) -> None:
+    # Timeslot ids follow (day, period) order, so a lab starting at t covers ids t .. t + block - 1
+    # and the ids can be used directly as interval starts
+    model = tm.model
+    for (s, c, t), x in tm.X_lec.items():
+        tm.I_lec[(s, c, t)] = model.NewOptionalFixedSizeIntervalVar(t, 1, x, f"ilec_s{s}_c{c}_t{t}")
+    for (s, c, start_t), y in tm.Y_lab_start.items():
+        block = tm.compiled.requirement_by_pair[(s, c)].lab_block_size
+        tm.I_lab[(s, c, start_t)] = model.NewOptionalFixedSizeIntervalVar(start_t, block, y, f"ilab_s{s}_c{c}_t{start_t}")
 
+
+def _add_requirement_constraints(tm: TimetableModel) -> None:
+    compiled = tm.compiled
+    for req in compiled.requirements:
+        s, c = req.section_id, req.course_id
+        with _guarded(tm, "requirement", (s,)):
+            if req.has_lectures:
+                lec_vars = [tm.X_lec[(s, c, t)] for t in compiled.T_non_break]
+                tm.model.Add(sum(lec_vars) == req.weekly_lectures)
+
+            if req.has_labs:
+                lab_vars = [tm.Y_lab_start[(s, c, t)] for t in compiled.valid_starts_by_block_size[req.lab_block_size]]
+                tm.model.Add(sum(lab_vars) == req.weekly_lab_sessions)
+
+
+def _add_section_overlap_constraints(tm: TimetableModel) -> None:
     # No overlaps per section per timeslot
-    for s in section_ids:
-        for t in T_non_break:
-            lec_terms = [X_lec[(s, c, t)] for c in course_ids if (s, c, t) in X_lec]
-            lab_terms: List[cp_model.IntVar] = []
-            for c in course_ids:
-                defaults = course_by_id[c]
-                r = req_map.get((s, c))
-                weekly_lab_sessions = (defaults.lab_sessions_per_week if defaults.is_lab else 0) if r is None else r.weekly_lab_sessions
-                lab_block_size = (defaults.lab_block_size if defaults.is_lab else 0) if r is None else (r.lab_block_size or (defaults.lab_block_size if defaults.is_lab else 0))
-                if weekly_lab_sessions > 0 and lab_block_size > 0 and t in cover_by_block_size.get(lab_block_size, {}):
-                    for start_t in cover_by_block_size[lab_block_size][t]:
-                        var = Y_lab_start.get((s, c, start_t))
-                        if var is not None:
-                            lab_terms.append(var)
-            model.Add(sum(lec_terms + lab_terms) <= 1)
-
-    # Faculty clashes
-    for f in faculty_ids:
-        for t in T_non_break:
-            terms: List[cp_model.IntVar] = []
-            for (s, c_key), fac in fac_map.items():
-                if fac != f:
-                    continue
-                if (s, c_key, t) in X_lec:
-                    terms.append(X_lec[(s, c_key, t)])
-                defaults = course_by_id[c_key]
-                r = req_map.get((s, c_key))
-                weekly_lab_sessions = (defaults.lab_sessions_per_week if defaults.is_lab else 0) if r is None else r.weekly_lab_sessions
-                lab_block_size = (defaults.lab_block_size if defaults.is_lab else 0) if r is None else (r.lab_block_size or (defaults.lab_block_size if defaults.is_lab else 0))
-                if weekly_lab_sessions > 0 and lab_block_size > 0 and t in cover_by_block_size.get(lab_block_size, {}):
-                    for start_t in cover_by_block_size[lab_block_size][t]:
-                        var = Y_lab_start.get((s, c_key, start_t))
-                        if var is not None:
-                            terms.append(var)
-            if terms:
-                model.Add(sum(terms) <= 1)
+    compiled = tm.compiled
+    if tm.engine == "interval":
+        for s in compiled.section_ids:
+            intervals = tm.intervals_for(compiled.requirements_by_section[s])
+            if intervals:
+                tm.model.AddNoOverlap(intervals)
+        return
+    for s in compiled.section_ids:
+        terms_by_t = tm.coverage_terms_by_timeslot(compiled.requirements_by_section[s])
+        with _guarded(tm, "section_overlap", (s,)):
+            for t in compiled.T_non_break:
+                tm.model.Add(sum(terms_by_t.get(t, [])) <= 1)
+
+
+def _add_faculty_constraints(tm: TimetableModel) -> None:
+    with _family(tm, "faculty_clash"):
+        _add_faculty_clash_constraints(tm)
+    with _family(tm, "faculty_p1"):
+        _add_faculty_p1_constraints(tm)
+
+
+def _add_faculty_clash_constraints(tm: TimetableModel) -> None:
+    compiled = tm.compiled
+
+    # Faculty clashes: one constraint per (faculty, timeslot) built from the faculty's own assignments only
+    for f in compiled.faculty_ids:
+        reqs = compiled.requirements_by_faculty.get(f)
+        if not reqs:
+            continue
+        if tm.engine == "interval":
+            tm.model.AddNoOverlap(tm.intervals_for(reqs))
+            continue
+        terms_by_t = tm.coverage_terms_by_timeslot(reqs)
+        with _guarded(tm, "faculty_clash", (f,)):
+            for t in compiled.T_non_break:
+                terms = terms_by_t.get(t)
+                if terms:
+                    tm.model.Add(cp_model.LinearExpr.Sum(terms) <= 1)
+
+
+def _add_faculty_p1_constraints(tm: TimetableModel) -> None:
+    compiled = tm.compiled
 
     # Faculty P1 (first period) constraint: max 3 times per week per faculty
     # Identify all P1 timeslots (period_index == 1)
-    P1_timeslots = [t.timeslot_id for t in timeslots if t.period_index == 1 and not t.is_break]
-    for f in faculty_ids:
+    P1_timeslots = compiled.P1_timeslots
+    for f in compiled.faculty_ids:
         p1_terms: List[cp_model.IntVar] = []
-        for (s, c_key), fac in fac_map.items():
-            if fac != f:
-                continue
+        for req in compiled.requirements_by_faculty.get(f, []):
+            s, c_key = req.section_id, req.course_id
             # Check lectures in P1
-            for t in P1_timeslots:
-                if (s, c_key, t) in X_lec:
-                    p1_terms.append(X_lec[(s, c_key, t)])
+            if req.has_lectures:
+                p1_terms.extend(tm.X_lec[(s, c_key, t)] for t in P1_timeslots)
             # Check labs starting in P1
-            defaults = course_by_id[c_key]
-            r = req_map.get((s, c_key))
-            weekly_lab_sessions = (defaults.lab_sessions_per_week if defaults.is_lab else 0) if r is None else r.weekly_lab_sessions
-            lab_block_size = (defaults.lab_block_size if defaults.is_lab else 0) if r is None else (r.lab_block_size or (defaults.lab_block_size if defaults.is_lab else 0))
-            if weekly_lab_sessions > 0 and lab_block_size > 0:
+            if req.has_labs:
                 for start_t in P1_timeslots:
-                    if (s, c_key, start_t) in Y_lab_start:
-                        p1_terms.append(Y_lab_start[(s, c_key, start_t)])
+                    if (s, c_key, start_t) in tm.Y_lab_start:
+                        p1_terms.append(tm.Y_lab_start[(s, c_key, start_t)])
         if p1_terms:
-            model.Add(sum(p1_terms) <= 3)
+            with _guarded(tm, "faculty_p1", (f,)):
+                tm.model.Add(cp_model.LinearExpr.Sum(p1_terms) <= MAX_P1_PER_FACULTY)
+
+
+def _add_room_stickiness_constraints(tm: TimetableModel) -> None:
+    # Room linking with STICKINESS constraint
+    model = tm.model
+    compiled = tm.compiled
+    candidate_rooms_by_section = compiled.candidate_rooms_by_section
+    X_lec, Y_lab_start, R_lec, R_lab_start = tm.X_lec, tm.Y_lab_start, tm.R_lec, tm.R_lab_start
+    SectionBlockRoom = tm.SectionBlockRoom
+
+    # Link lecture room assignments to block-level room
+    timeslot_to_block = compiled.timeslot_to_block
+
+    for (s, c, t), x in X_lec.items():
+        if candidate_rooms_by_section.get(s):
+            candidates = compiled.rooms_for_kind(s, "lecture")
+            room_vars = [R_lec[(s, c, t, r_id)] for r_id in candidates]
+            model.Add(sum(room_vars) == x)
+            # STICKINESS: If lecture is scheduled, room must match unified block room
+            block_id = timeslot_to_block.get(t)
+            if block_id is not None:
+                for r_id in candidates:
+                    # If this lecture uses this room, the section-block must also use this room
+                    model.Add(R_lec[(s, c, t, r_id)] <= SectionBlockRoom[(s, block_id, r_id)])
+    for (s, c, start_t), y in Y_lab_start.items():
+        if candidate_rooms_by_section.get(s):
+            candidates = compiled.rooms_for_kind(s, "lab")
+            room_vars = [R_lab_start[(s, c, start_t, r_id)] for r_id in candidates]
+            model.Add(sum(room_vars) == y)
+            # STICKINESS: If lab is scheduled, room must match unified block room (same as lectures)
+            block_id = timeslot_to_block.get(start_t)
+            if block_id is not None:
+                for r_id in candidates:
+                    # If this lab uses this room, the section-block must also use this room
+                    model.Add(R_lab_start[(s, c, start_t, r_id)] <= SectionBlockRoom[(s, block_id, r_id)])
+
+
+def _add_room_occupancy_constraints(tm: TimetableModel) -> None:
+    # Occupancy: bucket every room variable by the (timeslot, room) pairs it occupies in one pass,
+    # then emit one at-most-one constraint per non-empty bucket
+    model = tm.model
+    compiled = tm.compiled
+    R_lec, R_lab_start = tm.R_lec, tm.R_lab_start
+    requirement_by_pair = compiled.requirement_by_pair
+    if tm.engine == "interval":
+        intervals_by_room: Dict[str, List[cp_model.IntervalVar]] = defaultdict(list)
+        for (s, c, t, r_id), v in R_lec.items():
+            intervals_by_room[r_id].append(model.NewOptionalFixedSizeIntervalVar(t, 1, v, f"irlec_s{s}_c{c}_t{t}_r{r_id}"))
+        for (s, c, start_t, r_id), v in R_lab_start.items():
+            block = requirement_by_pair[(s, c)].lab_block_size
+            intervals_by_room[r_id].append(model.NewOptionalFixedSizeIntervalVar(start_t, block, v, f"irlab_s{s}_c{c}_t{start_t}_r{r_id}"))
+        for r in compiled.rooms:
+            if len(intervals_by_room.get(r.room_id, [])) > 1:
+                model.AddNoOverlap(intervals_by_room[r.room_id])
+        return
+    occ_by_slot_room: Dict[Tuple[int, str], List[cp_model.IntVar]] = defaultdict(list)
+    for (s, c, t, r_id), v in R_lec.items():
+        occ_by_slot_room[(t, r_id)].append(v)
+    for (s, c, start_t, r_id), v in R_lab_start.items():
+        for tid in compiled.lab_covered_timeslots(requirement_by_pair[(s, c)], start_t):
+            occ_by_slot_room[(tid, r_id)].append(v)
+    for r in compiled.rooms:
+        for t in compiled.T_non_break:
+            occ_terms = occ_by_slot_room.get((t, r.room_id))
+            if occ_terms:
+                model.Add(cp_model.LinearExpr.Sum(occ_terms) <= 1)
+
+
+def _add_block_room_constraints(tm: TimetableModel) -> None:
+    # Block room model: a section that has any class in a block occupies exactly one room for that block,
+    # and a room can host at most one section at each timeslot of the block
+    model = tm.model
+    compiled = tm.compiled
+    candidate_rooms_by_section = compiled.candidate_rooms_by_section
+    SectionBlockRoom = tm.SectionBlockRoom
+
+    terms_by_section: Dict[str, Dict[int, List[cp_model.IntVar]]] = {}
+    for s in compiled.section_ids:
+        candidates = candidate_rooms_by_section.get(s, [])
+        if not candidates:
+            continue
+        terms_by_t = tm.coverage_terms_by_timeslot(compiled.requirements_by_section[s])
+        terms_by_section[s] = terms_by_t
+        with _guarded(tm, "stickiness", (s,)):
+            for day_idx, blocks in compiled.blocks_by_day.items():
+                for block_id, block_tids in blocks:
+                    block_terms = [v for t in block_tids for v in terms_by_t.get(t, [])]
+                    busy = model.NewBoolVar(f"secblkbusy_s{s}_b{block_id}")
+                    tm.SectionBlockBusy[(s, block_id)] = busy
+                    for t in block_tids:
+                        if terms_by_t.get(t):
+                            model.Add(cp_model.LinearExpr.Sum(terms_by_t[t]) <= busy)
+                    model.Add(cp_model.LinearExpr.Sum(block_terms) >= busy)
+                    model.Add(cp_model.LinearExpr.Sum([SectionBlockRoom[(s, block_id, r_id)] for r_id in candidates]) == busy)
+            _add_block_room_kind_constraints(tm, s)
+
+    # Occupancy: room r is used by section s at t iff s holds r for t's block and has a class at t.
+    # Only rooms shared by two or more sections can clash.
+    sections_by_room: Dict[str, List[str]] = defaultdict(list)
+    for s in terms_by_section:
+        for r_id in candidate_rooms_by_section[s]:
+            sections_by_room[r_id].append(s)
+    for r in compiled.rooms:
+        users = sections_by_room.get(r.room_id, [])
+        if len(users) < 2:
+            continue
+        with _guarded(tm, "rooms", (r.room_id,)):
+            for t in compiled.T_non_break:
+                block_id = compiled.timeslot_to_block[t]
+                active = [s for s in users if terms_by_section[s].get(t)]
+                if len(active) < 2:
+                    continue
+                use_terms: List[cp_model.IntVar] = []
+                for s in active:
+                    use = model.NewBoolVar(f"roomuse_s{s}_t{t}_r{r.room_id}")
+                    tm.RoomUse[(s, t, r.room_id)] = use
+                    model.Add(use >= SectionBlockRoom[(s, block_id, r.room_id)] + cp_model.LinearExpr.Sum(terms_by_section[s][t]) - 1)
+                    use_terms.append(use)
+                model.Add(cp_model.LinearExpr.Sum(use_terms) <= 1)
+
+
+def _add_block_room_kind_constraints(tm: TimetableModel, s: str) -> None:
+    # With typed room domains, a lecture (lab) in a block needs the block's room to be one its
+    # lectures (labs) may use; labs never cross a break, so a lab lies in its start's block
+    compiled = tm.compiled
+    candidates = compiled.candidate_rooms_by_section[s]
+    for kind, classes in (("lecture", tm.X_lec), ("lab", tm.Y_lab_start)):
+        allowed = compiled.rooms_for_kind(s, kind)
+        if len(allowed) == len(candidates):
+            continue
+        for req in compiled.requirements_by_section[s]:
+            if not (req.has_lectures if kind == "lecture" else req.has_labs):
+                continue
+            starts = compiled.T_non_break if kind == "lecture" else compiled.valid_starts_by_block_size[req.lab_block_size]
+            for t in starts:
+                block_id = compiled.timeslot_to_block[t]
+                held = [tm.SectionBlockRoom[(s, block_id, r_id)] for r_id in allowed]
+                tm.model.Add(classes[(s, req.course_id, t)] <= cp_model.LinearExpr.Sum(held))
 
-    # Room linking and occupancy with STICKINESS constraint
-    if have_rooms:
-        # Link lecture room assignments to block-level room
-        timeslot_to_block: Dict[int, int] = {}
-        for day_idx, blocks in blocks_by_day.items():
+
+def _add_room_capacity_cuts(tm: TimetableModel) -> None:
+    # Class-level capacity per timeslot: classes that can only sit in rooms of a set C can never
+    # occupy more than |C| rooms at once (one cut per distinct room set of a section's lectures
+    # or labs; with capacity room domains both are the section's candidate rooms)
+    model = tm.model
+    compiled = tm.compiled
+    terms_by_class: Dict[Tuple[str, str], Dict[int, List[cp_model.IntVar]]] = {}
+    rooms_by_class: Dict[Tuple[str, str], frozenset] = {}
+    for s in compiled.section_ids:
+        if not compiled.candidate_rooms_by_section.get(s):
+            continue
+        for kind in ("lecture", "lab"):
+            terms_by_t = tm.coverage_terms_by_timeslot(compiled.requirements_by_section[s], kind)
+            if terms_by_t:
+                terms_by_class[(s, kind)] = terms_by_t
+                rooms_by_class[(s, kind)] = frozenset(compiled.rooms_for_kind(s, kind))
+    for room_set in sorted(set(rooms_by_class.values()), key=lambda rs: (len(rs), sorted(rs))):
+        confined = [key for key in terms_by_class if rooms_by_class[key] <= room_set]
+        if len({s for s, _kind in confined}) <= len(room_set):
+            continue
+        for t in compiled.T_non_break:
+            terms = [v for key in confined for v in terms_by_class[key].get(t, [])]
+            if len(terms) > len(room_set):
+                model.Add(cp_model.LinearExpr.Sum(terms) <= len(room_set))
+
+
+def _add_room_kind_separation(tm: TimetableModel) -> None:
+    # Two-phase model: a section whose lectures and labs have no room in common cannot have both
+    # in one block, since all classes of a block share the section's room for it
+    model = tm.model
+    compiled = tm.compiled
+    for s in compiled.section_ids:
+        if not compiled.candidate_rooms_by_section.get(s) or compiled.block_room_candidates(s, ("lecture", "lab")):
+            continue
+        lectures = tm.coverage_terms_by_timeslot(compiled.requirements_by_section[s], "lecture")
+        labs = tm.coverage_terms_by_timeslot(compiled.requirements_by_section[s], "lab")
+        if not lectures or not labs:
+            continue
+        for day_idx, blocks in compiled.blocks_by_day.items():
+            for block_id, block_tids in blocks:
+                lecture_terms = [v for t in block_tids for v in lectures.get(t, [])]
+                lab_terms = list(dict.fromkeys(v for t in block_tids for v in labs.get(t, [])))
+                if not lecture_terms or not lab_terms:
+                    continue
+                has_lab = model.NewBoolVar(f"secblklab_s{s}_b{block_id}")
+                for y in lab_terms:
+                    model.AddImplication(y, has_lab)
+                for x in lecture_terms:
+                    model.AddImplication(x, has_lab.Not())
+
+
+def _add_room_symmetry_constraints(tm: TimetableModel) -> None:
+    # Rooms in the same equivalence class (lab flag + the sections and kinds of class they may
+    # host, see CompiledProblem.room_equivalence_classes) are interchangeable, so any
+    # timetable can be permuted block by block within a class without breaking a constraint.
+    model = tm.model
+    compiled = tm.compiled
+    candidate_rooms_by_section = compiled.candidate_rooms_by_section
+    room_classes = compiled.room_equivalence_classes()
+    _add_room_capacity_cuts(tm)
+
+    # Symmetry breaking: within each block, room k+1 of a class may only be used if room k is
+    users_by_room: Dict[str, List[str]] = defaultdict(list)
+    for s in compiled.section_ids:
+        for r_id in candidate_rooms_by_section.get(s, []):
+            users_by_room[r_id].append(s)
+    for room_class in room_classes:
+        if len(room_class) < 2 or not users_by_room.get(room_class[0]):
+            continue
+        for day_idx, blocks in compiled.blocks_by_day.items():
             for block_id, block_tids in blocks:
-                for tid in block_tids:
-                    timeslot_to_block[tid] = block_id
-        
-        for (s, c, t), x in X_lec.items():
-            candidates = candidate_rooms_by_section.get(s, [])
-            if candidates:
-                room_vars = [R_lec[(s, c, t, r_id)] for r_id in candidates]
-                model.Add(sum(room_vars) == x)
-                # STICKINESS: If lecture is scheduled, room must match unified block room
-                block_id = timeslot_to_block.get(t)
-                if block_id is not None:
-                    for r_id in candidates:
-                        # If this lecture uses this room, the section-block must also use this room
-                        model.Add(R_lec[(s, c, t, r_id)] <= SectionBlockRoom[(s, block_id, r_id)])
-        for (s, c, start_t), y in Y_lab_start.items():
-            candidates = candidate_rooms_by_section.get(s, [])
-            if candidates:
-                room_vars = [R_lab_start[(s, c, start_t, r_id)] for r_id in candidates]
-                model.Add(sum(room_vars) == y)
-                # STICKINESS: If lab is scheduled, room must match unified block room (same as lectures)
-                block_id = timeslot_to_block.get(start_t)
-                if block_id is not None:
-                    for r_id in candidates:
-                        # If this lab uses this room, the section-block must also use this room
-                        model.Add(R_lab_start[(s, c, start_t, r_id)] <= SectionBlockRoom[(s, block_id, r_id)])
-        for r in rooms:
-            r_id = r.room_id
-            for t in T_non_break:
-                occ_terms: List[cp_model.IntVar] = []
-                for (s, c, tt), _ in list(X_lec.items()):
-                    if tt != t:
-                        continue
-                    if (s, c, t, r_id) in R_lec:
-                        occ_terms.append(R_lec[(s, c, t, r_id)])
-                for (s, c, start_t), y in Y_lab_start.items():
-                    defaults = course_by_id[c]
-                    r_req = req_map.get((s, c))
-                    lab_block_size = (defaults.lab_block_size if defaults.is_lab else 0) if r_req is None else (r_req.lab_block_size or (defaults.lab_block_size if defaults.is_lab else 0))
-                    if lab_block_size and t in cover_by_block_size.get(lab_block_size, {}):
-                        if start_t in cover_by_block_size[lab_block_size][t]:
-                            if (s, c, start_t, r_id) in R_lab_start:
-                                occ_terms.append(R_lab_start[(s, c, start_t, r_id)])
-                if occ_terms:
-                    model.Add(sum(occ_terms) <= 1)
+                prev_used: Optional[cp_model.IntVar] = None
+                for r_id in room_class:
+                    holders = [tm.SectionBlockRoom[(sec, block_id, r_id)] for sec in users_by_room[r_id]]
+                    used = model.NewBoolVar(f"roomused_b{block_id}_r{r_id}")
+                    for h in holders:
+                        model.AddImplication(h, used)
+                    model.Add(cp_model.LinearExpr.Sum(holders) >= used)
+                    if prev_used is not None:
+                        model.AddImplication(used, prev_used)
+                    prev_used = used
+
+
+def _add_gap_objective(tm: TimetableModel) -> None:
+    model = tm.model
+    compiled = tm.compiled
+    timeslot_by_id = compiled.timeslot_by_id
+    Occ: Dict[Tuple[str, int], cp_model.IntVar] = {}
+    for s in compiled.section_ids:
+        terms_by_t = tm.coverage_terms_by_timeslot(compiled.requirements_by_section[s])
+        for t in compiled.T_non_break:
+            occ = model.NewBoolVar(f"occ_s{s}_t{t}")
+            Occ[(s, t)] = occ
+            terms = terms_by_t.get(t, [])
+            if terms:
+                for v in terms:
+                    model.Add(v <= occ)
+                model.Add(sum(terms) >= occ)
+            else:
+                model.Add(occ == 0)
+    times_by_day: Dict[int, List[int]] = defaultdict(list)
+    for t in compiled.timeslots:
+        if not t.is_break:
+            times_by_day[t.day_index].append(t.timeslot_id)
+    for day_idx, ordered in times_by_day.items():
+        ordered.sort(key=lambda tid: timeslot_by_id[tid].period_index)
+        for s in compiled.section_ids:
+            for i in range(1, len(ordered) - 1):
+                prev_t = ordered[i - 1]
+                mid_t = ordered[i]
+                next_t = ordered[i + 1]
+                # g must be 1 when mid is a hole between two occupied periods
+                g = model.NewBoolVar(f"gap_s{s}_d{day_idx}_i{i}")
+                model.Add(Occ[(s, prev_t)] + Occ[(s, next_t)] - Occ[(s, mid_t)] - 1 <= g)
+                tm.objective_terms.append(g)
+
+
+def _add_span_gap_objective(tm: TimetableModel) -> None:
+    # Per (section, day): first <= position of every occupied period <= last, so
+    # (last - first + 1) - load counts the idle periods in between. A section's periods never
+    # overlap, so the coverage sum of a timeslot is its 0/1 occupancy.
+    model = tm.model
+    compiled = tm.compiled
+    timeslot_by_id = compiled.timeslot_by_id
+    times_by_day: Dict[int, List[int]] = defaultdict(list)
+    for t in compiled.T_non_break:
+        times_by_day[timeslot_by_id[t].day_index].append(t)
+    for s in compiled.section_ids:
+        terms_by_t = tm.coverage_terms_by_timeslot(compiled.requirements_by_section[s])
+        for day_idx, ordered in times_by_day.items():
+            ordered = sorted(ordered, key=lambda tid: timeslot_by_id[tid].period_index)
+            occupancy = [(i, cp_model.LinearExpr.Sum(terms_by_t[t])) for i, t in enumerate(ordered) if terms_by_t.get(t)]
+            if len(occupancy) < 3:
+                continue  # a hole needs two occupied periods around it
+            n = len(ordered)
+            first = model.NewIntVar(0, n, f"first_s{s}_d{day_idx}")
+            last = model.NewIntVar(-1, n - 1, f"last_s{s}_d{day_idx}")
+            # An empty day may take first = last + 1 (zero span)
+            model.Add(last >= first - 1)
+            for i, occ in occupancy:
+                model.Add(first + n * occ <= i + n)
+                model.Add(last - n * occ >= i - n)
+            load = cp_model.LinearExpr.Sum([occ for _i, occ in occupancy])
+            tm.objective_terms.append(last - first + 1 - load)
+
+
+def objective_lower_bound(tm: TimetableModel) -> int:
+    """Cheap lower bound of the objective, computed before solving.
+
+    Every objective term counts idle periods and is never negative: triple terms are BoolVars
+    (counted when already fixed to 1), span terms are a span minus the periods inside it.
+    CP-SAT cannot see the latter from the variable domains, so without this bound it keeps
+    searching after a gap-free timetable until it proves optimality.
+    """
+    if tm.gap_model == "span":
+        return 0
+    proto = tm.model.Proto()
+    return sum(1 for v in tm.objective_terms if proto.variables[v.Index()].domain[0] >= 1)
+
+
+def build_model(
+    compiled: CompiledProblem,
+    optimize_gaps: bool = False,
+    room_model: str = "per_slot",
+    room_symmetry: bool = False,
+    engine: str = "boolean",
+    gap_model: str = "triple",
+    guard_groups: bool = False,
+    room_domains: str = "capacity",
+    room_slack: Optional[float] = None,
+) -> TimetableModel:
+    """Build the CP-SAT model of `compiled` in the given formulation.
 
+    `room_domains` and `room_slack` choose the rooms each class may use (see
+    CompiledProblem.with_room_domains); tm.compiled has the candidates the model was built on.
+    With `guard_groups`, tm.guards records which constraints each requirement, section, faculty
+    member and room added (block room model, boolean engine; see explain.py).
+    """
+    if room_model not in ROOM_MODELS:
+        raise ValueError(f"Unknown room_model {room_model!r}; expected one of {ROOM_MODELS}")
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}; expected one of {ENGINES}")
+    if gap_model not in GAP_MODELS:
+        raise ValueError(f"Unknown gap_model {gap_model!r}; expected one of {GAP_MODELS}")
+    compiled = compiled.with_room_domains(room_domains, room_slack)
+    tm = TimetableModel(model=cp_model.CpModel(), compiled=compiled, room_model=room_model, engine=engine, gap_model=gap_model)
+    if guard_groups:
+        tm.guards = {}
+    with _family(tm, "variables"):
+        _create_variables(tm)
+    if engine == "interval":
+        with _family(tm, "intervals"):
+            _create_intervals(tm)
+    with _family(tm, "requirements"):
+        _add_requirement_constraints(tm)
+    with _family(tm, "section_overlap"):
+        _add_section_overlap_constraints(tm)
+    _add_faculty_constraints(tm)
+    if compiled.have_rooms:
+        if room_model == "two_phase":
+            # Phase 1 only sees aggregate room capacity; symmetry breaking has no room variables to act on
+            with _family(tm, "rooms"):
+                _add_room_capacity_cuts(tm)
+                _add_room_kind_separation(tm)
+        else:
+            if room_model == "block":
+                with _family(tm, "rooms"):
+                    _add_block_room_constraints(tm)
+            else:
+                with _family(tm, "stickiness"):
+                    _add_room_stickiness_constraints(tm)
+                with _family(tm, "rooms"):
+                    _add_room_occupancy_constraints(tm)
+            if room_symmetry:
+                with _family(tm, "room_symmetry"):
+                    _add_room_symmetry_constraints(tm)
     # Optional objective minimize gaps
-    objective_terms: List[cp_model.IntVar] = []
     if optimize_gaps:
-        Occ: Dict[Tuple[str, int], cp_model.IntVar] = {}
-        for s in section_ids:
-            for t in T_non_break:
-                occ = model.NewBoolVar(f"occ_s{s}_t{t}")
-                Occ[(s, t)] = occ
-                terms: List[cp_model.IntVar] = [X_lec[(s, c, t)] for c in course_ids if (s, c, t) in X_lec]
-                for c in course_ids:
-                    defaults = course_by_id[c]
-                    r = req_map.get((s, c))
-                    weekly_lab_sessions = (defaults.lab_sessions_per_week if defaults.is_lab else 0) if r is None else r.weekly_lab_sessions
-                    lab_block_size = (defaults.lab_block_size if defaults.is_lab else 0) if r is None else (r.lab_block_size or (defaults.lab_block_size if defaults.is_lab else 0))
-                    if weekly_lab_sessions > 0 and lab_block_size > 0 and t in cover_by_block_size.get(lab_block_size, {}):
-                        for start_t in cover_by_block_size[lab_block_size][t]:
-                            var = Y_lab_start.get((s, c, start_t))
-                            if var is not None:
-                                terms.append(var)
-                if terms:
-                    for v in terms:
-                        model.Add(v <= occ)
-                    model.Add(sum(terms) >= occ)
-                else:
-                    model.Add(occ == 0)
-        times_by_day: Dict[int, List[int]] = defaultdict(list)
-        for t in timeslots:
-            if not t.is_break:
-                times_by_day[t.day_index].append(t.timeslot_id)
-        for day_idx, ordered in times_by_day.items():
-            ordered.sort(key=lambda tid: timeslot_by_id[tid].period_index)
-            for s in section_ids:
-                for i in range(1, len(ordered) - 1):
-                    prev_t = ordered[i - 1]
-                    mid_t = ordered[i]
-                    next_t = ordered[i + 1]
-                    g = model.NewBoolVar(f"gap_s{s}_d{day_idx}_i{i}")
-                    model.Add(Occ[(s, prev_t)] + Occ[(s, next_t)] - 1 <= g)
-                    model.Add(Occ[(s, mid_t)] == 0).OnlyEnforceIf(g)
-                    objective_terms.append(g)
-    if objective_terms:
-        model.Minimize(sum(objective_terms))
-
-    solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = float(time_limit_sec)
-    solver.parameters.num_search_workers = 8
-    solver.parameters.log_search_progress = False
-    solver.parameters.random_seed = 1
-
-    status = solver.Solve(model)
+        with _family(tm, "gaps"):
+            if gap_model == "span":
+                _add_span_gap_objective(tm)
+            else:
+                _add_gap_objective(tm)
+    if tm.objective_terms:
+        tm.model.Minimize(sum(tm.objective_terms))
+    return tm
+
+
+def room_variable_count(compiled: CompiledProblem, room_model: str = "per_slot") -> int:
+    """Room assignment variables (R_lec, R_lab_start, SectionBlockRoom) build_model creates for `compiled`."""
+    if not compiled.have_rooms or room_model == "two_phase":
+        return 0
+    num_blocks = sum(len(blocks) for blocks in compiled.blocks_by_day.values())
+    count = num_blocks * sum(len(compiled.candidate_rooms_by_section.get(s, [])) for s in compiled.section_ids)
+    if room_model == "per_slot":
+        for req in compiled.requirements:
+            if req.has_lectures:
+                count += len(compiled.T_non_break) * len(compiled.rooms_for_kind(req.section_id, "lecture"))
+            if req.has_labs:
+                count += len(compiled.valid_starts_by_block_size[req.lab_block_size]) * len(compiled.rooms_for_kind(req.section_id, "lab"))
+    return count
+
+
+def solution_values(response) -> np.ndarray:
+    """Every variable's value in the solution of a CpSolverResponse, indexed like the model proto.
+
+    One bulk copy instead of a solver.Value() call per variable (about 40x faster); works for
+    solver.ResponseProto() after a solve and a callback's Response() during one.
+    """
+    solution = response.solution
+    return np.fromiter(solution, dtype=np.int64, count=len(solution))
+
+
+def _availability_maps(
+    compiled: CompiledProblem,
+    schedule_by_section: Dict[str, Dict[int, Tuple[str, str, str, str]]],
+    schedule_by_faculty: Dict[str, Dict[int, Tuple[str, str, str, str]]],
+) -> Tuple[Dict[int, List[str]], Dict[int, List[str]]]:
+    # Occupancy bitmaps (room / faculty x timeslot) filled in one pass over the classes, then
+    # read per timeslot
+    tindex = {t: i for i, t in enumerate(compiled.T_non_break)}
+    available_rooms_map: Dict[int, List[str]] = {}
+    available_faculty_map: Dict[int, List[str]] = {}
+
+    if compiled.have_rooms:
+        room_index = compiled.room_index
+        room_busy = np.zeros((len(tindex), len(compiled.room_ids)), dtype=bool)
+        for by_t in schedule_by_section.values():
+            for t, (_c, _f, room_id, _k) in by_t.items():
+                if room_id and t in tindex:
+                    room_busy[tindex[t], room_index[room_id]] = True
+        room_ids = np.array(compiled.room_ids, dtype=object)
+        for t, i in tindex.items():
+            available_rooms_map[t] = room_ids[~room_busy[i]].tolist()
+
+    faculty_index = compiled.faculty_index
+    faculty_busy = np.zeros((len(tindex), len(compiled.faculty_ids)), dtype=bool)
+    for f, by_t in schedule_by_faculty.items():
+        if f not in faculty_index:
+            continue
+        for t in by_t:
+            if t in tindex:
+                faculty_busy[tindex[t], faculty_index[f]] = True
+    faculty_ids = np.array(compiled.faculty_ids, dtype=object)
+    for t, i in tindex.items():
+        available_faculty_map[t] = faculty_ids[~faculty_busy[i]].tolist()
+    return available_rooms_map, available_faculty_map
+
+
+def _decode_schedule(
+    tm: TimetableModel,
+    values: np.ndarray,
+    block_room: Optional[Dict[Tuple[str, int], str]] = None,
+) -> Tuple[Dict[str, Dict[int, Tuple[str, str, str, str]]], Dict[str, Dict[int, Tuple[str, str, str, str]]]]:
+    """Section and faculty schedules of a solution; `values` comes from solution_values.
+
+    Walks only the variables set to 1, in the order of the variable maps.
+    """
+    compiled = tm.compiled
+
+    schedule_by_section: Dict[str, Dict[int, Tuple[str, str, str, str]]] = defaultdict(dict)
+    schedule_by_faculty: Dict[str, Dict[int, Tuple[str, str, str, str]]] = defaultdict(dict)
+    requirement_by_pair = compiled.requirement_by_pair
+
+    # Block room model: every class in a block uses the section's block room
+    # (two_phase passes the rooms chosen after the timetable was solved)
+    if block_room is None and tm.room_model == "block":
+        block_room = {(s, block_id): rid for (s, block_id, rid) in tm.true_keys("SectionBlockRoom", values)}
+    # Per-slot rooms: the one room variable set for each scheduled lecture / lab start
+    lecture_room: Dict[Tuple[str, str, int], str] = {}
+    lab_room: Dict[Tuple[str, str, int], str] = {}
+    if block_room is None and compiled.have_rooms:
+        lecture_room = {(s, c, t): rid for (s, c, t, rid) in tm.true_keys("R_lec", values)}
+        lab_room = {(s, c, t): rid for (s, c, t, rid) in tm.true_keys("R_lab_start", values)}
+
+    for (s, c, t) in tm.true_keys("X_lec", values):
+        f = requirement_by_pair[(s, c)].faculty_id or ""
+        if block_room is not None:
+            room_id = block_room.get((s, compiled.timeslot_to_block[t]), "")
+        else:
+            room_id = lecture_room.get((s, c, t), "")
+        schedule_by_section[s][t] = (c, f, room_id, "lecture")
+        if f:
+            schedule_by_faculty[f][t] = (c, s, room_id, "lecture")
+
+    for (s, c, start_t) in tm.true_keys("Y_lab_start", values):
+        req = requirement_by_pair[(s, c)]
+        f = req.faculty_id or ""
+        if block_room is not None:
+            room_id = block_room.get((s, compiled.timeslot_to_block[start_t]), "")
+        else:
+            room_id = lab_room.get((s, c, start_t), "")
+        for tid in compiled.lab_covered_timeslots(req, start_t):
+            schedule_by_section[s][tid] = (c, f, room_id, "lab")
+            if f:
+                schedule_by_faculty[f][tid] = (c, s, room_id, "lab")
+    return schedule_by_section, schedule_by_faculty
+
+
+def _extract_result(
+    tm: TimetableModel,
+    solver: cp_model.CpSolver,
+    status: int,
+    block_room: Optional[Dict[Tuple[str, int], str]] = None,
+) -> SolveResult:
+    compiled = tm.compiled
+    timeslots = compiled.timeslots
 
     if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
         return SolveResult(
@@ -329,71 +856,18 @@ def solve(problem: ProblemData, time_limit_sec: int = 60, optimize_gaps: bool =
             schedule_by_faculty={},
             timeslots=timeslots,
             objective_value=None,
+            stop_reason=STOP_INFEASIBLE if status == cp_model.INFEASIBLE else STOP_TIME_LIMIT,
         )
 
-    schedule_by_section: Dict[str, Dict[int, Tuple[str, str, str, str]]] = defaultdict(dict)
-    schedule_by_faculty: Dict[str, Dict[int, Tuple[str, str, str, str]]] = defaultdict(dict)
-
-    for (s, c, t), var in X_lec.items():
-        if solver.Value(var) == 1:
-            f = fac_map.get((s, c), "")
-            room_id = ""
-            if have_rooms and candidate_rooms_by_section.get(s):
-                for rid in candidate_rooms_by_section[s]:
-                    v = R_lec.get((s, c, t, rid))
-                    if v is not None and solver.Value(v) == 1:
-                        room_id = rid
-                        break
-            schedule_by_section[s][t] = (c, f, room_id, "lecture")
-            if f:
-                schedule_by_faculty[f][t] = (c, s, room_id, "lecture")
-
-    day_period_to_tid = {(t.day_index, t.period_index): t.timeslot_id for t in timeslots}
-    for (s, c, start_t), var in Y_lab_start.items():
-        if solver.Value(var) == 1:
-            defaults = course_by_id[c]
-            r = req_map.get((s, c))
-            bsize = (defaults.lab_block_size if defaults.is_lab else 0) if r is None else (r.lab_block_size or (defaults.lab_block_size if defaults.is_lab else 0))
-            start_ts = timeslot_by_id[start_t]
-            f = fac_map.get((s, c), "")
-            room_id = ""
-            if have_rooms and candidate_rooms_by_section.get(s):
-                for rid in candidate_rooms_by_section[s]:
-                    v = R_lab_start.get((s, c, start_t, rid))
-                    if v is not None and solver.Value(v) == 1:
-                        room_id = rid
-                        break
-            for k in range(bsize):
-                tid = day_period_to_tid[(start_ts.day_index, start_ts.period_index + k)]
-                schedule_by_section[s][tid] = (c, f, room_id, "lab")
-                if f:
-                    schedule_by_faculty[f][tid] = (c, s, room_id, "lab")
+    schedule_by_section, schedule_by_faculty = _decode_schedule(tm, solution_values(solver.ResponseProto()), block_room)
 
     obj_val: Optional[int] = None
-    if objective_terms and status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+    if tm.objective_terms and status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
         obj_val = int(solver.ObjectiveValue())
 
     # Compute available rooms and faculty per timeslot
-    available_rooms_map: Dict[int, List[str]] = {}
-    available_faculty_map: Dict[int, List[str]] = {}
-    
-    if have_rooms:
-        for t in T_non_break:
-            occupied_rooms = set()
-            for s, by_t in schedule_by_section.items():
-                if t in by_t:
-                    _, _, room_id, _ = by_t[t]
-                    if room_id:
-                        occupied_rooms.add(room_id)
-            available_rooms_map[t] = [r.room_id for r in rooms if r.room_id not in occupied_rooms]
-    
-    for t in T_non_break:
-        occupied_faculty = set()
-        for f, by_t in schedule_by_faculty.items():
-            if t in by_t:
-                occupied_faculty.add(f)
-        available_faculty_map[t] = [f for f in faculty_ids if f not in occupied_faculty]
-    
+    available_rooms_map, available_faculty_map = _availability_maps(compiled, schedule_by_section, schedule_by_faculty)
+
     return SolveResult(
         status=("OPTIMAL" if status == cp_model.OPTIMAL else "FEASIBLE"),
         schedule_by_section=schedule_by_section,
@@ -402,6 +876,395 @@ def solve(problem: ProblemData, time_limit_sec: int = 60, optimize_gaps: bool =
         objective_value=obj_val,
         available_rooms=available_rooms_map,
         available_faculty=available_faculty_map,
+        stop_reason=STOP_OPTIMAL if status == cp_model.OPTIMAL else STOP_TIME_LIMIT,
+    )
+
+
+@dataclass
+class SolutionProgress:
+    """An improving solution, published while the search is still running."""
+
+    solution_index: int  # 1 for the first solution of the solve
+    wall_time: float  # seconds since the search started
+    objective_value: Optional[int]  # None when the model has no objective
+    best_bound: Optional[float]
+    added: Dict[str, Dict[int, Tuple[str, str, str, str]]]  # section_id -> timeslot_id -> class, new or changed since the previous solution
+    removed: Dict[str, List[int]]  # section_id -> timeslots that were taken in the previous solution and are free now
+
+
+class SolutionStream:
+    """Receives each improving solution of a running solve() and can end the search early.
+
+    `on_solution` runs on a solver thread; returning True accepts that timetable and stops
+    the search. `accept()` does the same from any other thread: the solve stops at once with
+    the best timetable found so far (or at the first one, if there is none yet). Two-phase
+    solutions carry no rooms, since rooms are only assigned after phase 1.
+    """
+
+    def __init__(self, on_solution: Callable[[SolutionProgress], Optional[bool]]) -> None:
+        self.on_solution = on_solution
+        self.accepted = False
+        self._lock = threading.Lock()
+        self._solver: Optional[cp_model.CpSolver] = None
+
+    def accept(self) -> None:
+        with self._lock:
+            self.accepted = True
+            if self._solver is not None:
+                self._solver.StopSearch()
+
+    def _attach(self, solver: Optional[cp_model.CpSolver]) -> None:
+        with self._lock:
+            self._solver = solver
+
+
+# How often the plateau watcher checks the time since the last improvement
+PLATEAU_POLL_SEC = 0.1
+
+
+class _SearchMonitor(cp_model.CpSolverSolutionCallback):
+    """Sees every solution of a solve(): publishes it to a SolutionStream and applies the stop rules.
+
+    The target rule is checked on each solution; the plateau rule runs on a watcher thread,
+    since a stalled search reports nothing. Each solver pass (two-phase / warm-start passes)
+    restarts the plateau clock.
+    """
+
+    def __init__(
+        self,
+        tm: TimetableModel,
+        solver: cp_model.CpSolver,
+        stream: Optional[SolutionStream] = None,
+        plateau_sec: Optional[float] = None,
+        target_objective: Optional[int] = None,
+        metrics: Optional[SolveMetrics] = None,
+    ) -> None:
+        super().__init__()
+        self.tm = tm
+        self.metrics = metrics if metrics is not None else SolveMetrics()
+        self.solver = solver
+        self.stream = stream
+        self.plateau_sec = plateau_sec
+        self.target_objective = target_objective
+        self.stop_reason: Optional[str] = None
+        self.start = time.monotonic()
+        self.solution_count = 0
+        self.previous: Dict[str, Dict[int, Tuple[str, str, str, str]]] = {}
+        self._improved_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "_SearchMonitor":
+        if self.stream is not None:
+            self.stream._attach(self.solver)
+        if self.plateau_sec is not None:
+            self._watcher = threading.Thread(target=self._watch_plateau, daemon=True)
+            self._watcher.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._done.set()
+        if self._watcher is not None:
+            self._watcher.join()
+        if self.stream is not None:
+            self.stream._attach(None)
+            if self.stream.accepted and self.stop_reason is None:
+                self.stop_reason = STOP_ACCEPTED
+
+    @property
+    def stopped(self) -> bool:
+        """True once a stop rule fired or the stream accepted: later passes should not run."""
+        return self.stop_reason is not None or (self.stream is not None and self.stream.accepted)
+
+    def search(self, model: cp_model.CpModel) -> int:
+        with self._lock:
+            self._improved_at = None
+        with self.metrics.stage("search"):
+            status = self.solver.Solve(model, self)
+        self.metrics.add_search(self.solver, bool(self.tm.objective_terms))
+        return status
+
+    def _stop(self, reason: str) -> None:
+        if self.stop_reason is None:
+            self.stop_reason = reason
+        self.solver.StopSearch()
+
+    def _watch_plateau(self) -> None:
+        while not self._done.wait(PLATEAU_POLL_SEC):
+            with self._lock:
+                stalled = self._improved_at is not None and time.monotonic() - self._improved_at >= self.plateau_sec
+            if stalled:
+                self._stop(STOP_PLATEAU)
+
+    def on_solution_callback(self) -> None:
+        with self._lock:
+            self._improved_at = time.monotonic()
+        self.solution_count += 1
+        has_objective = bool(self.tm.objective_terms)
+        objective = int(self.ObjectiveValue()) if has_objective else None
+        if self.stream is not None:
+            self._publish(objective)
+        if self.stream is not None and self.stream.accepted:
+            self._stop(STOP_ACCEPTED)
+        elif objective is not None and self.target_objective is not None and objective <= self.target_objective:
+            self._stop(STOP_TARGET)
+
+    def _publish(self, objective: Optional[int]) -> None:
+        schedule_by_section, _ = _decode_schedule(self.tm, solution_values(self.Response()))
+        added: Dict[str, Dict[int, Tuple[str, str, str, str]]] = {}
+        removed: Dict[str, List[int]] = {}
+        for s in set(schedule_by_section) | set(self.previous):
+            new, old = schedule_by_section.get(s, {}), self.previous.get(s, {})
+            changed = {t: v for t, v in new.items() if old.get(t) != v}
+            if changed:
+                added[s] = changed
+            gone = sorted(t for t in old if t not in new)
+            if gone:
+                removed[s] = gone
+        self.previous = schedule_by_section
+        progress = SolutionProgress(
+            solution_index=self.solution_count,
+            wall_time=time.monotonic() - self.start,
+            objective_value=objective,
+            best_bound=self.BestObjectiveBound() if objective is not None else None,
+            added=added,
+            removed=removed,
+        )
+        if self.stream.on_solution(progress) is True:
+            self.stream.accepted = True
+
+
+def _solve_two_phase(
+    tm: TimetableModel,
+    solver: cp_model.CpSolver,
+    time_limit_sec: float,
+    monitor: _SearchMonitor,
+) -> SolveResult:
+    """Solve the room-free timetable, then assign rooms per block.
+
+    When some block cannot be roomed, a no-good cut on the conflicting sections' classes in
+    that block is added to the phase 1 model, which is re-solved from the previous timetable
+    (as a hint) within the remaining time.
+    """
+    compiled = tm.compiled
+    model = tm.model
+    deadline = time.monotonic() + time_limit_sec
+    terms_by_section: Dict[Tuple[str, Optional[str]], Dict[int, List[cp_model.IntVar]]] = {}
+    while True:
+        solver.parameters.max_time_in_seconds = max(0.0, deadline - time.monotonic())
+        status = monitor.search(model)
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            return _extract_result(tm, solver, status)
+
+        schedule_by_section, _ = _decode_schedule(tm, solution_values(solver.ResponseProto()))
+        occupied: Dict[str, List[int]] = {}
+        kinds: Dict[str, Dict[int, str]] = {}
+        for s in compiled.section_ids:
+            busy = schedule_by_section.get(s, {})
+            occupied[s] = [t for t in compiled.T_non_break if t in busy]
+            kinds[s] = {t: busy[t][3] for t in occupied[s]}
+        with monitor.metrics.stage("room_assignment"):
+            assignment = assign_rooms_by_block(compiled, occupied, time_limit_sec=max(0.0, deadline - time.monotonic()), kinds=kinds)
+        if assignment.complete:
+            return _extract_result(tm, solver, status, block_room=assignment.rooms)
+        if assignment.timed_out or time.monotonic() >= deadline:
+            return _extract_result(tm, solver, cp_model.UNKNOWN)
+
+        # The conflicting sections cannot all keep their classes in this block at once
+        with _family(tm, "two_phase_cuts"):
+            for block_id, sections in assignment.conflicts.items():
+                pattern = [(s, t) for s in sections for t in occupied[s] if compiled.timeslot_to_block[t] == block_id]
+                _add_no_good_cut(tm, pattern, kinds, terms_by_section)
+        tm.hint_from_solver(solver)
+
+
+def _add_no_good_cut(
+    tm: TimetableModel,
+    pattern: List[Tuple[str, int]],
+    kinds: Dict[str, Dict[int, str]],
+    terms_by_section: Dict[Tuple[str, Optional[str]], Dict[int, List[cp_model.IntVar]]],
+) -> None:
+    # Forbid the (section, timeslot) classes of `pattern` from all coming back. Which rooms a
+    # block can have depends on its kinds of class when a section's lectures and labs have
+    # different rooms, so for that section the cut only counts classes of the kind it had at
+    # each timeslot: swapping lectures and labs on the same timeslots may be roomable.
+    # `terms_by_section` caches coverage terms by (section_id, kind or None for all kinds).
+    compiled = tm.compiled
+    terms = []
+    for s, t in pattern:
+        kind = kinds[s][t] if compiled.rooms_for_kind(s, "lecture") != compiled.rooms_for_kind(s, "lab") else None
+        if (s, kind) not in terms_by_section:
+            terms_by_section[(s, kind)] = tm.coverage_terms_by_timeslot(compiled.requirements_by_section[s], kind)
+        terms.extend(terms_by_section[(s, kind)][t])
+    tm.model.Add(cp_model.LinearExpr.Sum(terms) <= len(pattern) - 1)
+
+
+# Share of the time limit for the presolve-free pass that starts from a warm-start hint
+HINT_PASS_FRACTION = 0.25
+
+
+def _solve_from_hint(
+    tm: TimetableModel,
+    solver: cp_model.CpSolver,
+    time_limit_sec: float,
+    monitor: _SearchMonitor,
+) -> SolveResult:
+    """Warm-started solve.
+
+    Presolve and symmetry detection dominate the solve time on these models and a hint close
+    to feasible needs neither, so a first pass skips both and completes the hint. Without an
+    objective its first timetable is final; otherwise the regular solve continues from it.
+    """
+    params = solver.parameters
+    deadline = time.monotonic() + time_limit_sec
+    # The main pass keeps the caller's settings (e.g. SolverParams.cp_sat overrides)
+    presolve, symmetry_level = params.cp_model_presolve, params.symmetry_level
+    params.max_time_in_seconds = time_limit_sec * HINT_PASS_FRACTION
+    params.cp_model_presolve = False
+    params.symmetry_level = 0
+    status = monitor.search(tm.model)
+    params.cp_model_presolve = presolve
+    params.symmetry_level = symmetry_level
+    if status in (cp_model.OPTIMAL, cp_model.INFEASIBLE):
+        return _extract_result(tm, solver, status)
+    if status == cp_model.FEASIBLE and monitor.stopped:
+        return _extract_result(tm, solver, status)
+
+    best: Optional[SolveResult] = None
+    if status == cp_model.FEASIBLE:
+        best = _extract_result(tm, solver, status)
+        tm.hint_from_solver(solver)
+    remaining = deadline - time.monotonic()
+    if remaining > 0:
+        params.max_time_in_seconds = remaining
+        status = monitor.search(tm.model)
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            result = _extract_result(tm, solver, status)
+            if best is None or result.objective_value is None or result.objective_value <= best.objective_value:
+                return result
+    return best if best is not None else _extract_result(tm, solver, status)
+
+
+def solve(
+    problem: ProblemData,
+    time_limit_sec: int = 60,
+    optimize_gaps: bool = False,
+    compiled: Optional[CompiledProblem] = None,
+    room_model: str = "per_slot",
+    room_symmetry: bool = False,
+    engine: str = "boolean",
+    hint_from: Union[SolveResult, str, WarmStartHint, None] = None,
+    params: Optional[SolverParams] = None,
+    stream: Optional[SolutionStream] = None,
+    gap_model: str = "triple",
+    cache: Optional[ResultCache] = None,
+    model_cache: Optional[ModelCache] = None,
+    room_domains: str = "capacity",
+    room_slack: Optional[float] = None,
+) -> SolveResult:
+    """Build and solve the timetable model.
+
+    `hint_from` warm-starts the search from a previous timetable: a SolveResult, an exported
+    output directory (its sections/*.csv grids) or a prepared WarmStartHint. `params` sets the
+    CP-SAT workers, seed, gap limit and logging; workers are reserved from the process-wide
+    budget (see solver_params.py) for the duration of the solve. `stream` receives every
+    improving solution as it is found and can stop the search early. The result's `metrics`
+    break the solve down by stage, constraint family and CP-SAT search statistics. With a
+    `cache`, an identical earlier request (same problem, options, solver settings and hint)
+    is answered from disk; proven results and timetables found are stored for next time.
+    With a `model_cache`, the built model of the same problem and formulation is loaded from
+    disk instead of being rebuilt, whatever the time limit, solver settings or hint.
+    `room_domains` and `room_slack` restrict the rooms each class may use (see
+    CompiledProblem.with_room_domains); `metrics.room_domains` reports the room variables saved.
+    """
+    metrics = SolveMetrics()
+    if compiled is None:
+        with metrics.stage("compile"):
+            compiled = compile_problem(problem)
+    if (room_domains, room_slack) != ("capacity", None):
+        with metrics.stage("compile"):
+            full = compiled.with_room_domains()
+            compiled = compiled.with_room_domains(room_domains, room_slack)
+            metrics.room_domains = RoomDomainStats(
+                policy=room_domains if room_slack is None else f"{room_domains}, slack {room_slack:g}",
+                room_variables=room_variable_count(compiled, room_model),
+                capacity_room_variables=room_variable_count(full, room_model),
+            )
+    if params is None:
+        params = SolverParams()
+    hint: Optional[WarmStartHint] = None
+    if hint_from is not None:
+        with metrics.stage("hint"):
+            hint = load_warm_start_hint(compiled, hint_from)
+
+    build_options = dict(
+        optimize_gaps=optimize_gaps,
+        room_model=room_model,
+        room_symmetry=room_symmetry,
+        engine=engine,
+        gap_model=gap_model,
+        room_domains=room_domains,
+        room_slack=room_slack,
     )
+    cache_key: Optional[str] = None
+    if cache is not None:
+        with metrics.stage("cache"):
+            cache_key = solve_cache_key(problem, params, hint, time_limit_sec=time_limit_sec, **build_options)
+            cached = cache.get(cache_key)
+        if cached is not None:
+            cached.cache_hit = True
+            return cached
+
+    tm: Optional[TimetableModel] = None
+    model_key: Optional[str] = None
+    if model_cache is not None:
+        with metrics.stage("model_cache"):
+            model_key = model_cache_key(problem, **build_options)
+            snapshot = model_cache.get(model_key)
+            if snapshot is not None:
+                tm = TimetableModel.from_snapshot(snapshot, compiled)
+    if tm is None:
+        with metrics.stage("build"):
+            tm = build_model(compiled, **build_options)
+        if model_key is not None:
+            with metrics.stage("model_cache"):
+                model_cache.put(model_key, tm.snapshot())
+    metrics.families = tm.families
+    if hint is not None:
+        with metrics.stage("hint"):
+            add_solution_hints(tm, hint)
 
+    rules = params.stop_rules
+    target_objective = rules.target_objective
+    if target_objective is None and tm.objective_terms:
+        target_objective = objective_lower_bound(tm)
 
+    with reserve_workers(params.requested_workers()) as num_workers:
+        solver = params.new_solver(time_limit_sec, num_workers, log_observer=metrics.observe_log_line)
+        monitor = _SearchMonitor(
+            tm,
+            solver,
+            stream=stream,
+            plateau_sec=rules.plateau_sec(time_limit_sec) if tm.objective_terms else None,
+            target_objective=target_objective,
+            metrics=metrics,
+        )
+        solve_start = time.perf_counter()
+        with monitor:
+            if room_model == "two_phase" and compiled.have_rooms:
+                result = _solve_two_phase(tm, solver, float(time_limit_sec), monitor)
+            elif hint_from is not None:
+                result = _solve_from_hint(tm, solver, float(time_limit_sec), monitor)
+            else:
+                result = _extract_result(tm, solver, monitor.search(tm.model))
+        solve_sec = time.perf_counter() - solve_start
+        stage_sec = metrics.stage_sec
+        stage_sec["extract"] = max(solve_sec - stage_sec.get("search", 0.0) - stage_sec.get("room_assignment", 0.0), 0.0)
+        if monitor.stop_reason is not None and result.status == "FEASIBLE":
+            result.stop_reason = monitor.stop_reason
+        result.metrics = metrics
+    # An accepted search depends on when the caller accepted; a time-out without a timetable may not repeat
+    if cache_key is not None and result.stop_reason != STOP_ACCEPTED and (result.status != "INFEASIBLE" or result.stop_reason == STOP_INFEASIBLE):
+        cache.put(cache_key, result)
+    return result
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+
+try:
+    from .compiled_problem import CompiledProblem
+    from .timetable_solver import SolveResult
+except ImportError:
+    from compiled_problem import CompiledProblem
+    from timetable_solver import SolveResult
+
+
+def find_schedule_violations(compiled: CompiledProblem, result: SolveResult) -> List[str]:
+    """Check a solved timetable against the hard constraints of the model.
+
+    Returns a list of human readable violations (empty when the timetable is valid).
+    Works on the extracted SolveResult only, so it can verify any engine's output.
+    """
+    violations: List[str] = []
+    timeslot_by_id = compiled.timeslot_by_id
+    P1 = set(compiled.P1_timeslots)
+
+    lectures: Dict[Tuple[str, str], int] = defaultdict(int)
+    lab_periods: Dict[Tuple[str, str], int] = defaultdict(int)
+    faculty_at: Dict[Tuple[str, int], Set[str]] = defaultdict(set)
+    room_at: Dict[Tuple[str, int], Set[str]] = defaultdict(set)
+    rooms_in_block: Dict[Tuple[str, int], Set[str]] = defaultdict(set)
+    p1_count: Dict[str, int] = defaultdict(int)
+
+    for s, by_t in result.schedule_by_section.items():
+        candidates = set(compiled.candidate_rooms_by_section.get(s, []))
+        for t, (c, f, room_id, kind) in by_t.items():
+            ts = timeslot_by_id.get(t)
+            if ts is None or ts.is_break:
+                violations.append(f"Section {s} has {c} scheduled in break/unknown timeslot {t}.")
+                continue
+            if kind == "lecture":
+                lectures[(s, c)] += 1
+            else:
+                lab_periods[(s, c)] += 1
+            if f:
+                faculty_at[(f, t)].add(s)
+                if t in P1:
+                    p1_count[f] += 1
+            if compiled.have_rooms and candidates:
+                if not room_id:
+                    violations.append(f"Section {s} has no room for {c} at timeslot {t}.")
+                    continue
+                if room_id not in candidates:
+                    violations.append(f"Section {s} uses room {room_id} that is not a candidate room at timeslot {t}.")
+                elif room_id not in compiled.rooms_for_kind(s, kind):
+                    violations.append(f"Section {s} has a {kind} in room {room_id}, which its {kind}s may not use, at timeslot {t}.")
+                room_at[(room_id, t)].add(s)
+                rooms_in_block[(s, compiled.timeslot_to_block[t])].add(room_id)
+
+    for req in compiled.requirements:
+        key = (req.section_id, req.course_id)
+        if req.has_lectures and lectures[key] != req.weekly_lectures:
+            violations.append(
+                f"Section {req.section_id}, Course {req.course_id}: {lectures[key]} lectures scheduled, {req.weekly_lectures} required."
+            )
+        if req.has_labs and lab_periods[key] != req.weekly_lab_sessions * req.lab_block_size:
+            violations.append(
+                f"Section {req.section_id}, Course {req.course_id}: {lab_periods[key]} lab periods scheduled, "
+                f"{req.weekly_lab_sessions * req.lab_block_size} required."
+            )
+
+    for (f, t), sections in faculty_at.items():
+        if len(sections) > 1:
+            violations.append(f"Faculty {f} teaches sections {sorted(sections)} at timeslot {t}.")
+    for f, count in p1_count.items():
+        if count > 3:
+            violations.append(f"Faculty {f} teaches {count} first periods (max 3).")
+    for (room_id, t), sections in room_at.items():
+        if len(sections) > 1:
+            violations.append(f"Room {room_id} hosts sections {sorted(sections)} at timeslot {t}.")
+    for (s, block_id), room_ids in rooms_in_block.items():
+        if len(room_ids) > 1:
+            violations.append(f"Section {s} uses rooms {sorted(room_ids)} within block {block_id}.")
+    return violations
+
+
+def gaps_by_section(compiled: CompiledProblem, schedule_by_section: Dict[str, Dict[int, Tuple[str, str, str, str]]]) -> Dict[str, Tuple[int, int]]:
+    """section_id -> (idle periods, single free periods) between its classes, see count_gaps."""
+    timeslot_by_id = compiled.timeslot_by_id
+    times_by_day: Dict[int, List[int]] = defaultdict(list)
+    for t in compiled.T_non_break:
+        times_by_day[timeslot_by_id[t].day_index].append(t)
+    ordered_days = [sorted(tids, key=lambda tid: timeslot_by_id[tid].period_index) for tids in times_by_day.values()]
+    gaps: Dict[str, Tuple[int, int]] = {}
+    for s, by_t in schedule_by_section.items():
+        idle = single = 0
+        for ordered in ordered_days:
+            occupied = [i for i, t in enumerate(ordered) if t in by_t]
+            if not occupied:
+                continue
+            idle += occupied[-1] - occupied[0] + 1 - len(occupied)
+            busy = set(occupied)
+            single += sum(1 for i in range(1, len(ordered) - 1) if i not in busy and i - 1 in busy and i + 1 in busy)
+        gaps[s] = (idle, single)
+    return gaps
+
+
+def count_gaps(compiled: CompiledProblem, result: SolveResult) -> Tuple[int, int]:
+    """(idle periods, single free periods) between classes of each section and day.
+
+    Idle periods are everything between a section's first and last class of a day (what the
+    "span" gap model minimizes); single free periods have a class right before and after
+    (what the "triple" gap model minimizes). Breaks are not teaching periods and never count.
+    """
+    gaps = gaps_by_section(compiled, result.schedule_by_section).values()
+    return sum(idle for idle, _single in gaps), sum(single for _idle, single in gaps)
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import glob
+import os
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterable, List, Set, Tuple, Union
+
+import pandas as pd
+
+try:
+    from .compiled_problem import CompiledProblem
+except ImportError:
+    from compiled_problem import CompiledProblem
+
+if TYPE_CHECKING:
+    from .timetable_solver import SolveResult, TimetableModel
+
+# One scheduled period of a previous timetable: (section_id, day_name, period_index, course_id, kind, room_id)
+HintEntry = Tuple[str, str, int, str, str, str]
+
+# Section grid cell written by exporter.build_grids_by_section: "COURSE (FACULTY) [kind] @ROOM"
+_CELL_RE = re.compile(r"^(?P<course>\S+)(?: \((?P<faculty>[^)]*)\))? \[(?P<kind>lecture|lab)\](?: @(?P<room>\S+))?$")
+
+
+@dataclass
+class WarmStartHint:
+    """A previous timetable mapped onto the current problem, ready to hint the CP-SAT variables."""
+
+    lectures: Set[Tuple[str, str, int]] = field(default_factory=set)  # X_lec keys
+    lab_starts: Set[Tuple[str, str, int]] = field(default_factory=set)  # Y_lab_start keys
+    rooms: Dict[Tuple[str, int], str] = field(default_factory=dict)  # (section_id, timeslot_id) -> room_id
+    dropped: List[str] = field(default_factory=list)  # previous entries that no longer fit the problem
+
+    @property
+    def num_classes(self) -> int:
+        return len(self.lectures) + len(self.lab_starts)
+
+
+def hint_from_entries(compiled: CompiledProblem, entries: Iterable[HintEntry]) -> WarmStartHint:
+    """Keep every previous class that still fits: same section, course, day and period.
+
+    Unknown sections / courses / periods, classes now in breaks, surplus lectures or labs and
+    rooms that are gone or too small are dropped (and listed in `dropped`); the solver fills
+    in whatever the hint leaves open.
+    """
+    hint = WarmStartHint()
+    tid_by_day_period = {(t.day_name, t.period_index): t.timeslot_id for t in compiled.timeslots}
+    lab_periods: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+    lectures_by_pair: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+
+    for s, day_name, period_index, c, kind, room_id in entries:
+        req = compiled.requirement_by_pair.get((s, c))
+        tid = tid_by_day_period.get((day_name, period_index))
+        if req is None:
+            hint.dropped.append(f"Section {s}, Course {c}: no longer required.")
+            continue
+        if tid is None or compiled.timeslot_by_id[tid].is_break:
+            hint.dropped.append(f"Section {s}, Course {c}: {day_name} P{period_index} is no longer a teaching period.")
+            continue
+        if kind == "lab":
+            lab_periods[(s, c)].append(tid)
+        else:
+            lectures_by_pair[(s, c)].append(tid)
+        if room_id:
+            if room_id in compiled.candidate_rooms_by_section.get(s, []):
+                hint.rooms[(s, tid)] = room_id
+            else:
+                hint.dropped.append(f"Section {s}: room {room_id} is no longer available.")
+
+    for (s, c), tids in lectures_by_pair.items():
+        req = compiled.requirement_by_pair[(s, c)]
+        tids = sorted(set(tids))
+        if len(tids) > req.weekly_lectures:
+            hint.dropped.append(f"Section {s}, Course {c}: {len(tids) - req.weekly_lectures} surplus lectures.")
+        for t in tids[: req.weekly_lectures]:
+            hint.lectures.add((s, c, t))
+
+    # Previous lab periods come as runs of consecutive timeslots; split each run into blocks
+    for (s, c), tids in lab_periods.items():
+        req = compiled.requirement_by_pair[(s, c)]
+        if not req.has_labs:
+            hint.dropped.append(f"Section {s}, Course {c}: labs are no longer required.")
+            continue
+        valid_starts = set(compiled.valid_starts_by_block_size[req.lab_block_size])
+        starts: List[int] = []
+        tids = sorted(set(tids))
+        i = 0
+        while i < len(tids):
+            window = tids[i : i + req.lab_block_size]
+            if window[0] in valid_starts and window == compiled.lab_covered_timeslots(req, window[0]):
+                starts.append(window[0])
+                i += req.lab_block_size
+            else:
+                i += 1
+        if len(starts) > req.weekly_lab_sessions:
+            hint.dropped.append(f"Section {s}, Course {c}: {len(starts) - req.weekly_lab_sessions} surplus lab sessions.")
+        for start_t in starts[: req.weekly_lab_sessions]:
+            hint.lab_starts.add((s, c, start_t))
+    _drop_clashes(compiled, hint)
+    hint.dropped = list(dict.fromkeys(hint.dropped))
+    return hint
+
+
+def _drop_clashes(compiled: CompiledProblem, hint: WarmStartHint) -> None:
+    # Reassigned faculty can make kept classes clash; keep the earliest class of each clash
+    # and leave the rest to the solver
+    classes = [(t, s, c, "lecture") for s, c, t in hint.lectures] + [(t, s, c, "lab") for s, c, t in hint.lab_starts]
+    taken: Set[Tuple[str, int]] = set()
+    for start_t, s, c, kind in sorted(classes):
+        req = compiled.requirement_by_pair[(s, c)]
+        tids = [start_t] if kind == "lecture" else compiled.lab_covered_timeslots(req, start_t)
+        keys = [("section:" + s, t) for t in tids]
+        if req.faculty_id:
+            keys += [("faculty:" + req.faculty_id, t) for t in tids]
+        if any(k in taken for k in keys):
+            (hint.lectures if kind == "lecture" else hint.lab_starts).discard((s, c, start_t))
+            hint.dropped.append(f"Section {s}, Course {c}: clashes at timeslot {start_t} after the change.")
+            continue
+        taken.update(keys)
+
+
+def hint_from_result(compiled: CompiledProblem, result: "SolveResult") -> WarmStartHint:
+    timeslot_by_id = {t.timeslot_id: t for t in result.timeslots}
+    entries: List[HintEntry] = []
+    for s, by_t in result.schedule_by_section.items():
+        for t, (c, _f, room_id, kind) in by_t.items():
+            ts = timeslot_by_id[t]
+            entries.append((s, ts.day_name, ts.period_index, c, kind, room_id))
+    return hint_from_entries(compiled, entries)
+
+
+def hint_from_output_dir(compiled: CompiledProblem, output_dir: str) -> WarmStartHint:
+    """Read the per-section grids of an exported timetable (`<output_dir>/sections/section_*.csv`).
+
+    Grid columns P1..Pn are the periods of each day in order, as written by export_all.
+    """
+    sections_dir = os.path.join(output_dir, "sections")
+    paths = sorted(glob.glob(os.path.join(sections_dir, "section_*.csv")))
+    if not paths:
+        raise FileNotFoundError(f"No section timetables found in {sections_dir}")
+    periods_by_day: Dict[str, List[int]] = defaultdict(list)
+    for t in compiled.timeslots:
+        periods_by_day[t.day_name].append(t.period_index)
+    for day_name in periods_by_day:
+        periods_by_day[day_name].sort()
+
+    entries: List[HintEntry] = []
+    for path in paths:
+        s = os.path.basename(path)[len("section_") : -len(".csv")]
+        df = pd.read_csv(path, dtype=str, keep_default_na=False)
+        for _, row in df.iterrows():
+            day_name = row["Day"]
+            periods = periods_by_day.get(day_name, [])
+            for col in df.columns[1:]:
+                match = _CELL_RE.match(str(row[col]).strip())
+                if match is None:
+                    continue
+                pos = int(col[1:]) - 1
+                # Periods beyond the current day are kept with an impossible index so they get reported
+                period_index = periods[pos] if pos < len(periods) else -1
+                entries.append((s, day_name, period_index, match["course"], match["kind"], match["room"] or ""))
+    return hint_from_entries(compiled, entries)
+
+
+def load_warm_start_hint(compiled: CompiledProblem, source: Union["SolveResult", str, WarmStartHint]) -> WarmStartHint:
+    if isinstance(source, WarmStartHint):
+        return source
+    if isinstance(source, str):
+        return hint_from_output_dir(compiled, source)
+    return hint_from_result(compiled, source)
+
+
+def _hinted_block_rooms(compiled: CompiledProblem, hint: WarmStartHint) -> Tuple[Dict[Tuple[str, int], List[int]], Dict[Tuple[str, int], str]]:
+    """Occupied timeslots and room of every (section, block) the hint keeps busy.
+
+    Each block keeps the first hinted room that is still free; blocks whose room is gone
+    (or now clashes) are repaired with the first free candidate room.
+    """
+    timeslot_to_block = compiled.timeslot_to_block
+    busy: Dict[Tuple[str, int], List[int]] = defaultdict(list)
+    for s, c, t in hint.lectures:
+        busy[(s, timeslot_to_block[t])].append(t)
+    for s, c, start_t in hint.lab_starts:
+        req = compiled.requirement_by_pair[(s, c)]
+        busy[(s, timeslot_to_block[start_t])].extend(compiled.lab_covered_timeslots(req, start_t))
+
+    block_room: Dict[Tuple[str, int], str] = {}
+    occupied: Set[Tuple[str, int]] = set()
+
+    def take(key: Tuple[str, int], room_id: str) -> bool:
+        if any((room_id, t) in occupied for t in busy[key]):
+            return False
+        block_room[key] = room_id
+        occupied.update((room_id, t) for t in busy[key])
+        return True
+
+    for (s, t), room_id in sorted(hint.rooms.items(), key=lambda item: item[0][1]):
+        key = (s, timeslot_to_block[t])
+        if key in busy and key not in block_room:
+            take(key, room_id)
+    for key in busy:
+        if key not in block_room:
+            for room_id in compiled.candidate_rooms_by_section.get(key[0], []):
+                if take(key, room_id):
+                    break
+    return busy, block_room
+
+
+def add_solution_hints(tm: "TimetableModel", hint: WarmStartHint) -> None:
+    """Hint every class and room variable of a built model from `hint` (0 for anything not hinted)."""
+    model = tm.model
+    compiled = tm.compiled
+    model.ClearHints()
+    for key, x in tm.X_lec.items():
+        model.AddHint(x, key in hint.lectures)
+    for key, y in tm.Y_lab_start.items():
+        model.AddHint(y, key in hint.lab_starts)
+    if not tm.SectionBlockRoom:
+        return
+
+    busy, block_room = _hinted_block_rooms(compiled, hint)
+    timeslot_to_block = compiled.timeslot_to_block
+    for (s, block_id, r_id), v in tm.SectionBlockRoom.items():
+        model.AddHint(v, block_room.get((s, block_id)) == r_id)
+    for (s, block_id), v in tm.SectionBlockBusy.items():
+        model.AddHint(v, (s, block_id) in busy)
+    busy_at = {(s, t) for (s, _block_id), tids in busy.items() for t in tids}
+    for (s, t, r_id), v in tm.RoomUse.items():
+        model.AddHint(v, (s, t) in busy_at and block_room.get((s, timeslot_to_block[t])) == r_id)
+    for (s, c, t, r_id), v in tm.R_lec.items():
+        model.AddHint(v, (s, c, t) in hint.lectures and block_room.get((s, timeslot_to_block[t])) == r_id)
+    for (s, c, start_t, r_id), v in tm.R_lab_start.items():
+        model.AddHint(v, (s, c, start_t) in hint.lab_starts and block_room.get((s, timeslot_to_block[start_t])) == r_id)
@@ -0,0 +1,42 @@
+"""
+Test to verify the /api/solve request handling (app_fastapi._run_solve).
+A solve with a room slack must report its status, one grid per section and the room domain
+metrics: the policy and its room variables next to the capacity baseline.
+"""
+import base64
+import os
+
+from src.app_fastapi import FilePayload, SolveRequest, _run_solve
+
+def _files(directory):
+    files = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".csv"):
+            with open(os.path.join(directory, name), "rb") as f:
+                files.append(FilePayload(name=name, content=base64.b64encode(f.read()).decode("utf-8")))
+    return files
+
+def test_api():
+    print("=" * 70)
+    print("Testing Solve API Responses")
+    print("=" * 70)
+
+    directory = "TT_Flexinput" if os.path.isdir("TT_Flexinput") else "data/templates"
+
+    print("\n🔧 Solving with a 10% room slack...")
+    payload = SolveRequest(files=_files(directory), timeLimit=60, roomModel="block", roomSlack=0.1)
+    assert not payload.useCache, "the on-disk caches must be opt-in"
+    response = _run_solve(payload)
+    assert response["status"] in ("OPTIMAL", "FEASIBLE"), response["status"]
+    assert response["sections"], "Every section must have a grid"
+    print(f"✅ Status: {response['status']}")
+
+    room_domains = response["metrics"]["roomDomains"]
+    assert room_domains is not None and room_domains["policy"] == "capacity, slack 0.1", room_domains
+    assert 0 < room_domains["roomVariables"] <= room_domains["capacityRoomVariables"], room_domains
+    print(f"✅ {room_domains['roomVariables']} room variables instead of {room_domains['capacityRoomVariables']}")
+    return True
+
+if __name__ == "__main__":
+    success = test_api()
+    exit(0 if success else 1)
@@ -0,0 +1,50 @@
+"""
+Test to verify the block-level room formulation (room_model="block").
+Rooms are chosen per section block only; the extracted timetable must still
+satisfy every hard constraint of the default per-slot formulation.
+"""
+from src.compiled_problem import compile_problem
+from src.loader import load_problem_from_directory
+from src.timetable_solver import build_model, solve
+from src.validation import find_schedule_violations
+
+def test_block_room_model():
+    print("=" * 70)
+    print("Testing Block Room Model (room variables per section block only)")
+    print("=" * 70)
+    
+    # Load data
+    try:
+        problem = load_problem_from_directory("TT_Flexinput")
+    except FileNotFoundError:
+        print("Using data/templates instead...")
+        problem = load_problem_from_directory("data/templates")
+    compiled = compile_problem(problem)
+    
+    # Compare model sizes
+    per_slot_vars = len(build_model(compiled, room_model="per_slot").model.Proto().variables)
+    block_vars = len(build_model(compiled, room_model="block").model.Proto().variables)
+    print(f"\n📋 Variables: per_slot={per_slot_vars}, block={block_vars} "
+          f"({per_slot_vars / max(block_vars, 1):.1f}x fewer)")
+    assert block_vars < per_slot_vars
+    
+    # Solve
+    print("\n🔧 Solving timetable with block room model...")
+    result = solve(problem, time_limit_sec=60, compiled=compiled, room_model="block")
+    assert result.status != "INFEASIBLE", "Solver could not find a feasible solution"
+    print(f"✅ Solver Status: {result.status}")
+    
+    # Verify
+    violations = find_schedule_violations(compiled, result)
+    for v in violations:
+        print(f"  ❌ {v}")
+    assert not violations, f"{len(violations)} constraint violations"
+    
+    rooms_used = {room for by_t in result.schedule_by_section.values() for (_, _, room, _) in by_t.values()}
+    assert "" not in rooms_used, "Every class must have a room"
+    print(f"✅ All constraints satisfied; {len(rooms_used)} rooms in use")
+    return True
+
+if __name__ == "__main__":
+    success = test_block_room_model()
+    exit(0 if success else 1)
@@ -0,0 +1,69 @@
+"""
+Test to verify the compact, array-backed result (CompactSolveResult).
+Packing a timetable must keep every view of SolveResult (section and faculty schedules, free
+rooms and faculty), exporter must write the same files from either form, and classes the
+problem cannot encode must be rejected.
+"""
+import filecmp
+import os
+import pickle
+import tempfile
+
+from src.compact_result import compact_result
+from src.compiled_problem import compile_problem
+from src.exporter import export_all
+from src.greedy import solve_greedy
+from src.loader import load_problem_from_directory
+from src.timetable_solver import SolveResult
+
+def test_compact_result():
+    print("=" * 70)
+    print("Testing Compact Solve Result")
+    print("=" * 70)
+
+    # Load data
+    try:
+        problem = load_problem_from_directory("TT_Flexinput")
+    except FileNotFoundError:
+        print("Using data/templates instead...")
+        problem = load_problem_from_directory("data/templates")
+    compiled = compile_problem(problem)
+    result = solve_greedy(problem, compiled=compiled)
+    assert result.status == "FEASIBLE", result.status
+
+    print("\n🔧 Packing a timetable...")
+    compact = compact_result(result, compiled)
+    assert compact.schedule_by_section == result.schedule_by_section
+    assert compact.schedule_by_faculty == result.schedule_by_faculty
+    assert compact.available_rooms == result.available_rooms
+    assert compact.available_faculty == result.available_faculty
+    assert compact.to_result().schedule_by_section == result.schedule_by_section
+    assert len(pickle.dumps(compact)) < len(pickle.dumps(result)) / 2
+    print(f"✅ Same views from {compact.nbytes} bytes of grids ({len(pickle.dumps(compact))} vs {len(pickle.dumps(result))} bytes pickled)")
+
+    print("\n🔧 Exporting both forms...")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        export_all(result, os.path.join(tmpdir, "dict"))
+        export_all(compact, os.path.join(tmpdir, "compact"))
+        for root, _dirs, files in os.walk(os.path.join(tmpdir, "dict")):
+            for name in files:
+                other = os.path.join(tmpdir, "compact", os.path.relpath(os.path.join(root, name), os.path.join(tmpdir, "dict")))
+                assert filecmp.cmp(os.path.join(root, name), other, shallow=False), name
+    print("✅ Identical CSV files")
+
+    print("\n🔧 Packing results without a timetable or with unknown ids...")
+    empty = compact_result(SolveResult(status="INFEASIBLE", schedule_by_section={}, schedule_by_faculty={}, timeslots=result.timeslots), compiled)
+    assert empty.schedule_by_section == {} and empty.available_rooms is None and empty.available_faculty is None
+    section_id = next(iter(result.schedule_by_section))
+    t, (c, f, _r, k) = next(iter(result.schedule_by_section[section_id].items()))
+    broken = SolveResult(status="FEASIBLE", schedule_by_section={section_id: {t: (c, f, "NO_SUCH_ROOM", k)}}, schedule_by_faculty={}, timeslots=result.timeslots)
+    try:
+        compact_result(broken, compiled)
+        raise AssertionError("unknown room was packed")
+    except ValueError as e:
+        print(f"✅ Rejected: {e}")
+    return True
+
+if __name__ == "__main__":
+    success = test_compact_result()
+    exit(0 if success else 1)
@@ -0,0 +1,61 @@
+"""
+Test to verify the infeasibility explanation (explain_infeasibility).
+Valid inputs must be reported feasible; a fully booked section whose only teacher cannot cover
+its first periods must be explained by that teacher's P1 limit and the section's own
+requirements and no-overlap constraints, with the CSV rows they come from; typed room
+domains must be honoured, so labs without a lab room are explained rather than scheduled.
+"""
+from src.explain import EXPLAIN_CONFLICT, EXPLAIN_FEASIBLE, explain_infeasibility
+from src.loader import load_problem_from_directory
+from src.models import Faculty
+from src.solver_params import SolverParams
+
+def test_explain():
+    print("=" * 70)
+    print("Testing Infeasibility Explanation")
+    print("=" * 70)
+
+    # Load data
+    try:
+        problem = load_problem_from_directory("TT_Flexinput")
+    except FileNotFoundError:
+        print("Using data/templates instead...")
+        problem = load_problem_from_directory("data/templates")
+
+    print("\n🔧 Explaining valid inputs...")
+    params = SolverParams(log_lines=[])
+    explanation = explain_infeasibility(problem, time_limit_sec=60, params=params)
+    assert explanation.status == EXPLAIN_FEASIBLE and not explanation.conflict, explanation.status
+    assert params.log_lines == [], "the search logs of the probes must not be captured"
+    print(f"✅ Feasible after {explanation.solves} solve(s)")
+
+    print("\n🔧 One faculty member for a fully booked section...")
+    section_id = problem.sections[0].section_id
+    single = problem.copy(update={
+        "faculty": problem.faculty + [Faculty(faculty_id="FX", faculty_name="Only teacher")],
+        "faculty_courses": [a.copy(update={"faculty_id": "FX"}) if a.section_id == section_id else a for a in problem.faculty_courses],
+    })
+    explanation = explain_infeasibility(single, time_limit_sec=120)
+    assert explanation.status == EXPLAIN_CONFLICT and explanation.minimal, explanation.status
+    parts = {(part.family, part.key) for part in explanation.conflict}
+    assert parts == {("faculty_p1", "FX"), ("section_overlap", section_id), ("requirement", section_id)}, parts
+    rows = {row for part in explanation.conflict for row in part.csv_rows}
+    assert f"faculty.csv line {len(problem.faculty) + 2}" in rows, rows
+    assert any(row.startswith("faculty_courses.csv lines ") for row in rows), rows
+    for line in explanation.summary_lines():
+        print(line)
+    print(f"✅ Minimal conflict after {explanation.solves} solves")
+
+    print("\n🔧 No lab rooms under typed room domains...")
+    no_labs = problem.copy(update={"rooms": [r for r in problem.rooms if not r.is_lab]})
+    explanation = explain_infeasibility(no_labs, time_limit_sec=120, room_domains="typed")
+    assert explanation.status == EXPLAIN_CONFLICT, explanation.status
+    families = {part.family for part in explanation.conflict}
+    assert {"requirement", "stickiness"} <= families, families
+    assert any("typed room domains" in part.description for part in explanation.conflict)
+    print(f"✅ Labs without a lab room explained after {explanation.solves} solves")
+    return True
+
+if __name__ == "__main__":
+    success = test_explain()
+    exit(0 if success else 1)
@@ -0,0 +1,59 @@
+"""
+Test to verify the pre-solve feasibility checks (pre_solve_feasibility_check).
+Valid inputs must pass; an overloaded faculty member, first periods that cannot be staffed
+within the P1 limit and too few rooms for the sections that must be in class must each be
+reported before solving.
+"""
+from src.compiled_problem import compile_problem
+from src.feasibility import pre_solve_feasibility_check
+from src.loader import load_problem_from_directory
+from src.models import Faculty
+
+def test_feasibility():
+    print("=" * 70)
+    print("Testing Pre-Solve Feasibility Checks")
+    print("=" * 70)
+
+    # Load data
+    try:
+        problem = load_problem_from_directory("TT_Flexinput")
+    except FileNotFoundError:
+        print("Using data/templates instead...")
+        problem = load_problem_from_directory("data/templates")
+
+    print("\n🔧 Checking valid inputs...")
+    report = pre_solve_feasibility_check(problem)
+    assert report.ok(), report.errors
+    print("✅ No errors")
+
+    print("\n🔧 One faculty member for every class...")
+    first = problem.faculty_courses[0].faculty_id
+    overloaded = problem.copy(update={"faculty_courses": [a.copy(update={"faculty_id": first}) for a in problem.faculty_courses]})
+    errors = pre_solve_feasibility_check(overloaded).errors
+    assert any(e.startswith(f"Faculty {first} is assigned") for e in errors), errors
+    print(f"✅ {errors[0]}")
+
+    print("\n🔧 One faculty member for a fully booked section...")
+    # Every section is busy in all 42 timeslots, so each of its 6 first periods needs a class
+    section_id = problem.sections[0].section_id
+    compiled = compile_problem(problem)
+    assert sum(r.total_periods for r in compiled.requirements_by_section[section_id]) == len(compiled.T_non_break)
+    single = problem.copy(update={
+        "faculty": problem.faculty + [Faculty(faculty_id="FX", faculty_name="Only teacher")],
+        "faculty_courses": [a.copy(update={"faculty_id": "FX"}) if a.section_id == section_id else a for a in problem.faculty_courses],
+    })
+    errors = pre_solve_feasibility_check(single).errors
+    assert len(errors) == 1 and errors[0].startswith(f"First periods: sections {section_id} "), errors
+    print(f"✅ {errors[0]}")
+
+    print("\n🔧 Fewer rooms than fully booked sections...")
+    kept = {"N401", "N402", "N403", "N404", "N407", "N408", "N411", "N413"}
+    few_rooms = problem.copy(update={"rooms": [r for r in problem.rooms if r.room_id in kept]})
+    errors = pre_solve_feasibility_check(few_rooms).errors
+    assert len(errors) == 1 and errors[0].startswith("Rooms: 9 sections") and "in the week" in errors[0], errors
+    print(f"✅ {errors[0]}")
+    return True
+
+if __name__ == "__main__":
+    success = test_feasibility()
+    exit(0 if success else 1)
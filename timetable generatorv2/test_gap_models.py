@@ -0,0 +1,47 @@
+"""
+Test to verify the span gap formulation (gap_model="span").
+A gap-optimized solve with per-day first/last occupancy must find a valid timetable whose
+objective is the number of idle periods between classes; unknown formulations are rejected.
+"""
+from src.compiled_problem import compile_problem
+from src.loader import load_problem_from_directory
+from src.timetable_solver import build_model, solve
+from src.validation import count_gaps, find_schedule_violations
+
+def test_gap_models():
+    print("=" * 70)
+    print("Testing Span Gap Formulation")
+    print("=" * 70)
+
+    # Load data
+    try:
+        problem = load_problem_from_directory("TT_Flexinput")
+    except FileNotFoundError:
+        print("Using data/templates instead...")
+        problem = load_problem_from_directory("data/templates")
+    compiled = compile_problem(problem)
+
+    try:
+        build_model(compiled, room_model="block", optimize_gaps=True, gap_model="nope")
+        assert False, "unknown gap model accepted"
+    except ValueError:
+        print("✅ Unknown gap model rejected")
+
+    print("\n🔧 Optimizing gaps with the span formulation...")
+    result = solve(problem, time_limit_sec=60, compiled=compiled, room_model="block", optimize_gaps=True, gap_model="span")
+    assert result.status != "INFEASIBLE", "Solver could not find a feasible solution"
+    violations = find_schedule_violations(compiled, result)
+    for v in violations:
+        print(f"  ❌ {v}")
+    assert not violations, f"{len(violations)} constraint violations"
+
+    idle, single = count_gaps(compiled, result)
+    print(f"✅ Solver Status: {result.status}, objective: {result.objective_value}, idle: {idle}, single: {single}")
+    # The span objective counts exactly the idle periods of the timetable it reports
+    assert result.objective_value == idle, f"objective {result.objective_value} != idle periods {idle}"
+    assert single <= idle
+    return True
+
+if __name__ == "__main__":
+    success = test_gap_models()
+    exit(0 if success else 1)
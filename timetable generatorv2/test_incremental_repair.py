@@ -0,0 +1,101 @@
+"""
+Test to verify minimal-perturbation repair (repair.resolve_with_delta).
+After blocking a faculty member's periods and removing a room, only the touched
+sections may change, the blocked periods and removed room must be unused, and the
+repaired timetable must satisfy every hard constraint. A removed room must also pull in the
+sections that block the room's other users, even when they share no faculty member.
+"""
+import time
+
+from src.compiled_problem import compile_problem
+from src.loader import load_problem_from_directory
+from src.models import Course, DayPeriod, Faculty, FacultyCourseAssignment, ProblemData, Room, Section, SectionCourseRequirement
+from src.repair import ScheduleDelta, resolve_with_delta
+from src.timetable_solver import SolveResult, solve
+from src.validation import find_schedule_violations
+
+def _two_sections_shared_room():
+    # Sections A (30 students, 3 lectures) and B (60 students, 2 lectures) with different
+    # teachers, on one day of two 2-period blocks (break at period 3). B fits R1 and R2 only,
+    # A also fits the small R3. In the timetable A holds R1 in periods 1, 2 and 4 and B holds R2
+    # in periods 1 and 2: without R2, B can only be repaired by moving A, which shares no teacher
+    problem = ProblemData(
+        day_periods=[DayPeriod(day_index=0, day_name="Monday", period_index=p, is_break=p == 3) for p in (1, 2, 3, 4, 5)],
+        sections=[Section(section_id="A", section_name="A", num_students=30), Section(section_id="B", section_name="B", num_students=60)],
+        faculty=[Faculty(faculty_id=f"F{s}", faculty_name=f"Faculty {s}") for s in "AB"],
+        courses=[
+            Course(course_id="CA", course_name="Course A", lecture_periods_per_week=3),
+            Course(course_id="CB", course_name="Course B", lecture_periods_per_week=2),
+        ],
+        section_requirements=[SectionCourseRequirement(section_id=s, course_id=f"C{other}") for s, other in ("AB", "BA")],
+        faculty_courses=[FacultyCourseAssignment(faculty_id=f"F{s}", course_id=f"C{s}", section_id=s) for s in "AB"],
+        rooms=[Room(room_id="R1", room_name="R1", capacity=70), Room(room_id="R2", room_name="R2", capacity=70), Room(room_id="R3", room_name="R3", capacity=40)],
+    )
+    timeslots = compile_problem(problem).timeslots
+    tid = {t.period_index: t.timeslot_id for t in timeslots}
+    schedule_by_section = {
+        "A": {tid[p]: ("CA", "FA", "R1", "lecture") for p in (1, 2, 4)},
+        "B": {tid[p]: ("CB", "FB", "R2", "lecture") for p in (1, 2)},
+    }
+    schedule_by_faculty = {f"F{s}": {t: (c, s, r, k) for t, (c, _f, r, k) in by_t.items()} for s, by_t in schedule_by_section.items()}
+    previous = SolveResult(status="FEASIBLE", schedule_by_section=schedule_by_section, schedule_by_faculty=schedule_by_faculty, timeslots=timeslots)
+    return problem, previous
+
+def test_incremental_repair():
+    print("=" * 70)
+    print("Testing Minimal-Perturbation Repair")
+    print("=" * 70)
+
+    # Load data
+    try:
+        problem = load_problem_from_directory("TT_Flexinput")
+    except FileNotFoundError:
+        print("Using data/templates instead...")
+        problem = load_problem_from_directory("data/templates")
+
+    print("\n🔧 Solving the original timetable...")
+    previous = solve(problem, time_limit_sec=60, room_model="two_phase")
+    assert previous.status != "INFEASIBLE", "Solver could not find a feasible solution"
+
+    # Block the busiest faculty member on their first day and close one used room
+    faculty_id, by_t = max(previous.schedule_by_faculty.items(), key=lambda item: len(item[1]))
+    first_day = min(previous.timeslots[t].day_index for t in by_t)
+    blocked = [t.timeslot_id for t in previous.timeslots if t.day_index == first_day]
+    removed_room = next(iter(next(iter(previous.schedule_by_section.values())).values()))[2]
+    delta = ScheduleDelta(blocked_faculty_timeslots={faculty_id: blocked}, removed_rooms=[removed_room])
+
+    print(f"\n🔧 Repairing: {faculty_id} unavailable on day {first_day}, room {removed_room} removed...")
+    start = time.perf_counter()
+    repair = resolve_with_delta(problem, previous, delta, time_limit_sec=30)
+    elapsed = time.perf_counter() - start
+    result = repair.result
+    assert result.status != "INFEASIBLE", "Repair found no timetable"
+    print(f"✅ Repaired in {elapsed:.2f}s: {len(repair.resolved_sections)} sections re-solved, "
+          f"{repair.moved_classes} classes moved, {repair.changed_rooms} block rooms changed")
+
+    violations = find_schedule_violations(compile_problem(repair.problem), result)
+    for v in violations:
+        print(f"  ❌ {v}")
+    assert not violations, f"{len(violations)} constraint violations"
+    assert not set(result.schedule_by_faculty.get(faculty_id, {})) & set(blocked)
+    rooms_used = {room for slots in result.schedule_by_section.values() for (_, _, room, _) in slots.values()}
+    assert removed_room not in rooms_used
+    print("✅ All constraints satisfied; blocked periods and removed room unused")
+
+    for s, slots in previous.schedule_by_section.items():
+        if s not in repair.resolved_sections:
+            assert result.schedule_by_section[s] == slots, f"Section {s} changed but was not re-solved"
+    print(f"✅ {len(previous.schedule_by_section) - len(repair.resolved_sections)} untouched sections unchanged")
+
+    print("\n🔧 Repairing a removed room shared with a section of another teacher...")
+    small, small_previous = _two_sections_shared_room()
+    repair = resolve_with_delta(small, small_previous, ScheduleDelta(removed_rooms=["R2"]), time_limit_sec=10)
+    assert repair.result.status != "INFEASIBLE", "Repair must grow by the sections sharing the room"
+    assert repair.resolved_sections == ["A", "B"], repair.resolved_sections
+    assert not find_schedule_violations(compile_problem(repair.problem), repair.result)
+    print(f"✅ Repaired with {repair.moved_classes} classes moved, {repair.changed_rooms} block rooms changed")
+    return True
+
+if __name__ == "__main__":
+    success = test_incremental_repair()
+    exit(0 if success else 1)
@@ -0,0 +1,48 @@
+"""
+Test to verify the interval engine (engine="interval").
+Lectures and labs become optional intervals and clashes are AddNoOverlap per
+section, faculty and room; the timetable must satisfy the same hard constraints.
+"""
+from src.compiled_problem import compile_problem
+from src.loader import load_problem_from_directory
+from src.timetable_solver import build_model, solve
+from src.validation import find_schedule_violations
+
+def test_interval_engine():
+    print("=" * 70)
+    print("Testing Interval Engine (AddNoOverlap for section/faculty/room clashes)")
+    print("=" * 70)
+
+    # Load data
+    try:
+        problem = load_problem_from_directory("TT_Flexinput")
+    except FileNotFoundError:
+        print("Using data/templates instead...")
+        problem = load_problem_from_directory("data/templates")
+    compiled = compile_problem(problem)
+
+    # Same decision variables; clashes become one NoOverlap per section / faculty / room
+    boolean_tm = build_model(compiled, engine="boolean")
+    interval_tm = build_model(compiled, engine="interval")
+    assert interval_tm.X_lec.keys() == boolean_tm.X_lec.keys()
+    assert interval_tm.Y_lab_start.keys() == boolean_tm.Y_lab_start.keys()
+    no_overlaps = sum(1 for ct in interval_tm.model.Proto().constraints if ct.HasField("no_overlap"))
+    print(f"\n📋 NoOverlap constraints: {no_overlaps}, intervals: {len(interval_tm.I_lec) + len(interval_tm.I_lab)}")
+    assert no_overlaps >= len([s for s in compiled.section_ids if compiled.requirements_by_section[s]])
+
+    for room_model in ("block", "two_phase"):
+        print(f"\n🔧 Solving timetable with interval engine, room_model={room_model}...")
+        result = solve(problem, time_limit_sec=60, compiled=compiled, room_model=room_model, engine="interval")
+        assert result.status != "INFEASIBLE", "Solver could not find a feasible solution"
+        print(f"✅ Solver Status: {result.status}")
+
+        violations = find_schedule_violations(compiled, result)
+        for v in violations:
+            print(f"  ❌ {v}")
+        assert not violations, f"{len(violations)} constraint violations"
+        print("✅ All constraints satisfied")
+    return True
+
+if __name__ == "__main__":
+    success = test_interval_engine()
+    exit(0 if success else 1)
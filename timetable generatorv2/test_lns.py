@@ -0,0 +1,73 @@
+"""
+Test to verify Large Neighbourhood Search (solve_lns).
+Without a start it must build a valid timetable (greedy, else chunk by chunk); from a given
+timetable it must keep every step valid, never make the gaps worse, and report each step to
+on_progress.
+"""
+import random
+
+from src.compiled_problem import compile_problem
+from src.lns import DEFAULT_SELECTORS, LnsState, NeighbourhoodSelector, solve_lns
+from src.loader import load_problem_from_directory
+from src.solver_params import SolverParams, StopRules
+from src.timetable_solver import solve
+from src.validation import count_gaps, find_schedule_violations, gaps_by_section
+
+def test_lns():
+    print("=" * 70)
+    print("Testing Large Neighbourhood Search")
+    print("=" * 70)
+
+    # Load data
+    try:
+        problem = load_problem_from_directory("TT_Flexinput")
+    except FileNotFoundError:
+        print("Using data/templates instead...")
+        problem = load_problem_from_directory("data/templates")
+    compiled = compile_problem(problem)
+    params = SolverParams(num_workers=8)
+
+    print("\n🔧 Building a timetable from scratch...")
+    built = solve_lns(problem, time_limit_sec=60, compiled=compiled, params=params)
+    assert built.status in ("OPTIMAL", "FEASIBLE"), built.status
+    violations = find_schedule_violations(compiled, built)
+    assert not violations, violations[:5]
+    assert built.objective_value == count_gaps(compiled, built)[1]
+    assert sorted(built.schedule_by_section) == sorted(compiled.section_ids)
+    print(f"✅ Valid timetable with {built.objective_value} single free periods ({built.stop_reason})")
+
+    print("\n🔧 Checking the selectors...")
+    state = LnsState(compiled, built.schedule_by_section, {s: gaps[1] for s, gaps in gaps_by_section(compiled, built.schedule_by_section).items()})
+    for selector in DEFAULT_SELECTORS:
+        neighbourhood = selector.select(state, random.Random(1), 3)
+        assert 0 < len(neighbourhood.sections) <= 3, selector.name
+        assert neighbourhood.sections <= set(compiled.section_ids)
+    try:
+        NeighbourhoodSelector()
+        raise AssertionError("a selector without select() was created")
+    except TypeError:
+        pass
+    print(f"✅ {', '.join(s.name for s in DEFAULT_SELECTORS)} pick at most the requested sections")
+
+    print("\n🔧 Improving a solve() timetable...")
+    start = solve(problem, time_limit_sec=60, compiled=compiled, room_model="block", params=params)
+    assert start.status in ("OPTIMAL", "FEASIBLE"), start.status
+    start_single = count_gaps(compiled, start)[1]
+    steps = []
+    # A target below 0 keeps the steps running to the time limit even once there are no gaps left
+    searching = SolverParams(num_workers=8, stop_rules=StopRules(target_objective=-1))
+    result = solve_lns(problem, time_limit_sec=15, compiled=compiled, start=start, params=searching, sub_time_sec=3, on_progress=steps.append)
+    violations = find_schedule_violations(compiled, result)
+    assert not violations, violations[:5]
+    assert result.objective_value == count_gaps(compiled, result)[1] <= start_single
+    assert [p.iteration for p in steps] == list(range(1, len(steps) + 1))
+    assert all(later.objective_value <= earlier.objective_value for earlier, later in zip(steps, steps[1:]))
+    assert steps and result.stop_reason == "time_limit"
+    assert result.metrics.lns_steps == len(steps)
+    assert result.metrics.lns_improved == sum(p.improved for p in steps)
+    print(f"✅ {start_single} -> {result.objective_value} single free periods in {len(steps)} steps ({result.stop_reason})")
+    return True
+
+if __name__ == "__main__":
+    success = test_lns()
+    exit(0 if success else 1)
@@ -0,0 +1,67 @@
+"""
+Test to verify the built-model cache (ModelCache).
+A model snapshot must restore to the same CpModelProto with working variable maps; a second
+solve of the same problem with other solver settings must load the model instead of building
+it and still produce a valid timetable; formulation options must change the key.
+"""
+import tempfile
+
+from src.compiled_problem import compile_problem
+from src.loader import load_problem_from_directory
+from src.model_cache import ModelCache, model_cache_key
+from src.solver_params import SolverParams
+from src.timetable_solver import TimetableModel, build_model, objective_lower_bound, solve
+from src.validation import find_schedule_violations
+
+def test_model_cache():
+    print("=" * 70)
+    print("Testing Built-Model Cache")
+    print("=" * 70)
+
+    # Load data
+    try:
+        problem = load_problem_from_directory("TT_Flexinput")
+    except FileNotFoundError:
+        print("Using data/templates instead...")
+        problem = load_problem_from_directory("data/templates")
+    compiled = compile_problem(problem)
+
+    print("\n🔧 Restoring model snapshots...")
+    for options in (
+        dict(room_model="block", optimize_gaps=True, gap_model="triple"),
+        dict(room_model="block", optimize_gaps=True, gap_model="span", engine="interval"),
+    ):
+        tm = build_model(compiled, **options)
+        restored = TimetableModel.from_snapshot(tm.snapshot(), compiled)
+        assert restored.model.Proto() == tm.model.Proto()
+        for name in ("X_lec", "Y_lab_start", "SectionBlockRoom", "I_lec", "I_lab"):
+            original, loaded = getattr(tm, name), getattr(restored, name)
+            assert loaded.keys() == original.keys() and all(loaded[k].Index() == v.Index() for k, v in original.items())
+        assert bool(restored.objective_terms) and objective_lower_bound(restored) == objective_lower_bound(tm)
+        print(f"✅ {options}: {len(tm.model.Proto().variables)} variables restored")
+
+    reordered = problem.copy(update={"sections": problem.sections[::-1]})
+    assert model_cache_key(problem, room_model="block") == model_cache_key(reordered, room_model="block")
+    assert model_cache_key(problem, room_model="block") != model_cache_key(problem, room_model="per_slot")
+    print("✅ Keys ignore row order and follow the formulation options")
+
+    print("\n🔧 Solving twice with different solver settings...")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ModelCache(cache_dir)
+        first = solve(problem, time_limit_sec=60, compiled=compiled, room_model="block", model_cache=cache)
+        second = solve(problem, time_limit_sec=45, compiled=compiled, room_model="block", model_cache=cache, params=SolverParams(random_seed=11))
+        for result in (first, second):
+            assert result.status != "INFEASIBLE", "Solver could not find a feasible solution"
+            violations = find_schedule_violations(compiled, result)
+            for v in violations:
+                print(f"  ❌ {v}")
+            assert not violations, f"{len(violations)} constraint violations"
+        assert "build" in first.metrics.stage_sec and "build" not in second.metrics.stage_sec
+        stats = cache.stats()
+        assert (stats.hits, stats.misses, stats.stores) == (1, 1, 1), stats
+        print(f"✅ Built in {first.metrics.stage_sec['build']:.2f}s, loaded in {second.metrics.stage_sec['model_cache']:.2f}s")
+    return True
+
+if __name__ == "__main__":
+    success = test_model_cache()
+    exit(0 if success else 1)
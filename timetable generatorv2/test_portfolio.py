@@ -0,0 +1,53 @@
+"""
+Test to verify multi-seed portfolio solving (solve_portfolio).
+Configurations must reach CP-SAT through SolverParams.cp_sat and the result cache key; a race of
+configurations in separate processes must return one valid timetable and report the winner.
+"""
+from src.compiled_problem import compile_problem
+from src.loader import load_problem_from_directory
+from src.portfolio import DEFAULT_PORTFOLIO, portfolio_configs, solve_portfolio
+from src.result_cache import solve_cache_key
+from src.solver_params import SolverParams
+from src.validation import find_schedule_violations
+
+def test_portfolio():
+    print("=" * 70)
+    print("Testing Multi-Seed Portfolio Solving")
+    print("=" * 70)
+
+    # Load data
+    try:
+        problem = load_problem_from_directory("TT_Flexinput")
+    except FileNotFoundError:
+        print("Using data/templates instead...")
+        problem = load_problem_from_directory("data/templates")
+    compiled = compile_problem(problem)
+
+    print("\n🔧 Checking configurations...")
+    configs = portfolio_configs(len(DEFAULT_PORTFOLIO) + 2)
+    assert len({c.seed_offset for c in configs}) == len(configs), "every member runs its own seed"
+    for config in configs:
+        params = SolverParams(cp_sat=config.cp_sat).new_solver(10).parameters
+        for name, value in config.cp_sat.items():
+            actual = getattr(params, name)
+            assert actual == value or params.DESCRIPTOR.fields_by_name[name].enum_type.values_by_number[actual].name == value
+    plain = solve_cache_key(problem, SolverParams())
+    assert solve_cache_key(problem, SolverParams(cp_sat={"linearization_level": 2})) != plain
+    print(f"✅ {len(configs)} configurations with distinct seeds reach CP-SAT and the cache key")
+
+    print("\n🔧 Racing two configurations...")
+    result = solve_portfolio(problem, time_limit_sec=60, room_model="block", size=2, params=SolverParams(num_workers=8))
+    assert result.status in ("OPTIMAL", "FEASIBLE"), result.status
+    violations = find_schedule_violations(compiled, result)
+    assert not violations, violations[:5]
+    members = result.metrics.portfolio
+    assert [m.name for m in members] == [c.name for c in configs[:2]]
+    winners = [m for m in members if m.winner]
+    assert len(winners) == 1 and winners[0].status == result.status
+    assert "portfolio" in result.metrics.stage_sec
+    print(f"✅ {winners[0].name} (seed {winners[0].random_seed}) won after {winners[0].wall_sec:.1f}s")
+    return True
+
+if __name__ == "__main__":
+    success = test_portfolio()
+    exit(0 if success else 1)
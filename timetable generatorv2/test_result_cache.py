@@ -0,0 +1,72 @@
+"""
+Test to verify the on-disk result cache (ResultCache).
+An identical request must be answered from the cache, whatever the row order of the inputs;
+different solver settings must solve again; the cache must stay within its size bound,
+evicting the least recently used entries, and count hits and misses.
+"""
+import os
+import tempfile
+import time
+
+from src.loader import load_problem_from_directory
+from src.result_cache import ResultCache
+from src.solver_params import SolverParams
+from src.timetable_solver import solve
+
+def test_result_cache():
+    print("=" * 70)
+    print("Testing Result Cache")
+    print("=" * 70)
+
+    # Load data
+    try:
+        problem = load_problem_from_directory("TT_Flexinput")
+    except FileNotFoundError:
+        print("Using data/templates instead...")
+        problem = load_problem_from_directory("data/templates")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ResultCache(cache_dir)
+
+        print("\n🔧 Solving twice with the same inputs...")
+        first = solve(problem, time_limit_sec=60, room_model="block", cache=cache)
+        assert first.status != "INFEASIBLE", "Solver could not find a feasible solution"
+        assert not first.cache_hit
+        start = time.perf_counter()
+        second = solve(problem, time_limit_sec=60, room_model="block", cache=cache)
+        elapsed = time.perf_counter() - start
+        assert second.cache_hit and second.schedule_by_section == first.schedule_by_section
+        print(f"✅ Second solve answered from the cache in {elapsed * 1000:.1f} ms")
+
+        reordered = problem.copy(update={"sections": problem.sections[::-1], "faculty_courses": problem.faculty_courses[::-1]})
+        assert solve(reordered, time_limit_sec=60, room_model="block", cache=cache).cache_hit
+        print("✅ Row order of the inputs does not change the key")
+
+        other = solve(problem, time_limit_sec=60, room_model="block", cache=cache, params=SolverParams(random_seed=7))
+        assert not other.cache_hit
+        stats = cache.stats()
+        assert (stats.hits, stats.misses, stats.stores, stats.entries) == (2, 2, 2, 2), stats
+        print(f"✅ Different seed solved again; {stats}")
+
+        print("\n🔧 Evicting least recently used entries...")
+        entry_size = os.path.getsize(os.path.join(cache_dir, os.listdir(cache_dir)[0]))
+        small = ResultCache(os.path.join(cache_dir, "small"), max_bytes=int(entry_size * 2.5))
+        for key in ("a", "b"):
+            small.put(key, first)
+            time.sleep(0.05)
+        assert small.get("a") is not None  # "a" is now the most recently used
+        time.sleep(0.05)
+        small.put("c", first)
+        assert small.get("b") is None and small.get("a") is not None and small.get("c") is not None
+        assert small.stats().evictions == 1
+        print(f"✅ {small.stats()}")
+
+        with open(os.path.join(small.directory, "a.pkl"), "wb") as f:
+            f.write(b"not a pickle")
+        assert small.get("a") is None and not os.path.exists(os.path.join(small.directory, "a.pkl"))
+        print("✅ Unreadable entries count as misses and are dropped")
+    return True
+
+if __name__ == "__main__":
+    success = test_result_cache()
+    exit(0 if success else 1)
@@ -0,0 +1,84 @@
+"""
+Test to verify the room domain policies (CompiledProblem.with_room_domains).
+Typed domains must keep lectures out of lab rooms and labs out of lecture rooms, fall back
+to every fitting room only when asked to, the slack cap must leave out rooms far larger than
+the section, and a typed solve must give a valid timetable with fewer room variables.
+"""
+from src.compiled_problem import compile_problem
+from src.loader import load_problem_from_directory
+from src.timetable_solver import build_model, room_variable_count, solve
+from src.validation import find_schedule_violations
+
+def test_room_domains():
+    print("=" * 70)
+    print("Testing Room Domain Policies")
+    print("=" * 70)
+
+    # Load data
+    try:
+        problem = load_problem_from_directory("TT_Flexinput")
+    except FileNotFoundError:
+        print("Using data/templates instead...")
+        problem = load_problem_from_directory("data/templates")
+    compiled = compile_problem(problem)
+    is_lab = {r.room_id: r.is_lab for r in problem.rooms}
+    capacity = {r.room_id: r.capacity for r in problem.rooms}
+
+    print("\n🔧 Typed domains...")
+    assert compiled.with_room_domains() is compiled
+    typed = compiled.with_room_domains("typed")
+    for s in typed.section_ids:
+        assert typed.rooms_for_kind(s, "lecture") and not any(is_lab[r] for r in typed.rooms_for_kind(s, "lecture"))
+        assert typed.rooms_for_kind(s, "lab") and all(is_lab[r] for r in typed.rooms_for_kind(s, "lab"))
+        assert typed.candidate_rooms_by_section[s] == compiled.candidate_rooms_by_section[s]
+    tm = build_model(compiled, room_model="per_slot", room_domains="typed")
+    assert len(tm.R_lec) + len(tm.R_lab_start) + len(tm.SectionBlockRoom) == room_variable_count(typed, "per_slot")
+    assert not any(is_lab[r] for (_s, _c, _t, r) in tm.R_lec)
+    print(f"✅ {room_variable_count(typed, 'per_slot')} per-slot room variables instead of {room_variable_count(compiled, 'per_slot')}")
+
+    print("\n🔧 Typed domains without lab rooms...")
+    no_labs = compile_problem(problem.copy(update={"rooms": [r for r in problem.rooms if not r.is_lab]}))
+    section_id = no_labs.section_ids[0]
+    assert no_labs.with_room_domains("typed").rooms_for_kind(section_id, "lab") == []
+    fallback = no_labs.with_room_domains("typed_fallback")
+    assert fallback.rooms_for_kind(section_id, "lab") == no_labs.candidate_rooms_by_section[section_id]
+    print("✅ typed leaves labs without a room, typed_fallback gives them every fitting room")
+
+    print("\n🔧 Capacity slack...")
+    slack = compiled.with_room_domains(room_slack=0.05)
+    for s in slack.section_ids:
+        size = slack.section_size[s]
+        smallest = min(capacity[r] for r in compiled.candidate_rooms_by_section[s])
+        assert slack.candidate_rooms_by_section[s]
+        assert all(capacity[r] <= max(size * 1.05, smallest) for r in slack.candidate_rooms_by_section[s])
+    print(f"✅ {room_variable_count(slack, 'block')} block room variables instead of {room_variable_count(compiled, 'block')}")
+
+    print("\n🔧 Unknown policy...")
+    try:
+        compiled.with_room_domains("nearest")
+        raise AssertionError("unknown policy was accepted")
+    except ValueError as e:
+        print(f"✅ Rejected: {e}")
+
+    print("\n🔧 Solving with typed domains...")
+    large = load_problem_from_directory("data/large_1000")
+    large_compiled = compile_problem(large)
+    lab_rooms = {r.room_id for r in large.rooms if r.is_lab}
+    for room_model in ("block", "two_phase"):
+        result = solve(large, time_limit_sec=120, compiled=large_compiled, room_model=room_model, room_domains="typed")
+        assert result.status in ("OPTIMAL", "FEASIBLE"), (room_model, result.status)
+        violations = find_schedule_violations(large_compiled.with_room_domains("typed"), result)
+        assert not violations, violations[:5]
+        for slots in result.schedule_by_section.values():
+            for _c, _f, room_id, kind in slots.values():
+                assert (room_id in lab_rooms) == (kind == "lab"), (room_id, kind)
+        if room_model == "block":
+            stats = result.metrics.room_domains
+            assert stats is not None and stats.policy == "typed" and stats.room_variables == room_variable_count(large_compiled, "block")
+    assert room_variable_count(large_compiled.with_room_domains("typed"), "per_slot") < room_variable_count(large_compiled, "per_slot")
+    print("✅ block and two_phase: lectures in lecture rooms and labs in lab rooms")
+    return True
+
+if __name__ == "__main__":
+    success = test_room_domains()
+    exit(0 if success else 1)
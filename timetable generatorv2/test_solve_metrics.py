@@ -0,0 +1,60 @@
+"""
+Test to verify the per-phase metrics attached to SolveResult.
+The constraint families must add up to the built model, every solve stage must be timed,
+and the CP-SAT statistics must come from the search that produced the timetable.
+"""
+import json
+
+from src.compiled_problem import compile_problem
+from src.loader import load_problem_from_directory
+from src.timetable_solver import build_model, solve
+
+def test_solve_metrics():
+    print("=" * 70)
+    print("Testing Solve Metrics")
+    print("=" * 70)
+
+    # Load data
+    try:
+        problem = load_problem_from_directory("TT_Flexinput")
+    except FileNotFoundError:
+        print("Using data/templates instead...")
+        problem = load_problem_from_directory("data/templates")
+    compiled = compile_problem(problem)
+
+    print("\n🔧 Checking constraint families against the built model...")
+    tm = build_model(compiled, room_model="per_slot", optimize_gaps=True)
+    proto = tm.model.Proto()
+    assert {"variables", "requirements", "section_overlap", "faculty_clash", "faculty_p1", "gaps"} <= set(tm.families)
+    assert sum(f.variables for f in tm.families.values()) == len(proto.variables)
+    assert sum(f.constraints for f in tm.families.values()) == len(proto.constraints)
+    print(f"✅ {len(tm.families)} families cover {len(proto.variables)} variables, {len(proto.constraints)} constraints")
+
+    print("\n🔧 Solving (block rooms)...")
+    result = solve(problem, time_limit_sec=60, room_model="block")
+    assert result.status != "INFEASIBLE", "Solver could not find a feasible solution"
+    metrics = result.metrics
+    assert metrics is not None
+    for line in metrics.summary_lines():
+        print(f"  {line}")
+    assert {"compile", "build", "search", "extract"} <= set(metrics.stage_sec)
+    assert "rooms" in metrics.families and "stickiness" not in metrics.families
+    assert metrics.search.passes == 1
+    assert 0 < metrics.search.presolve_sec <= metrics.search.wall_sec + 0.5
+    assert metrics.search.branches >= 0 and metrics.search.conflicts >= 0
+    assert metrics.search.best_bound is None  # no objective
+    json.dumps(metrics.to_dict())
+    print("✅ Stages, families and CP-SAT statistics recorded")
+
+    print("\n🔧 Solving (two-phase rooms, gaps)...")
+    result = solve(problem, time_limit_sec=60, compiled=compiled, room_model="two_phase", optimize_gaps=True)
+    assert result.status != "INFEASIBLE", "Solver could not find a feasible solution"
+    metrics = result.metrics
+    assert "compile" not in metrics.stage_sec and "room_assignment" in metrics.stage_sec
+    assert metrics.search.best_bound is not None
+    print(f"✅ Stages: {sorted(metrics.stage_sec)}, best bound {metrics.search.best_bound}")
+    return True
+
+if __name__ == "__main__":
+    success = test_solve_metrics()
+    exit(0 if success else 1)
@@ -0,0 +1,74 @@
+"""
+Test to verify configurable solver parameters (SolverParams) and the process-wide
+worker budget. Concurrent solves must split the budget instead of each taking the
+requested workers, and a captured search log must come back with the solve.
+"""
+import os
+import threading
+
+from src.compiled_problem import compile_problem
+from src.loader import load_problem_from_directory
+from src.solver_params import WORKER_MINIMUM_ENV, SolverParams, WorkerBudget, available_cpus
+from src.timetable_solver import solve
+from src.validation import find_schedule_violations
+
+def test_solver_params():
+    print("=" * 70)
+    print("Testing Solver Parameters and Worker Budget")
+    print("=" * 70)
+
+    # Worker budget: a short pool hands out what is left, down to a full portfolio, then waits
+    budget = WorkerBudget(12, min_workers=4)
+    with budget.reserve(8) as first:
+        with budget.reserve(8) as second:
+            assert (first, second) == (8, 4), f"granted {first} and {second} of 12"
+            waiter_granted = []
+            waiter = threading.Thread(target=lambda: waiter_granted.append(budget.acquire(8)))
+            waiter.start()
+            waiter.join(timeout=0.2)
+            assert waiter.is_alive(), "a reservation below a full portfolio must wait"
+        waiter.join(timeout=5)
+        assert waiter_granted == [4], f"waiting solve got {waiter_granted}"
+        budget.release(waiter_granted[0])
+    assert budget.acquire(2) == 2
+
+    # By default a solve starts as soon as one worker is free: concurrent solves share the pool
+    shared = WorkerBudget(4)
+    first = shared.acquire(3)
+    assert (first, shared.acquire(4)) == (3, 1)
+    print(f"\n✅ Worker budget splits 12 workers as 8 + 4, then waits; 4 shared workers go as 3 + 1 (available CPUs here: {available_cpus()})")
+
+    minimum = os.environ.pop(WORKER_MINIMUM_ENV, None)
+    try:
+        assert SolverParams().requested_workers() == available_cpus()
+        os.environ[WORKER_MINIMUM_ENV] = str(available_cpus() + 4)
+        assert SolverParams().requested_workers() == available_cpus() + 4
+    finally:
+        os.environ.pop(WORKER_MINIMUM_ENV, None)
+        if minimum is not None:
+            os.environ[WORKER_MINIMUM_ENV] = minimum
+    solver = SolverParams(num_workers=2, random_seed=7, relative_gap_limit=0.05).new_solver(30)
+    assert solver.parameters.num_workers == 2 and solver.parameters.random_seed == 7
+    assert abs(solver.parameters.relative_gap_limit - 0.05) < 1e-9
+    print("✅ Default workers follow the CPUs and TT_SOLVER_MIN_WORKERS; workers, seed and gap limit reach the CP-SAT parameters")
+
+    # Load data
+    try:
+        problem = load_problem_from_directory("TT_Flexinput")
+    except FileNotFoundError:
+        print("Using data/templates instead...")
+        problem = load_problem_from_directory("data/templates")
+    compiled = compile_problem(problem)
+
+    print("\n🔧 Solving with a captured search log...")
+    params = SolverParams(log_lines=[])
+    result = solve(problem, time_limit_sec=60, compiled=compiled, room_model="two_phase", params=params)
+    assert result.status != "INFEASIBLE", "Solver could not find a feasible solution"
+    assert not find_schedule_violations(compiled, result)
+    assert any("CP-SAT" in line for line in params.log_lines), "search log was not captured"
+    print(f"✅ Solver Status: {result.status}; {len(params.log_lines)} log lines captured")
+    return True
+
+if __name__ == "__main__":
+    success = test_solver_params()
+    exit(0 if success else 1)
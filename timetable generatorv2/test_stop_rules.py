@@ -0,0 +1,62 @@
+"""
+Test to verify adaptive stopping of gap optimization (SolverParams.stop_rules).
+A gap-optimized solve must find a valid timetable and say why it stopped; a target
+objective must stop at the first timetable that good, and a plateau rule must stop a
+search that stops improving.
+"""
+from src.compiled_problem import compile_problem
+from src.loader import load_problem_from_directory
+from src.solver_params import SolverParams, StopRules
+from src.timetable_solver import STOP_OPTIMAL, STOP_PLATEAU, STOP_TARGET, solve
+from src.validation import find_schedule_violations
+
+def _check(compiled, result):
+    assert result.status != "INFEASIBLE", "Solver could not find a feasible solution"
+    violations = find_schedule_violations(compiled, result)
+    for v in violations:
+        print(f"  ❌ {v}")
+    assert not violations, f"{len(violations)} constraint violations"
+
+def test_stop_rules():
+    print("=" * 70)
+    print("Testing Plateau / Target Stopping for Gap Optimization")
+    print("=" * 70)
+
+    assert StopRules(no_improvement_sec=20, no_improvement_fraction=0.1).plateau_sec(60) == 6
+    assert StopRules(no_improvement_sec=5).plateau_sec(60) == 5
+    assert StopRules().plateau_sec(60) is None
+
+    # Load data
+    try:
+        problem = load_problem_from_directory("TT_Flexinput")
+    except FileNotFoundError:
+        print("Using data/templates instead...")
+        problem = load_problem_from_directory("data/templates")
+    compiled = compile_problem(problem)
+
+    print("\n🔧 Optimizing gaps (stop at the lower bound)...")
+    result = solve(problem, time_limit_sec=60, compiled=compiled, room_model="two_phase", optimize_gaps=True)
+    _check(compiled, result)
+    assert result.objective_value is not None and result.stop_reason is not None
+    print(f"✅ Solver Status: {result.status}, gaps: {result.objective_value}, stopped: {result.stop_reason}")
+
+    print("\n🔧 Optimizing gaps with a loose target objective...")
+    target = 10_000
+    result = solve(problem, time_limit_sec=60, compiled=compiled, room_model="block", optimize_gaps=True,
+                   params=SolverParams(stop_rules=StopRules(target_objective=target)))
+    _check(compiled, result)
+    assert result.objective_value <= target
+    assert result.stop_reason in (STOP_TARGET, STOP_OPTIMAL), result.stop_reason
+    print(f"✅ Stopped at gaps {result.objective_value} ({result.stop_reason})")
+
+    print("\n🔧 Optimizing gaps with a tiny plateau window...")
+    result = solve(problem, time_limit_sec=60, compiled=compiled, room_model="block", optimize_gaps=True,
+                   params=SolverParams(stop_rules=StopRules(no_improvement_sec=0.01)))
+    _check(compiled, result)
+    assert result.stop_reason in (STOP_PLATEAU, STOP_OPTIMAL), result.stop_reason
+    print(f"✅ Stopped at gaps {result.objective_value} ({result.stop_reason})")
+    return True
+
+if __name__ == "__main__":
+    success = test_stop_rules()
+    exit(0 if success else 1)
@@ -0,0 +1,118 @@
+"""
+Test to verify the two-phase room solve (room_model="two_phase").
+Phase 1 schedules classes against aggregate room capacity only, phase 2 assigns
+one room per section block; blocks that cannot be roomed cut phase 1 and re-solve.
+"""
+from ortools.sat.python import cp_model
+
+from src.compiled_problem import compile_problem
+from src.loader import load_problem_from_directory
+from src.models import Course, DayPeriod, Faculty, FacultyCourseAssignment, ProblemData, Room, Section
+from src.timetable_solver import _add_no_good_cut, build_model, solve
+from src.validation import find_schedule_violations
+
+def _three_sections_two_rooms(days):
+    # Three sections with 2 lectures each, 3 periods per day, 2 rooms.
+    # On a single day every slot holds exactly two sections, so each pair of sections
+    # meets at some period and one block would need three rooms: only room cuts reveal it.
+    day_names = ["Monday", "Tuesday"][:days]
+    return ProblemData(
+        day_periods=[DayPeriod(day_index=d, day_name=name, period_index=p) for d, name in enumerate(day_names) for p in (1, 2, 3)],
+        sections=[Section(section_id=s, section_name=s, num_students=30) for s in "ABC"],
+        faculty=[Faculty(faculty_id=f"F{s}", faculty_name=f"Faculty {s}") for s in "ABC"],
+        courses=[Course(course_id="C1", course_name="Course 1", lecture_periods_per_week=2)],
+        section_requirements=[],
+        faculty_courses=[FacultyCourseAssignment(faculty_id=f"F{s}", course_id="C1", section_id=s) for s in "ABC"],
+        rooms=[Room(room_id=r, room_name=r, capacity=40) for r in ("R1", "R2")],
+    )
+
+def _lab_and_lectures():
+    # One section with 2 lectures and a 2-period lab on a day of two 2-period blocks (break
+    # at period 3): the lab takes one block and the lectures the other, in either order
+    return ProblemData(
+        day_periods=[DayPeriod(day_index=0, day_name="Monday", period_index=p, is_break=p == 3) for p in (1, 2, 3, 4, 5)],
+        sections=[Section(section_id="S", section_name="S", num_students=30)],
+        faculty=[Faculty(faculty_id=f, faculty_name=f) for f in ("F1", "F2")],
+        courses=[
+            Course(course_id="LEC", course_name="Lecture", lecture_periods_per_week=2),
+            Course(course_id="LAB", course_name="Lab", is_lab=True, lab_sessions_per_week=1, lab_block_size=2),
+        ],
+        section_requirements=[],
+        faculty_courses=[
+            FacultyCourseAssignment(faculty_id="F1", course_id="LEC", section_id="S"),
+            FacultyCourseAssignment(faculty_id="F2", course_id="LAB", section_id="S"),
+        ],
+        rooms=[Room(room_id="R1", room_name="R1", capacity=40), Room(room_id="R2", room_name="R2", capacity=40, is_lab=True)],
+    )
+
+def test_two_phase_rooms():
+    print("=" * 70)
+    print("Testing Two-Phase Room Solve (timetable first, rooms per block)")
+    print("=" * 70)
+
+    # Load data
+    try:
+        problem = load_problem_from_directory("TT_Flexinput")
+    except FileNotFoundError:
+        print("Using data/templates instead...")
+        problem = load_problem_from_directory("data/templates")
+    compiled = compile_problem(problem)
+
+    # Phase 1 has no room variables at all
+    tm = build_model(compiled, room_model="two_phase")
+    assert not tm.R_lec and not tm.R_lab_start and not tm.SectionBlockRoom
+    print(f"\n📋 Phase 1 variables: {len(tm.model.Proto().variables)}")
+
+    # Solve
+    print("\n🔧 Solving timetable in two phases...")
+    result = solve(problem, time_limit_sec=60, compiled=compiled, room_model="two_phase")
+    assert result.status != "INFEASIBLE", "Solver could not find a feasible solution"
+    print(f"✅ Solver Status: {result.status}")
+
+    # Verify
+    violations = find_schedule_violations(compiled, result)
+    for v in violations:
+        print(f"  ❌ {v}")
+    assert not violations, f"{len(violations)} constraint violations"
+    rooms_used = {room for by_t in result.schedule_by_section.values() for (_, _, room, _) in by_t.values()}
+    assert "" not in rooms_used, "Every class must have a room"
+    print(f"✅ All constraints satisfied; {len(rooms_used)} rooms in use")
+
+    # Room conflicts inside a block must feed back into phase 1
+    print("\n🔧 Checking phase 2 cuts on a block that needs three rooms...")
+    one_day = _three_sections_two_rooms(days=1)
+    assert solve(one_day, time_limit_sec=20, room_model="per_slot").status == "INFEASIBLE"
+    assert solve(one_day, time_limit_sec=20, room_model="two_phase").status == "INFEASIBLE"
+    print("✅ Infeasible single-day instance rejected by both room models")
+
+    two_days = _three_sections_two_rooms(days=2)
+    result = solve(two_days, time_limit_sec=20, room_model="two_phase")
+    assert result.status != "INFEASIBLE"
+    assert not find_schedule_violations(compile_problem(two_days), result)
+    print("✅ Two-day instance roomed without violations")
+
+    # Under typed room domains a cut must only forbid the same kinds on the same timeslots
+    print("\n🔧 Checking a typed-domain cut on a lab block...")
+    swap = _lab_and_lectures()
+    for room_domains in ("typed", "capacity"):
+        tm = build_model(compile_problem(swap), room_model="two_phase", room_domains=room_domains)
+        block_of = tm.compiled.timeslot_to_block
+        first_block = [t for t in tm.compiled.T_non_break if block_of[t] == block_of[tm.compiled.T_non_break[0]]]
+        second_block = [t for t in tm.compiled.T_non_break if t not in first_block]
+        kinds = {"S": {**{t: "lab" for t in first_block}, **{t: "lecture" for t in second_block}}}
+        _add_no_good_cut(tm, [("S", t) for t in tm.compiled.T_non_break], kinds, {})
+        solver = cp_model.CpSolver()
+        status = solver.Solve(tm.model)
+        # Capacity domains let any block hold either kind, so the cut forbids the whole occupancy
+        assert (status in (cp_model.OPTIMAL, cp_model.FEASIBLE)) == (room_domains == "typed"), (room_domains, solver.StatusName(status))
+        if room_domains == "typed":
+            starts = [start_t for (_s, _c, start_t), y in tm.Y_lab_start.items() if solver.Value(y)]
+            assert starts == [second_block[0]], starts
+    result = solve(swap, time_limit_sec=20, room_model="two_phase", room_domains="typed")
+    assert result.status in ("OPTIMAL", "FEASIBLE") and not find_schedule_violations(compile_problem(swap).with_room_domains("typed"), result)
+    print("✅ Cutting the lab from the first block leaves the swapped timetable")
+    return True
+
+if __name__ == "__main__":
+    success = test_two_phase_rooms()
+    exit(0 if success else 1)
@@ -0,0 +1,88 @@
+"""
+Test to verify warm-start hints from a previous timetable (solve(..., hint_from=...)).
+An exported timetable must read back into exactly the classes it contains, and a
+re-solve after a small change must stay valid when started from it. The presolve-free hint pass
+must hand the caller's presolve and symmetry settings back to the main pass.
+"""
+import tempfile
+
+from ortools.sat.python import cp_model
+
+from src.compiled_problem import compile_problem
+from src.exporter import export_all
+from src.loader import load_problem_from_directory
+from src.solver_params import SolverParams
+from src.timetable_solver import _solve_from_hint, build_model, solve
+from src.validation import find_schedule_violations
+from src.warm_start import hint_from_output_dir, hint_from_result
+
+class _SearchRecorder:
+    # Stands in for the search monitor: records the presolve and symmetry settings of each pass
+    def __init__(self, solver):
+        self.solver = solver
+        self.stopped = False
+        self.passes = []
+
+    def search(self, model):
+        self.passes.append((self.solver.parameters.cp_model_presolve, self.solver.parameters.symmetry_level))
+        return cp_model.UNKNOWN
+
+def test_warm_start():
+    print("=" * 70)
+    print("Testing Warm Start From a Previous Timetable")
+    print("=" * 70)
+
+    # Load data
+    try:
+        problem = load_problem_from_directory("TT_Flexinput")
+    except FileNotFoundError:
+        print("Using data/templates instead...")
+        problem = load_problem_from_directory("data/templates")
+    compiled = compile_problem(problem)
+
+    print("\n🔧 Solving the original timetable...")
+    previous = solve(problem, time_limit_sec=60, compiled=compiled, room_model="two_phase")
+    assert previous.status != "INFEASIBLE", "Solver could not find a feasible solution"
+
+    # Round trip through the exported CSVs
+    with tempfile.TemporaryDirectory() as out_dir:
+        export_all(previous, out_dir)
+        from_dir = hint_from_output_dir(compiled, out_dir)
+    from_result = hint_from_result(compiled, previous)
+    assert not from_dir.dropped and not from_result.dropped
+    assert from_dir.lectures == from_result.lectures
+    assert from_dir.lab_starts == from_result.lab_starts
+    assert from_dir.rooms == from_result.rooms
+    expected = sum(req.weekly_lectures + (req.weekly_lab_sessions if req.has_labs else 0) for req in compiled.requirements)
+    assert from_dir.num_classes == expected, f"{from_dir.num_classes} hinted classes, {expected} expected"
+    print(f"✅ Exported timetable reads back into all {expected} classes")
+
+    # Close the rooms of one section's first class and re-solve from the old timetable
+    section_id, by_t = next(iter(previous.schedule_by_section.items()))
+    closed_room = next(iter(by_t.values()))[2]
+    changed = problem.copy(update={"rooms": [r for r in problem.rooms if r.room_id != closed_room]})
+    changed_compiled = compile_problem(changed)
+    hint = hint_from_result(changed_compiled, previous)
+    assert any(closed_room in d for d in hint.dropped)
+    print(f"\n🔧 Re-solving without room {closed_room} from the previous timetable...")
+    result = solve(changed, time_limit_sec=60, compiled=changed_compiled, room_model="block", hint_from=hint)
+    assert result.status != "INFEASIBLE", "Warm-started solve found no timetable"
+    violations = find_schedule_violations(changed_compiled, result)
+    for v in violations:
+        print(f"  ❌ {v}")
+    assert not violations, f"{len(violations)} constraint violations"
+    rooms_used = {room for slots in result.schedule_by_section.values() for (_, _, room, _) in slots.values()}
+    assert closed_room not in rooms_used
+    print(f"✅ Solver Status: {result.status}; closed room no longer used")
+
+    print("\n🔧 Checking that the main pass keeps the caller's CP-SAT settings...")
+    solver = SolverParams(cp_sat={"cp_model_presolve": False, "symmetry_level": 1}).new_solver(10)
+    recorder = _SearchRecorder(solver)
+    _solve_from_hint(build_model(changed_compiled, room_model="block"), solver, 10.0, recorder)
+    assert recorder.passes == [(False, 0), (False, 1)], recorder.passes
+    print("✅ Hint pass without presolve or symmetry, main pass with the caller's settings")
+    return True
+
+if __name__ == "__main__":
+    success = test_warm_start()
+    exit(0 if success else 1)